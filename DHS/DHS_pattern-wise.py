@@ -1,3 +1,9 @@
+import os
+import sys
+import json
+import unicodedata
+from array import array
+from collections import OrderedDict
 # In data passing, 
 # Stress patterns are represented as an array of character-free syllables, represented as [foot_position, stressed] where
 #   foot_position signifies the syllable's position in a foot: 
@@ -42,47 +48,95 @@ class Character:
                 ['d͡ʒ',  
                 't͡ʃ', 't͡s', 
                 'tʃh']]
+    # Sets of the lists above for constant-time lookups, and the length of the longest segment in codepoints
+    vowel_set = set(vowels)
+    consonant_set = set(consonants[0])
+    bound_consonant_set = set(consonants[1])
+    inventory = vowel_set | consonant_set | bound_consonant_set
+    max_length = max([len(segment) for segment in inventory])
     # Returns True if a is a vowel, False otherwise
     def is_vowel(a):
-        return a in Character.vowels
+        return a in Character.vowel_set
     # Returns True if b is a consonant, False otherwise
     def is_consonant(b):
-        return b in Character.consonants[0]
+        return b in Character.consonant_set
     # Returns True if bcd is a bound consonant, False otherwise
     def is_bound_consonant(bcd):
-        return bcd in Character.consonants[1]
+        return bcd in Character.bound_consonant_set
+    # Splits the string into segments in one pass, each as (segment, base): the segment is the longest segment of the
+    # inventory starting at the position (so that multi-codepoint vowels and bound consonants are kept whole), or else
+    # a single character, with the combining marks following it; the base is the segment without those marks
+    def segments(string):
+        segments = []
+        i = 0
+        while i < len(string):
+            length = 1
+            for size in range(min(Character.max_length, len(string) - i), 1, -1):
+                if string[i:i + size] in Character.inventory:
+                    length = size
+                    break
+            base = string[i:i + length]
+            # A precomposed character outside the inventory (e.g. ã) counts as the character it is composed on
+            if not base in Character.inventory:
+                base = unicodedata.normalize("NFD", base)[:1]
+            while i + length < len(string) and unicodedata.combining(string[i + length]):
+                length += 1
+            segments += [(string[i:i + length], base)]
+            i += length
+        return segments
+    # Returns the kind of segment of the base: "nucleus" for a vowel, "consonant" or "other"
+    def kind(base):
+        if base in Character.vowel_set:
+            return "nucleus"
+        if base in Character.consonant_set or base in Character.bound_consonant_set:
+            return "consonant"
+        return "other"
+    # Returns the (onset, nucleus, coda) of each syllable of the string in one pass over its segments, None for an
+    # onset or coda not present; a nucleus starts at a vowel at the start of the word or after a consonant and
+    # takes in the vowels following it until the next consonant, the onset is the consonant before it, and the coda
+    # is the consonant after it if that is not the onset of the next syllable
+    def syllabify(string):
+        segments = Character.segments(string)
+        kinds = [Character.kind(base) for segment, base in segments]
+        parts = []
+        i = 0
+        while i < len(segments):
+            if kinds[i] != "nucleus":
+                i += 1
+                continue
+            onset = segments[i - 1][0] if i > 0 and kinds[i - 1] == "consonant" else None
+            nucleus = segments[i][0]
+            i += 1
+            while i < len(segments) and kinds[i] != "consonant":
+                if kinds[i] == "nucleus":
+                    nucleus += segments[i][0]
+                i += 1
+            coda = None
+            if i < len(segments) and (i + 1 >= len(segments) or kinds[i + 1] != "nucleus"):
+                coda = segments[i][0]
+            parts += [(onset, nucleus, coda)]
+        return parts
 # Class for translating and printing words in syllables of different formats
 class Syllable_Processor:
     # Turns a word string into separate syllables
     def to_syllables(string):
         syllables = []
-        syllable_indices = []
-        for i in range(len(string)):
-            if Character.is_vowel(string[i]):
-                if i == 0 or (i >= 1 and Character.is_consonant(string[i-1])) or (i >= 3 and Character.is_bound_consonant(string[i-3:i])):
-                    syllables += string[i]
-                    syllable_indices += [i]
-                else:
-                    syllables[len(syllables)-1] += string[i]
-        for i in range(len(syllable_indices)):
-            index = syllable_indices[i]
-            if index >= 3 and Character.is_bound_consonant(string[index-3:index]):
-                syllables[i] = string[index-3:index+1]
-            elif index >= 1 and Character.is_consonant(string[index-1]):
-                syllables[i] = string[index-1:index+1]
-            if index + 3 < len(string) and Character.is_bound_consonant(string[index+1:index+4]):
-                if not (index + 4 in syllable_indices) or index + 4 >= len(string):
-                    syllables[i] = syllables[i] + string[index+1:index+4]
-            elif index + 1 < len(string) and Character.is_consonant(string[index+1]):
-                if not (index + 2 in syllable_indices) or index + 2 >= len(string):
-                    syllables[i] = syllables[i] + string[index+1]
+        for onset, nucleus, coda in Character.syllabify(string):
+            syllables += [(onset or "") + nucleus + (coda or "")]
         return syllables
     # Prints a given stress pattern with 'Li' denoting the i-th syllable
     def print_stress_pattern(stress_pattern):
+        print(Syllable_Processor.stress_pattern_string(stress_pattern))
+    # Returns a given stress pattern as a string in the format of print_stress_pattern
+    def stress_pattern_string(stress_pattern):
         proxy = ['L' + str(i + 1) for i in range(len(stress_pattern))]
-        Syllable_Processor.print_syllables_stressed(proxy, stress_pattern)
+        return Syllable_Processor.syllables_stressed_string(proxy, stress_pattern)
     # Prints a word in a given stress pattern
     def print_syllables_stressed(syllables, stress_pattern):
+        print(Syllable_Processor.syllables_stressed_string(syllables, stress_pattern))
+    # Returns a word in a given stress pattern as a string in the format of print_syllables_stressed
+    def syllables_stressed_string(syllables, stress_pattern):
+        word = ""
         for i in range(len(syllables)):
             syllable = syllables[i]
             if stress_pattern[i][1] == 1:
@@ -91,23 +145,204 @@ class Syllable_Processor:
                 syllable = "ˌ" + syllable
             match stress_pattern[i][0]:
                 case -1:
-                    print(syllable, end="")
+                    word += syllable
                 case 0: 
-                    print("(", syllable, sep="", end="")
+                    word += "(" + syllable
                 case 1:
-                    print(syllable, ")", sep="", end="")
+                    word += syllable + ")"
                 case 2:
-                    print("(", syllable, ")", sep="", end="")
-        print()
+                    word += "(" + syllable + ")"
+        return word
+
+# Class of rankings simplified before the pattern is built: the violations that cannot change the pattern given the
+# ones ranked above them are found by looking at the ranking alone and left out by Stress.op, each with the reason; the
+# result is reused for the same ranking
+class SimplifiedRanking:
+    cache = OrderedDict() # Ranking -> simplified ranking, the least recently used first
+    max_size = 1024 # Number of simplified rankings kept in cache
+    # Constructor, with violations in the format of Test.translate
+    def __init__(self, violations):
+        entries = [(rank, list(violations[rank])) for rank in range(len(violations))]
+        # Violations kept and word violations among them, as Stress.violation_rank and Stress.word_violation
+        self.violations = []
+        self.word_violation = [violation[0] for rank, violation in entries if violation[0] in ["HD(w)"]]
+        # (rank, violation, reason) of each violation left out, in the order found
+        self.removed = []
+        def remove(i, reason):
+            self.removed.append((entries[i][0], entries[i][1], reason))
+            entries[i] = None
+        # Trochee and Iamb, regardless of directions, determines the stress and foot structures for the entire word
+        # Thus, they are considered as in the same type and redundant after one is already considered
+        above = None
+        for i in range(len(entries)):
+            if entries[i] != None and entries[i][1][0] in ["Trochee", "Iamb"]:
+                if above != None:
+                    remove(i, "ranked below " + SimplifiedRanking.describe(above) + ", which already decides the stress and foot structures of the entire word")
+                    break
+                above = entries[i]
+        # When ranked lower than Trochee or Iamb or another Parse, Parse has no effect on the optimal structure
+        above = None
+        parse = None
+        for i in range(len(entries)):
+            if entries[i] != None:
+                if entries[i][1][0] == "Parse":
+                    if above != None or parse != None:
+                        remove(i, "ranked below " + SimplifiedRanking.describe(above or parse) + ", after which Parse has no effect on the optimal structure")
+                    else:
+                        parse = entries[i]
+                elif entries[i][1][0] in ["Trochee", "Iamb"] and above == None:
+                    above = entries[i]
+        # When ranked lower than Trochee or Iamb or Parse, word violations has no effect on the optimal structure
+        above = None
+        for i in range(len(entries)):
+            if entries[i] != None:
+                if above != None and entries[i][1][0] in self.word_violation:
+                    self.word_violation.remove(entries[i][1][0])
+                    remove(i, "ranked below " + SimplifiedRanking.describe(above) + ", after which word violations have no effect on the optimal structure")
+                elif entries[i][1][0] in ["Trochee", "Iamb", "Parse"] and above == None:
+                    above = entries[i]
+        # Once Parse and then Trochee or Iamb have been applied, Parse has finalized every foot position and the
+        # stresses are finalized by the head of each foot of two and in_between for the rest, so the pattern is unique
+        # and the violations ranked lower are never applied
+        parse = None
+        form = None
+        for i in range(len(entries)):
+            if entries[i] != None:
+                if parse != None and form != None:
+                    if entries[i][1][0] in self.word_violation:
+                        self.word_violation.remove(entries[i][1][0])
+                    remove(i, "ranked below " + SimplifiedRanking.describe(parse) + " and " + SimplifiedRanking.describe(form) + ", after which every part of the pattern is finalized, so the pattern is unique")
+                elif entries[i][1][0] == "Parse" and parse == None:
+                    parse = entries[i]
+                elif entries[i][1][0] in ["Trochee", "Iamb"] and parse != None and form == None:
+                    form = entries[i]
+        self.violations = [entry[1] for entry in entries if entry != None]
+    # Returns the simplified ranking of the violations (in the format of Test.translate), reusing the one found before
+    # for the same ranking if it is among the max_size used last
+    def get(violations):
+        signature = tuple([tuple(violation) for violation in violations])
+        if signature in SimplifiedRanking.cache:
+            SimplifiedRanking.cache.move_to_end(signature)
+            return SimplifiedRanking.cache[signature]
+        simplified = SimplifiedRanking(violations)
+        SimplifiedRanking.cache[signature] = simplified
+        if len(SimplifiedRanking.cache) > SimplifiedRanking.max_size:
+            SimplifiedRanking.cache.popitem(last=False)
+        return simplified
+    # Returns the violation of a (rank, violation) entry as print_v prints it, with its rank
+    def describe(entry):
+        rank, violation = entry
+        return str(violation[0]) + ("(leftward)" if violation[1] else "(rightward)") + " (rank " + str(rank + 1) + ")"
+    # Returns the lines reporting the violations left out
+    def report(self):
+        return [SimplifiedRanking.describe((rank, violation)) + ": " + reason for rank, violation, reason in self.removed]
 
-# Class for calculating the optimal stress pattern for a given number of syllables
+# Class for calculating the optimal stress pattern for a given number of syllables, or for a batch of words of different
+# numbers of syllables together
+# The pattern is kept as two parallel arrays of small integers (foot positions and stresses, NONE if not assigned yet),
+# one row of stride slots for each word (padded to the longest), with a bitmask of the finalized slots of each part,
+# bitmasks of the slots holding each value, and the count of the parts not finalized yet
 class Stress:
-    # Constructor
+    # Violation types handled by Stress.mod
+    violation_types = ["Trochee", "Iamb", "Parse", "NonFin", "HD(w)"]
+    # Code of a part not assigned yet
+    NONE = -2
+    # Table turning the digits of a bitmask (one character per slot) into bytes of 0 or 0xFF
+    spread = bytes.maketrans(b"01", b"\x00\xff")
+    # Constructor, with the number of syllables or a list of them (one row for each)
     def __init__(self, number_of_syllables):
-        self.pattern = [[None,None] for i in range(number_of_syllables)]
-        self.finalize_mark = [[False,False] for i in range(number_of_syllables)]
+        self.batched = type(number_of_syllables) != int
+        if self.batched:
+            self.lengths = list(number_of_syllables)
+        else:
+            self.lengths = [number_of_syllables]
+        self.stride = max(self.lengths, default=0)
+        size = self.stride * len(self.lengths)
+        self.parts = [array("b", [Stress.NONE]) * size, array("b", [Stress.NONE]) * size]
+        self.finals = [0, 0]
+        self.masks = [{}, {}]
+        # Bitmasks of the stresses assigned as booleans (False by NonFin), kept so the pattern gives them back as such
+        self.booleans = 0
+        self.rows = [((1 << n) - 1) << (row * self.stride) for row, n in enumerate(self.lengths)]
+        self.unfinalized = 2 * sum(self.lengths)
+        # Rows the current violation applies to: every row for the first violation, then the rows not finalized yet
+        self.active = list(range(len(self.lengths)))
+        # SimplifiedRanking of the violations, set by clean
+        self.simplified = None
+        # Errors of the rows of a batch that failed (by row), as a single word would raise them
+        self.errors = {}
         self.violation_rank = []
         self.word_violation = []
+    # The stress pattern of the (first) word, as a list of [foot_position, stressed]
+    # The list is a copy, so a syllable is changed by setting the whole list, which is written back into the arrays
+    @property
+    def pattern(self):
+        return self.row_pattern(0)
+    @pattern.setter
+    def pattern(self, pattern):
+        self.set_row_pattern(0, pattern)
+    # Whether each part of the stress pattern of the (first) word is finalized, as a list of [foot_position, stressed]
+    # The list is a copy, so a syllable is changed by setting the whole list, which is written back into the bitmasks
+    @property
+    def finalize_mark(self):
+        return self.row_finalize_mark(0)
+    @finalize_mark.setter
+    def finalize_mark(self, finalize_mark):
+        self.set_row_finalize_mark(0, finalize_mark)
+    # Returns the stress pattern of each row
+    def patterns(self):
+        return [self.row_pattern(row) for row in range(len(self.lengths))]
+    # Returns the stress pattern of a row
+    def row_pattern(self, row):
+        start = row * self.stride
+        return [[self.value(0, slot), self.value(1, slot)] for slot in range(start, start + self.lengths[row])]
+    # Returns whether each part of the stress pattern of a row is finalized
+    def row_finalize_mark(self, row):
+        start = row * self.stride
+        return [[bool(self.finals[0] >> slot & 1), bool(self.finals[1] >> slot & 1)] for slot in range(start, start + self.lengths[row])]
+    # Writes the stress pattern of a row (a list of [foot_position, stressed], None for a part not assigned), raising
+    # ValueError if it does not have a part for each syllable of the row
+    def set_row_pattern(self, row, pattern):
+        self.check_row(row, pattern, "Stress pattern")
+        for i in range(self.lengths[row]):
+            slot = row * self.stride + i
+            for pos in [0, 1]:
+                if pattern[i][pos] == None:
+                    self.erase(pos, slot)
+                else:
+                    self.put(pos, slot, pattern[i][pos])
+    # Writes whether each part of the stress pattern of a row is finalized (a list of [foot_position, stressed]),
+    # raising ValueError if it does not have a part for each syllable of the row
+    def set_row_finalize_mark(self, row, finalize_mark):
+        self.check_row(row, finalize_mark, "Finalize marks")
+        for i in range(self.lengths[row]):
+            bit = 1 << (row * self.stride + i)
+            for pos in [0, 1]:
+                if finalize_mark[i][pos] and not self.finals[pos] & bit:
+                    self.finals[pos] |= bit
+                    self.unfinalized -= 1
+                elif not finalize_mark[i][pos] and self.finals[pos] & bit:
+                    self.finals[pos] &= ~bit
+                    self.unfinalized += 1
+    # Raises ValueError if the parts (of pattern or finalize_mark) do not have two for each syllable of the row
+    def check_row(self, row, parts, name):
+        if len(parts) != self.lengths[row] or any([len(part) != 2 for part in parts]):
+            raise ValueError(name + " " + str(parts) + " does not match the " + str(self.lengths[row]) + " syllable(s) of the word")
+    # Returns the value of a part of a slot, None if not assigned yet
+    def value(self, pos, slot):
+        code = self.parts[pos][slot]
+        if code == Stress.NONE:
+            return None
+        if pos == 1 and self.booleans >> slot & 1:
+            return bool(code)
+        return code
+    # Returns the slot of the syllable of a row at index (negative from the end, as in lists), raising IndexError if
+    # the row has no such syllable
+    def slot(self, row, index):
+        n = self.lengths[row]
+        if index < -n or index >= n:
+            raise IndexError("list index out of range")
+        return row * self.stride + index % n
     # Adds a violation type with direction
     def add(self, violation):
         self.violation_rank += [violation]
@@ -115,170 +350,183 @@ class Stress:
         if violation[0] in word_violation_dict:
             self.word_violation += [violation[0]]
     # Modify a single part of stress pattern if the part is not finalized yet
-    def assign(self, index, pos, assign_value, finalize_current_change):
-        if not self.finalize_mark[index][pos]:
-            self.pattern[index][pos] = assign_value
+    def assign(self, index, pos, assign_value, finalize_current_change, row=0):
+        slot = self.slot(row, index)
+        if not self.finals[pos] >> slot & 1:
+            self.put(pos, slot, assign_value)
             if finalize_current_change:
-                self.finalize_mark[index][pos] = True
-    # Removes redundant violations
+                self.finalize(pos, slot)
+    # Modify a part of every slot in the bitmask to the same value and finalizes them (the slots are not finalized)
+    def assign_mask(self, pos, mask, assign_value):
+        if not mask:
+            return
+        for code in self.masks[pos]:
+            self.masks[pos][code] &= ~mask
+        code = int(assign_value)
+        self.masks[pos][code] = self.masks[pos].get(code, 0) | mask
+        if pos == 1:
+            if type(assign_value) == bool:
+                self.booleans |= mask
+            else:
+                self.booleans &= ~mask
+        self.finals[pos] |= mask
+        self.unfinalized -= mask.bit_count()
+        # The array is written as a whole, as the integer of its bytes with those of the slots replaced by the code
+        size = len(self.parts[pos])
+        selected = int.from_bytes(bin(mask)[:1:-1].ljust(size, "0").encode().translate(Stress.spread), "little")
+        current = int.from_bytes(self.parts[pos], "little")
+        filled = int.from_bytes(bytes([code & 0xFF]) * size, "little")
+        self.parts[pos] = array("b", (current & ~selected | filled & selected).to_bytes(size, "little"))
+    # Modify the foot positions of syllables start to end - 1 of a row not finalized yet to alternate between 0 and 1
+    # from start, and finalizes them
+    def assign_alternating(self, row, start, end):
+        if end <= start:
+            return
+        shift = row * self.stride + start
+        span = ((1 << (end - start)) - 1) << shift
+        lefts = span & (int("01" * ((end - start + 1) // 2), 2) << shift)
+        free = span & ~self.finals[0]
+        self.assign_mask(0, free & lefts, 0)
+        self.assign_mask(0, free & ~lefts, 1)
+    # Writes the value of a part of a slot
+    def put(self, pos, slot, assign_value):
+        bit = 1 << slot
+        code = self.parts[pos][slot]
+        if code != Stress.NONE:
+            self.masks[pos][code] &= ~bit
+        code = int(assign_value)
+        self.parts[pos][slot] = code
+        self.masks[pos][code] = self.masks[pos].get(code, 0) | bit
+        if pos == 1:
+            if type(assign_value) == bool:
+                self.booleans |= bit
+            else:
+                self.booleans &= ~bit
+    # Makes a part of a slot not assigned
+    def erase(self, pos, slot):
+        bit = 1 << slot
+        code = self.parts[pos][slot]
+        if code != Stress.NONE:
+            self.masks[pos][code] &= ~bit
+        self.parts[pos][slot] = Stress.NONE
+        self.booleans &= ~bit
+    # Finalizes a part of a slot
+    def finalize(self, pos, slot):
+        bit = 1 << slot
+        if not self.finals[pos] & bit:
+            self.finals[pos] |= bit
+            self.unfinalized -= 1
+    # Returns the bitmask of the slots of a part having the value
+    def mask(self, pos, value):
+        return self.masks[pos].get(value, 0)
+    # Returns the bitmask of the slots of the active rows
+    def active_mask(self):
+        mask = 0
+        for row in self.active:
+            mask |= self.rows[row]
+        return mask
+    # Removes redundant violations, as found by SimplifiedRanking (kept in self.simplified), and returns them
     def clean(self):
-        deleted = []
-        # Trochee and Iamb, regardless of directions, determines the stress and foot structures for the entire word
-        # Thus, they are considered as in the same type and redundant after one is already considered
-        to_ban_after = ["Trochee", "Iamb"]
-        start_ban = False
-        for i in range(len(self.violation_rank)):
-            if self.violation_rank[i] != None and (self.violation_rank[i][0] in to_ban_after):
-                if start_ban:
-                    deleted += [self.violation_rank[i]]
-                    self.violation_rank[i] = None
-                    break
-                else:
-                    start_ban = True
-        # When ranked lower than Trochee or Iamb or another Parse, Parse has no effect on the optimal structure
-        to_ban_after = ["Trochee", "Iamb"]
-        start_ban = False
-        has_parse = False
-        for i in range(len(self.violation_rank)):
-            if self.violation_rank[i] != None:
-                if self.violation_rank[i][0] == "Parse":
-                    if start_ban:
-                        deleted += [self.violation_rank[i]]
-                        self.violation_rank[i] = None
-                    elif has_parse:
-                        deleted += [self.violation_rank[i]]
-                        self.violation_rank[i] = None
-                    else:
-                        has_parse = True
-                elif self.violation_rank[i][0] in to_ban_after and not start_ban:
-                    start_ban = True
-        # When ranked lower than Trochee or Iamb or Parse, word violations has no effect on the optimal structure
-        to_ban_after = ["Trochee", "Iamb", "Parse"]
-        start_ban = False
-        for i in range(len(self.violation_rank)):
-            if self.violation_rank[i] != None:
-                if start_ban and self.violation_rank[i][0] in self.word_violation:
-                    deleted += [self.violation_rank[i]]
-                    self.word_violation.remove(self.violation_rank[i][0])
-                    self.violation_rank[i] = None
-                elif self.violation_rank[i][0] in to_ban_after and not start_ban:
-                    start_ban = True
-        while None in self.violation_rank:
-            self.violation_rank.remove(None)
-        return deleted
-    # Returns True if the entire stress pattern is finalized, False otherwise
+        simplified = SimplifiedRanking.get(self.violation_rank)
+        self.simplified = simplified
+        self.violation_rank = [list(violation) for violation in simplified.violations]
+        self.word_violation = list(simplified.word_violation)
+        return [list(violation) for rank, violation, reason in simplified.removed]
+    # Returns True if the entire stress pattern (of every row) is finalized, False otherwise
     def finalized(self):
-        try:
-            for syllable in self.finalize_mark:
-                assert(syllable[0])
-                assert(syllable[1])
-            return True
-        except:
-            return False
-    # Assigns and finalizes stresses with only one possibility
+        return self.unfinalized == 0
+    # Assigns and finalizes stresses with only one possibility, for all slots at once: a syllable in a foot of its own
+    # is stressed, one outside feet is not, and one in a foot of two is stressed if the stress of the syllable after it
+    # is finalized as not stressed, and not stressed if that is finalized otherwise
+    # (every slot reads the syllable after it before that one is assigned, as when the syllables are taken in order)
     def in_between(self):
-        for i in range(len(self.pattern)):
-            if self.pattern[i][0] == None or self.finalize_mark[i][1]:
-                continue
-            match self.pattern[i][0]:
-                case 2:
-                    self.assign(i,1,assign_value=1,finalize_current_change=True)
-                case -1:
-                    self.assign(i,1,assign_value=0,finalize_current_change=True)
-                case 0:
-                    if self.finalize_mark[i+1][1]:
-                        if self.pattern[i+1][1] == 0:
-                            self.assign(i,1,assign_value=1,finalize_current_change=True)
-                        else:
-                            self.assign(i,1,assign_value=0,finalize_current_change=True)
-                case 1:
-                    if self.finalize_mark[i+1][1]:
-                        if self.pattern[i+1][1] == 0:
-                            self.assign(i,1,assign_value=1,finalize_current_change=True)
-                        else:
-                            self.assign(i,1,assign_value=0,finalize_current_change=True)
-    # Modify the stress pattern to minimize the current type of violations
+        footed = 0
+        for mask in self.masks[0].values():
+            footed |= mask
+        pending = footed & ~self.finals[1] & self.active_mask()
+        paired = pending & (self.mask(0, 0) | self.mask(0, 1))
+        # A syllable in a foot of two at the end of a row has no syllable after it
+        for row in list(self.active):
+            if self.lengths[row] > 0 and paired >> (row * self.stride + self.lengths[row] - 1) & 1:
+                self.fail(row, IndexError("list index out of range"))
+                pending &= ~self.rows[row]
+                paired &= ~self.rows[row]
+        followed = paired & (self.finals[1] >> 1)
+        unstressed_after = self.mask(1, 0) >> 1
+        self.assign_mask(1, pending & self.mask(0, 2), 1)
+        self.assign_mask(1, pending & self.mask(0, -1), 0)
+        self.assign_mask(1, followed & unstressed_after, 1)
+        self.assign_mask(1, followed & ~unstressed_after, 0)
+    # Modify the stress pattern to minimize the current type of violations, in every active row
     def mod(self, violation):
+        if not violation[0] in Stress.violation_types:
+            print("Violation type", str(violation[0]), "undefined", sep=" ")
+            return
+        for row in list(self.active):
+            try:
+                self.mod_row(violation, row)
+            except IndexError as error:
+                self.fail(row, error)
+        if violation[0] in ["Iamb", "Trochee"]:
+            # The head of a foot of two is its right child for Iamb, its left child for Trochee
+            head = 1 if violation[0] == "Iamb" else 0
+            pending = self.finals[0] & ~self.finals[1] & self.active_mask()
+            self.assign_mask(1, pending & self.mask(0, head), 1)
+            self.assign_mask(1, pending & self.mask(0, 1 - head), 0)
+    # Modify the parts of a row that Stress.mod does not modify for all rows at once
+    def mod_row(self, violation, row):
+        n = self.lengths[row]
         match violation[0]:
-            case "Iamb":
-                if "HD(w)" in self.word_violation:
-                    has_foot = False
-                    for i in range(len(self.pattern)):
-                        if self.finalize_mark[i][0] and self.pattern[i][0] != -1:
-                            has_foot = True
-                            break
-                    if not has_foot:
-                        if len(self.pattern) == 1:
-                            self.assign(0,0,assign_value=2,finalize_current_change=True)
-                        else:
-                            if violation[1]:
-                                self.assign(0,0,assign_value=0,finalize_current_change=True)
-                                self.assign(1,0,assign_value=1,finalize_current_change=True)
-                            else:
-                                self.assign(-2,0,assign_value=0,finalize_current_change=True)
-                                self.assign(-1,0,assign_value=1,finalize_current_change=True)
-                for i in range(len(self.pattern)):
-                    if self.finalize_mark[i][0] and not self.finalize_mark[i][1]:
-                        if self.pattern[i][0] == 0:
-                            self.assign(i,1,assign_value=0,finalize_current_change=True)
-                        elif self.pattern[i][0] == 1:
-                            self.assign(i,1,assign_value=1,finalize_current_change=True)
-            case "Trochee":
-                if "HD(w)" in self.word_violation:
-                    has_foot = False
-                    for i in range(len(self.pattern)):
-                        if self.finalize_mark[i][0] and self.pattern[i][0] != -1:
-                            has_foot = True
-                            break
-                    if not has_foot:
-                        if len(self.pattern) == 1:
-                            self.assign(0,0,assign_value=2,finalize_current_change=True)
-                        else:
-                            if violation[1]:
-                                self.assign(0,0,assign_value=0,finalize_current_change=True)
-                                self.assign(1,0,assign_value=1,finalize_current_change=True)
-                            else:
-                                self.assign(-2,0,assign_value=0,finalize_current_change=True)
-                                self.assign(-1,0,assign_value=1,finalize_current_change=True)
-                for i in range(len(self.pattern)):
-                    if self.finalize_mark[i][0] and not self.finalize_mark[i][1]:
-                        if self.pattern[i][0] == 0:
-                            self.assign(i,1,assign_value=1,finalize_current_change=True)
-                        elif self.pattern[i][0] == 1:
-                            self.assign(i,1,assign_value=0,finalize_current_change=True)
+            case "Iamb" | "Trochee":
+                if "HD(w)" in self.word_violation and not self.finals[0] & self.rows[row] & ~self.mask(0, -1):
+                    if n == 1:
+                        self.assign(0,0,assign_value=2,finalize_current_change=True,row=row)
+                    elif violation[1]:
+                        self.assign(0,0,assign_value=0,finalize_current_change=True,row=row)
+                        self.assign(1,0,assign_value=1,finalize_current_change=True,row=row)
+                    else:
+                        self.assign(-2,0,assign_value=0,finalize_current_change=True,row=row)
+                        self.assign(-1,0,assign_value=1,finalize_current_change=True,row=row)
             case "Parse":
-                if len(self.pattern) % 2 == 0:
-                    for i in range(len(self.pattern)):
-                        self.assign(i,0,assign_value=(i%2),finalize_current_change=True)
+                if n % 2 == 0:
+                    self.assign_alternating(row, 0, n)
+                elif violation[1]:
+                    first = self.slot(row, 0)
+                    if not (self.finals[1] >> first & 1 and not self.value(1, first)):
+                        self.assign(0,0,assign_value=2,finalize_current_change=True,row=row)
+                    else:
+                        self.assign(0,0,assign_value=-1,finalize_current_change=True,row=row)
+                    self.assign_alternating(row, 1, n)
                 else:
-                    if violation[1]:
-                        if not (self.finalize_mark[0][1] and not self.pattern[0][1]):
-                            self.assign(0,0,assign_value=2,finalize_current_change=True)
-                        else:
-                            self.assign(0,0,assign_value=-1,finalize_current_change=True)
-                        for i in range(1,len(self.pattern)):
-                            self.assign(i,0,assign_value=((i-1)%2),finalize_current_change=True)
+                    last = self.slot(row, -1)
+                    if not (self.finals[1] >> last & 1 and not self.value(1, last)):
+                        self.assign(-1,0,assign_value=2,finalize_current_change=True,row=row)
                     else:
-                        if not (self.finalize_mark[-1][1] and not self.pattern[-1][1]):
-                            self.assign(-1,0,assign_value=2,finalize_current_change=True)
-                        else:
-                            self.assign(-1,0,assign_value=-1,finalize_current_change=True)
-                        self.finalize_mark[-1][0] = True
-                        for i in range(len(self.pattern)-1):
-                            self.assign(i,0,assign_value=(i%2),finalize_current_change=True)
+                        self.assign(-1,0,assign_value=-1,finalize_current_change=True,row=row)
+                    self.finalize(0, last)
+                    self.assign_alternating(row, 0, n - 1)
             case "NonFin":
-                if not ("HD(w)" in self.word_violation and len(self.pattern) <= 1):
+                if not ("HD(w)" in self.word_violation and n <= 1):
                     if violation[1]:
-                        self.assign(0,1,assign_value=False,finalize_current_change=True)
+                        self.assign(0,1,assign_value=False,finalize_current_change=True,row=row)
                     else:
-                        self.assign(-1,1,assign_value=False,finalize_current_change=True)
-            case "HD(w)":
-                pass
-            case _:
-                print("Violation type", str(violation[0]), "undefined", sep=" ")
+                        self.assign(-1,1,assign_value=False,finalize_current_change=True,row=row)
+    # Records the error of a row of a batch, which is then left out (its parts finalized as they are); a single word
+    # raises the error instead
+    def fail(self, row, error):
+        if not self.batched:
+            raise error
+        self.errors[row] = error
+        for pos in [0, 1]:
+            unfinalized = self.rows[row] & ~self.finals[pos]
+            self.finals[pos] |= unfinalized
+            self.unfinalized -= unfinalized.bit_count()
+        self.active.remove(row)
     # Modify the stress pattern to minimize each violation as in the order added
+    # A row takes no further violations once finalized, as a word evaluated alone stops there
     def op(self, print_process=False, print_message=False):
         deleted = self.clean()
+        self.active = list(range(len(self.lengths)))
         for violation in self.violation_rank:
             self.mod(violation)
             self.in_between()
@@ -286,46 +534,56 @@ class Stress:
                 self.print_sp()
             if self.finalized():
                 break
+            done = self.finals[0] & self.finals[1]
+            self.active = [row for row in self.active if done & self.rows[row] != self.rows[row]]
         if print_message:
             self.print_v(deleted)
+            for line in self.simplified.report():
+                print(line)
         if not self.finalized():
             # if print_message:
             #     print("Stress pattern not finalized yet")
-            for i in range(len(self.finalize_mark)):
-                self.assign(i,0,assign_value=-1,finalize_current_change=True)
-                self.assign(i,1,assign_value=False,finalize_current_change=True)
+            every = 0
+            for mask in self.rows:
+                every |= mask
+            self.assign_mask(0, every & ~self.finals[0], -1)
+            self.assign_mask(1, every & ~self.finals[1], False)
             # if print_message:
             #     print("Finalized remaining parts")
             if print_process:
                 self.print_sp()
-    # Prints the current stress pattern with marks of whether the information is finalized (F/N)
+    # Prints the current stress pattern with marks of whether the information is finalized (F/N), a line for each row
     # fp denotes the foot position (0/1/2/-1), s denotes whether the syllable is stressed (Y/N)
     def print_sp(self):
-        def translate(index, pos):
-            if self.pattern[index][pos] == None:
+        def translate(pattern, finalize_mark, index, pos):
+            if pattern[index][pos] == None:
                 body = ""
             else:
-                if type(self.pattern[index][pos]) == int:
-                    if self.pattern[index][pos] != 0:
+                if type(pattern[index][pos]) == int:
+                    if pattern[index][pos] != 0:
                         body = "Y "
                     else:
                         body = "N "
                 else:
-                    body = str(self.pattern[index][pos]) + " "
-            if self.finalize_mark[index][pos]:
+                    body = str(pattern[index][pos]) + " "
+            if finalize_mark[index][pos]:
                 whether_finalized = "(F)"
             else:
                 whether_finalized = "(N)"
             return body + whether_finalized
-        for i in range(len(self.pattern)):
-            print("[fp: ", translate(i, 0), ", s: ", translate(i, 1), "]", sep="", end="\t")
-        print()
-    # Prints the final stress pattern
+        for row in range(len(self.lengths)):
+            pattern = self.row_pattern(row)
+            finalize_mark = self.row_finalize_mark(row)
+            for i in range(len(pattern)):
+                print("[fp: ", translate(pattern, finalize_mark, i, 0), ", s: ", translate(pattern, finalize_mark, i, 1), "]", sep="", end="\t")
+            print()
+    # Prints the final stress pattern, a line for each row
     def print_sp_final(self):
         if not self.finalized():
             print("Stress pattern not finalized yet")
             return
-        Syllable_Processor.print_stress_pattern(self.pattern)
+        for pattern in self.patterns():
+            Syllable_Processor.print_stress_pattern(pattern)
     # Prints the current violations to consider
     def print_v(self, deleted=None):
         print("Syllable violation(s): ", end="")
@@ -357,6 +615,54 @@ class Stress:
                     print(", ", end="")
             print()
 
+# Class of tables of the final stress patterns of one ranking for every number of syllables up to max_length, as
+# Stress.op depends on nothing else of the word; a word is then answered by its number of syllables
+# The patterns are kept one after another in two arrays of small integers (foot positions and stresses), the pattern of
+# n syllables starting at n * (n - 1) / 2, with a third array marking the stresses given back as booleans (as
+# Stress.booleans does), so that a pattern looked up is the same as the one computed
+class PatternTable:
+    # Constructor, with violations in the format of Test.translate, computing the pattern of each length once
+    def __init__(self, violations, max_length=64):
+        self.violations = [list(violation) for violation in violations]
+        self.max_length = max_length
+        self.foot_positions = array("b")
+        self.stresses = array("b")
+        self.booleans = array("b")
+        # Lengths for which Stress.op fails, left as zeros in the arrays and computed again (to fail again) when asked
+        self.failed = set()
+        # All lengths are evaluated together as one batch, the row of n syllables starting at slot (n - 1) * max_length
+        stress = self.stress(list(range(1, max_length + 1)))
+        for n in range(1, max_length + 1):
+            start = (n - 1) * stress.stride
+            if n - 1 in stress.errors:
+                self.failed.add(n)
+                self.foot_positions += array("b", [0]) * n
+                self.stresses += array("b", [0]) * n
+                self.booleans += array("b", [0]) * n
+            else:
+                self.foot_positions += stress.parts[0][start:start + n]
+                self.stresses += stress.parts[1][start:start + n]
+                self.booleans += array("b", [stress.booleans >> slot & 1 for slot in range(start, start + n)])
+    # Returns the Stress of n syllables (or of a batch of a list of them) after Stress.op
+    def stress(self, n):
+        stress = Stress(n)
+        for violation in self.violations:
+            stress.add(list(violation))
+        stress.op()
+        return stress
+    # Returns the final pattern of n syllables computed by Stress.op
+    def solve(self, n):
+        return self.stress(n).pattern
+    # Returns the final pattern of n syllables, looked up if n is within the table and computed otherwise
+    def pattern(self, n):
+        if n < 1 or n > self.max_length or n in self.failed:
+            return self.solve(n)
+        start = n * (n - 1) // 2
+        return [[self.foot_positions[i], bool(self.stresses[i]) if self.booleans[i] else self.stresses[i]] for i in range(start, start + n)]
+    # Returns the final pattern of the word
+    def word_pattern(self, word):
+        return self.pattern(len(Syllable_Processor.to_syllables(word)))
+
 class Test:
     # Constructor
     def __init__(self, word):
@@ -400,11 +706,80 @@ class Test:
             assert(False)
         return temp
 
+# Reads the grammar file, a JSON object with "ranking" as a list of [name, direction(L/R)] pairs, and returns the
+# violations in the format of Test.translate, raising ValueError if the ranking is invalid
+# ("not_considering" and weights are accepted for the same files as the other engines but not used here)
+def read_grammar(path):
+    with open(path, encoding="utf-8") as file:
+        grammar = json.load(file)
+    violations = []
+    for name, direction in grammar["ranking"]:
+        if not name in Stress.violation_types:
+            raise ValueError("Invalid violation type: " + str(name))
+        if not direction in ["L", "R"]:
+            raise ValueError("Invalid direction: " + str(direction))
+        violations += [[name, direction == "L"]]
+    return violations
+# Evaluates the words in lines of JSON objects such as {"word": "cacəca"} one at a time, writing for each a line of
+# JSON with the object extended by its stress pattern and parsed word, or by the error if it fails
+# The patterns are looked up in table (a PatternTable of the violations) if given, instead of computed for each word
+def batch(violations, lines, output, table=None):
+    for number, line in enumerate(lines, 1):
+        if line.strip() == "":
+            continue
+        result = {}
+        try:
+            result = json.loads(line)
+            if table != None:
+                syllables = Syllable_Processor.to_syllables(result["word"])
+                pattern = table.pattern(len(syllables))
+            else:
+                test = Test(result["word"])
+                for violation in violations:
+                    test.stress.add(list(violation))
+                test.gen()
+                syllables = test.word_in_syllables
+                pattern = test.stress.pattern
+            result["patterns"] = [Syllable_Processor.stress_pattern_string(pattern)]
+            result["parsed"] = [Syllable_Processor.syllables_stressed_string(syllables, pattern)]
+        except Exception as error:
+            if type(result) != dict:
+                result = {}
+            result["line"] = number
+            result["error"] = str(error)
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+# Command-line entry point for batch evaluation; see --help
+def main(arguments=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Evaluates words given as lines of JSON under the ranking of a grammar file, writing a line of JSON for each word as it finishes")
+    parser.add_argument("grammar", help="JSON file with \"ranking\" ([[name, direction], ...])")
+    parser.add_argument("input", nargs="?", default="-", help="file with one JSON object ({\"word\": ...}) per line; standard input if - or not given")
+    parser.add_argument("--max-length", type=int, default=64, help="number of syllables up to which the patterns are computed once and looked up (0 to compute each word)")
+    arguments = parser.parse_args(arguments)
+    violations = read_grammar(arguments.grammar)
+    table = PatternTable(violations, max_length=arguments.max_length) if arguments.max_length > 0 else None
+    sys.stdout.reconfigure(encoding="utf-8")
+    try:
+        if arguments.input == "-":
+            sys.stdin.reconfigure(encoding="utf-8")
+            batch(violations, sys.stdin, sys.stdout, table=table)
+        else:
+            with open(arguments.input, encoding="utf-8") as file:
+                batch(violations, file, sys.stdout, table=table)
+    except BrokenPipeError:
+        # The reader of the output stopped early (e.g. head); the output is closed quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
 
-t = Test(input("Enter the word to parse: "))
-t.take_in()
-t.gen(print_message=True)
-print("Final stress pattern: ", end="")
-t.print_sp()
-print("Parsed word: ", end="")
-t.print_word()
\ No newline at end of file
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main()
+    else:
+        t = Test(input("Enter the word to parse: "))
+        t.take_in()
+        t.gen(print_message=True)
+        print("Final stress pattern: ", end="")
+        t.print_sp()
+        print("Parsed word: ", end="")
+        t.print_word()
\ No newline at end of file
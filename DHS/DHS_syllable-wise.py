@@ -1,4 +1,9 @@
+import os
+import sys
+import json
 import time
+import unicodedata
+from collections import OrderedDict
 # Class for identifying character properties (helper class of Syllable)
 class Character:
     vowels = [['a', 'ɑ', 'æ', 'ɐ', 'ɑ̃',
@@ -32,15 +37,74 @@ class Character:
                 ['d͡ʒ',  
                 't͡ʃ', 't͡s', 
                 'tʃh']]
+    # Sets of the lists above for constant-time lookups, and the length of the longest segment in codepoints
+    vowel_set = set(vowels[0])
+    consonant_set = set(consonants[0])
+    bound_consonant_set = set(consonants[1])
+    inventory = vowel_set | consonant_set | bound_consonant_set
+    max_length = max([len(segment) for segment in inventory])
     # Returns True if a is a vowel, False otherwise
     def is_vowel(a):
-        return a in Character.vowels[0]
+        return a in Character.vowel_set
     # Returns True if b is a consonant, False otherwise
     def is_consonant(b):
-        return b in Character.consonants[0]
+        return b in Character.consonant_set
     # Returns True if bcd is a bound consonant, False otherwise
     def is_bound_consonant(bcd):
-        return bcd in Character.consonants[1]
+        return bcd in Character.bound_consonant_set
+    # Splits the string into segments in one pass, each as (segment, base): the segment is the longest segment of the
+    # inventory starting at the position (so that multi-codepoint vowels and bound consonants are kept whole), or else
+    # a single character, with the combining marks following it; the base is the segment without those marks
+    def segments(string):
+        segments = []
+        i = 0
+        while i < len(string):
+            length = 1
+            for size in range(min(Character.max_length, len(string) - i), 1, -1):
+                if string[i:i + size] in Character.inventory:
+                    length = size
+                    break
+            base = string[i:i + length]
+            # A precomposed character outside the inventory (e.g. ã) counts as the character it is composed on
+            if not base in Character.inventory:
+                base = unicodedata.normalize("NFD", base)[:1]
+            while i + length < len(string) and unicodedata.combining(string[i + length]):
+                length += 1
+            segments += [(string[i:i + length], base)]
+            i += length
+        return segments
+    # Returns the kind of segment of the base: "nucleus" for a vowel or ^, "consonant" or "other"
+    def kind(base):
+        if base in Character.vowel_set or base == "^":
+            return "nucleus"
+        if base in Character.consonant_set or base in Character.bound_consonant_set:
+            return "consonant"
+        return "other"
+    # Returns the (onset, nucleus, coda) of each syllable of the string in one pass over its segments, None for an
+    # onset or coda not present; a nucleus starts at a vowel or ^ at the start of the word or after a consonant and
+    # takes in the vowels following it until the next consonant, the onset is the consonant before it, and the coda
+    # is the consonant after it if that is not the onset of the next syllable
+    def syllabify(string):
+        segments = Character.segments(string)
+        kinds = [Character.kind(base) for segment, base in segments]
+        parts = []
+        i = 0
+        while i < len(segments):
+            if kinds[i] != "nucleus":
+                i += 1
+                continue
+            onset = segments[i - 1][0] if i > 0 and kinds[i - 1] == "consonant" else None
+            nucleus = segments[i][0]
+            i += 1
+            while i < len(segments) and kinds[i] != "consonant":
+                if kinds[i] == "nucleus":
+                    nucleus += segments[i][0]
+                i += 1
+            coda = None
+            if i < len(segments) and (i + 1 >= len(segments) or kinds[i + 1] != "nucleus"):
+                coda = segments[i][0]
+            parts += [(onset, nucleus, coda)]
+        return parts
 # Class of syllable objects and for translating words into syllables
 class Syllable:
     # Constructor of a single syllable
@@ -102,44 +166,7 @@ class Syllable:
         self.weight = proxy_syllable.weight
     # Turns a word string into separate syllables
     def to_syllable_array(string):
-        syllables = []
-        syllable_strings = []
-        syllable_indices = []
-        # Identifies nuclei
-        for i in range(len(string)):
-            if Character.is_vowel(string[i]) or string[i] == '^':
-                if i == 0 or (i >= 1 and Character.is_consonant(string[i-1])) or (i >= 3 and Character.is_bound_consonant(string[i-3:i])):
-                    syllable_strings += [[string[i]]]
-                    syllable_indices += [i]
-                else:
-                    syllable_strings[-1][0] += string[i]
-        # Adds onsets and codas
-        for i in range(len(syllable_indices)):
-            index = syllable_indices[i]
-            if index >= 3 and Character.is_bound_consonant(string[index-3:index]):
-                syllable_strings[i] = [string[index-3:index]] + syllable_strings[i]
-            elif index >= 1 and Character.is_consonant(string[index-1]):
-                syllable_strings[i] = [string[index-1:index]] + syllable_strings[i]
-            if index + 3 < len(string) and Character.is_bound_consonant(string[index+1:index+4]):
-                if not (index + 4 in syllable_indices) or index + 4 >= len(string):
-                    syllable_strings[i] += [string[index+1:index+4]]
-            elif index + 1 < len(string) and Character.is_consonant(string[index+1]):
-                if not (index + 2 in syllable_indices) or index + 2 >= len(string):
-                    syllable_strings[i] += [string[index+1]]
-        # Creates syllable objects from strings
-        for i in range(len(syllable_strings)):
-            body_array_size = len(syllable_strings[i])
-            match body_array_size:
-                case 1:
-                    syllables += [Syllable(None, syllable_strings[i][0], None, i + 1)]
-                case 2:
-                    if Character.is_vowel(syllable_strings[0]):
-                        syllables += [Syllable(None, syllable_strings[i][0], syllable_strings[i][1], i + 1)]
-                    else:
-                        syllables += [Syllable(syllable_strings[i][0], syllable_strings[i][1], None, i + 1)]
-                case 3:
-                    syllables += [Syllable(syllable_strings[i][0], syllable_strings[i][1], syllable_strings[i][2], i + 1)]
-        return syllables
+        return [Syllable(onset, nucleus, coda, i + 1) for i, (onset, nucleus, coda) in enumerate(Character.syllabify(string))]
     # Modifies the weight of the syllable
     def mod_weight(self, new_weight):
         self.weight = new_weight
@@ -187,6 +214,268 @@ class Violation:
         self.direction = direction
         self.rank = rank
         self.in_effect = True
+        self.constraint = Constraint.get(name)
+# Class of constraint objects, each counting one type of violation; Violation looks them up by name
+class Constraint:
+    registry = {}
+    name = None
+    level = "syllable" # syllable: a violation for each syllable weighted by index; word: at most one for the entire word
+    window = 0 # number of neighbouring syllables on each side deciding a violation, None if the entire word is needed
+    # Registers a constraint under its name and the given aliases
+    def register(constraint, aliases=[]):
+        for name in [constraint.name] + aliases:
+            Constraint.registry[name] = constraint
+    # Returns the constraint registered under the name, None if there is none
+    def get(name):
+        return Constraint.registry.get(name)
+    # Returns the violation of the candidate in value, with index-based weight in the given direction
+    def evaluate(self, candidate, direction):
+        sum = 0
+        for i in range(len(candidate)):
+            if direction == "L":
+                index = -1 - i
+            else:
+                index = i
+            if self.violated(candidate, index):
+                sum += 2 ** (len(candidate) - 1 - i)
+        return sum
+    # Returns True if the syllable at index (negative when counting leftward) of the candidate violates the constraint
+    def violated(self, candidate, index):
+        return False
+    # Returns the violation of the syllable at position (from 0 at the start of the word) in value, the terms of which
+    # evaluate sums up for a constraint of syllable level
+    def evaluate_at(self, candidate, position, direction):
+        if direction == "L":
+            if self.violated(candidate, position - len(candidate)):
+                return 2 ** position
+        elif self.violated(candidate, position):
+            return 2 ** (len(candidate) - 1 - position)
+        return 0
+    # Returns the positions whose violations may change when the syllables from start to end (inclusive) change:
+    # those within the window, and the other end of the word, which leftward evaluation compares with the first syllable
+    def affected(self, start, end, length):
+        positions = set(range(max(start - self.window, 0), min(end + self.window, length - 1) + 1))
+        if self.window > 0 and (start == 0 or end == length - 1):
+            positions |= set([0, length - 1])
+        return positions
+    # Returns the reason why the constraint gives every candidate of a word the same violations, given the facts of the
+    # word (see SimplifiedRanking.facts), or None if it may tell candidates apart
+    def inert(self, direction, facts):
+        return None
+# A stressed syllable is to be on the left of a foot
+class Trochee(Constraint):
+    name = "Trochee"
+    window = 1
+    def violated(self, candidate, index):
+        match candidate[index].foot_position:
+            case "left":
+                if candidate[index].stress != "unstressed":
+                    return not candidate[index + 1].schwa != "nonmora" and candidate[index].weight != "H"
+                return candidate[index].schwa != "nonmora"
+            case "right":
+                if candidate[index].stress != "unstressed":
+                    return candidate[index - 1].schwa != "nonmora" or candidate[index].weight != "H"
+            case "whole":
+                return candidate[index].stress != "unstressed" and candidate[index].weight != "H"
+        return False
+# A stressed syllable is to be on the right of a foot
+class Iamb(Constraint):
+    name = "Iamb"
+    window = 1
+    def violated(self, candidate, index):
+        match candidate[index].foot_position:
+            case "left":
+                if candidate[index].stress != "unstressed":
+                    return candidate[index + 1].schwa != "nonmora" or candidate[index].weight != "H"
+            case "right":
+                if candidate[index].stress != "unstressed":
+                    return not candidate[index - 1].schwa != "nonmora" and candidate[index].weight != "H"
+                return candidate[index].schwa != "nonmora"
+            case "whole":
+                return candidate[index].stress != "unstressed" and candidate[index].weight != "H"
+        return False
+# Every syllable is to be in a foot
+class Parse(Constraint):
+    name = "Parse"
+    def violated(self, candidate, index):
+        return candidate[index].foot_position == "none"
+# The final (R) or initial (L) syllable is not to be stressed
+class NonFin(Constraint):
+    name = "NonFin"
+    level = "word"
+    def evaluate(self, candidate, direction):
+        if direction == "R":
+            fin = candidate[-1].stress
+        else:
+            fin = candidate[0].stress
+        if fin == "unstressed":
+            return 0
+        return 1
+# The word is to have at least one foot
+class HeadWord(Constraint):
+    name = "HD(w)"
+    level = "word"
+    window = None
+    def evaluate(self, candidate, direction):
+        for syllable in candidate:
+            if self.satisfied_by(syllable):
+                return 0
+        return 1
+    # Returns True if the syllable alone spares the word the violation
+    def satisfied_by(self, syllable):
+        return syllable.foot_position != "none"
+# A foot with a heavy syllable is not to be an unstressed-final trochee
+class BalancedTrochee(Constraint):
+    name = "Bal-Troch"
+    window = 1
+    def violated(self, candidate, index):
+        if candidate[index].foot_position == "right" and candidate[index].stress == "unstressed":
+            return candidate[index - 1].weight == "H" or candidate[index].weight == "H"
+        return False
+# The final (R) or initial (L) syllable is to be in a foot
+class FootRight(Constraint):
+    name = "Foot-Right"
+    level = "word"
+    def evaluate(self, candidate, direction):
+        if direction == "R":
+            fin = candidate[-1].foot_position
+        else:
+            fin = candidate[0].foot_position
+        if fin == "none":
+            return 1
+        return 0
+# A long vowel is not to be shortened
+class MaxMora(Constraint):
+    name = "Max(μ)"
+    def violated(self, candidate, index):
+        return candidate[index].weight == "L shortened"
+    def inert(self, direction, facts):
+        if not facts["shortening"]:
+            return "no vowel can be shortened"
+        return None
+# A schwa is not to be stressed
+class StressedSchwa(Constraint):
+    name = "*Stressed/ə"
+    def violated(self, candidate, index):
+        return candidate[index].schwa != "not schwa" and candidate[index].stress != "unstressed"
+    def inert(self, direction, facts):
+        if not facts["schwa"]:
+            return "the word has no schwa"
+        return None
+# A vowel is not to be long
+class LongVowel(Constraint):
+    name = "*Long-V"
+    def violated(self, candidate, index):
+        return candidate[index].weight == "H"
+    def inert(self, direction, facts):
+        if not facts["shortening"]:
+            return "no vowel can be shortened, so the long vowels are the same in every candidate"
+        return None
+# A schwa is not to be moraic
+class MoraicSchwa(Constraint):
+    name = "*μ/ə"
+    def violated(self, candidate, index):
+        return candidate[index].schwa == "mora"
+    def inert(self, direction, facts):
+        if not facts["schwa"]:
+            return "the word has no schwa"
+        return None
+# A foot of a single syllable is not to be headed by a nonmoraic schwa
+class HeadFoot(Constraint):
+    name = "HD(ft)"
+    def violated(self, candidate, index):
+        return candidate[index].foot_position == "whole" and candidate[index].schwa == "nonmora"
+    def inert(self, direction, facts):
+        if not facts["schwa"]:
+            return "the word has no schwa"
+        return None
+# Stressed syllables are not to be adjacent
+class Clash(Constraint):
+    name = "*Clash"
+    window = 1
+    def violated(self, candidate, index):
+        if candidate[index].stress != "unstressed":
+            return (index > 0 and candidate[index - 1].stress != "unstressed") or (index + 1 < len(candidate) and candidate[index + 1].stress != "unstressed")
+        return False
+Constraint.register(Trochee())
+Constraint.register(Iamb())
+Constraint.register(Parse())
+Constraint.register(NonFin())
+Constraint.register(HeadWord())
+Constraint.register(BalancedTrochee())
+Constraint.register(FootRight())
+Constraint.register(MaxMora())
+Constraint.register(StressedSchwa())
+Constraint.register(LongVowel())
+Constraint.register(MoraicSchwa())
+Constraint.register(HeadFoot())
+Constraint.register(Clash())
+# Class of rankings simplified before any candidate is evaluated: the violations proven to give every candidate left
+# by the violations above them the same value, given the aspects ignored and the shape of the word, are found by looking
+# at the ranking alone and left out by op and op_serial, each with the reason; the result is reused for the same
+# ranking, aspects and facts of the shape
+class SimplifiedRanking:
+    cache = OrderedDict() # (ranking, facts) -> simplified ranking, the least recently used first
+    max_size = 1024 # Number of simplified rankings kept in cache
+    # Constructor, with the violations in rank and the facts of the shape (see facts)
+    def __init__(self, violations, facts):
+        # (rank, violation, reason) of each violation left out, in rank
+        self.removed = []
+        kept = []
+        for rank in range(len(violations)):
+            violation = violations[rank]
+            if violation.constraint == None or not violation.in_effect:
+                continue
+            reason = SimplifiedRanking.reason(violation, facts, kept)
+            if reason == None:
+                kept += [(rank, violation)]
+            else:
+                self.removed += [(rank, violation, reason)]
+        # Ranks of the violations left out
+        self.ranks = frozenset([rank for rank, violation, reason in self.removed])
+    # Returns the simplified ranking of the violations of the word in stress, reusing the one found before for the
+    # same ranking, aspects and facts if it is among the max_size used last
+    def get(stress):
+        facts = SimplifiedRanking.facts(stress)
+        signature = (tuple([(violation.name, violation.direction, violation.in_effect) for violation in stress.violations]), tuple(sorted(facts.items())))
+        if signature in SimplifiedRanking.cache:
+            SimplifiedRanking.cache.move_to_end(signature)
+            return SimplifiedRanking.cache[signature]
+        simplified = SimplifiedRanking(stress.violations, facts)
+        SimplifiedRanking.cache[signature] = simplified
+        if len(SimplifiedRanking.cache) > SimplifiedRanking.max_size:
+            SimplifiedRanking.cache.popitem(last=False)
+        return simplified
+    # Returns the facts of the word in stress that decide which violations are left out: whether it has syllables,
+    # whether it has a schwa, and whether a vowel can be shortened (a long vowel with weight and shortening considered)
+    def facts(stress):
+        consider_shortening = not "weight" in stress.not_considering and not "shortening" in stress.not_considering
+        return {
+            "syllables": len(stress.syllables) > 0,
+            "schwa": any([syllable.schwa for syllable in stress.syllables]),
+            "shortening": consider_shortening and any([syllable.weight == "H" for syllable in stress.syllables])
+        }
+    # Returns the reason why the violation is left out below the violations kept (as (rank, violation) pairs), None if
+    # it is not
+    # A word without syllables has a single candidate; a constraint may give every candidate the same violations
+    # (Constraint.inert); and the candidates left by a constraint all have the same violations of it, in any direction
+    # if its violations are counted syllable by syllable without looking at the neighbours (which leftward evaluation
+    # takes across the end of the word)
+    def reason(violation, facts, kept):
+        if not facts["syllables"]:
+            return "the word has no syllables, so there is a single candidate"
+        reason = violation.constraint.inert(violation.direction, facts)
+        if reason != None:
+            return reason
+        constraint = violation.constraint
+        by_syllable = constraint.level == "syllable" and type(constraint).evaluate == Constraint.evaluate and constraint.window == 0
+        for rank, above in kept:
+            if above.constraint == constraint and (above.direction == violation.direction or by_syllable):
+                return "the candidates left by " + above.name + ", " + above.direction + " (rank " + str(rank + 1) + ") all have the same violations of it"
+        return None
+    # Returns the lines reporting the violations left out, as op prints them
+    def report(self):
+        return [violation.name + ", " + violation.direction + " (rank " + str(rank + 1) + "): " + reason for rank, violation, reason in self.removed]
 # Class of stress objects for the optimal stress pattern of the given word
 class Stress:
     # Constructor
@@ -195,9 +484,15 @@ class Stress:
         self.violations = []
         self.candidates = []
         self.not_considering = []
-    # Adds a violation type with direction
+        # Derivations of the patterns found by the last op_serial
+        self.derivations = []
+    # Adds a violation type with direction, raising ValueError if either is unknown
     def add(self, violation_name, direction):
         violation = Violation(violation_name, direction, len(self.violations))
+        if violation.constraint == None:
+            raise ValueError("Invalid violation type: " + str(violation_name))
+        if not direction in ["L", "R"]:
+            raise ValueError("Invalid direction: " + str(direction))
         self.violations += [violation]
     # Sets stresses before the last stress to secondary
     def classify_stress(syllables):
@@ -301,17 +596,178 @@ class Stress:
         for i in range(min_index):
             candidates[i] = None
         return candidates
-    # Pick out possibilities based on violations in rank
+    # Returns the faithful candidate of the word: no foot or stress, every schwa moraic and every vowel as given
+    def faithful(self):
+        consider_weight = not "weight" in self.not_considering
+        candidate = []
+        for syllable in self.syllables:
+            schwa = "mora" if syllable.schwa else "not schwa"
+            candidate += [ProxySyllable(schwa, "unstressed", "none", syllable.weight if consider_weight else "L")]
+        return candidate
+    # Returns True if the two syllables may form a foot, as mod_half in exhaust_candidates requires
+    def foot_allowed(left, right):
+        if (left.stress != "unstressed") == (right.stress != "unstressed"):
+            return False
+        if left.schwa == "nonmora" and left.stress != "unstressed" or right.schwa == "nonmora" and right.stress != "unstressed":
+            return False
+        return not ((left.weight == "H" or left.stress != "unstressed") and right.weight == "H")
+    # Returns the changes of the candidate by a single operation, as (operation, start, syllables) with the syllables
+    # replacing the ones from start: building a foot of one or two unfooted syllables (with its stress), moving the
+    # stress to the other syllable of a foot, making a schwa nonmoraic, or shortening a long vowel
+    def operations(self, candidate):
+        consider_shortening = not "weight" in self.not_considering and not "shortening" in self.not_considering
+        changes = []
+        for i in range(len(candidate)):
+            current = candidate[i]
+            if current.foot_position == "none":
+                if current.schwa == "nonmora":
+                    changes += [("foot", i, [ProxySyllable(current.schwa, "unstressed", "whole", current.weight)])]
+                else:
+                    changes += [("foot", i, [ProxySyllable(current.schwa, "primary", "whole", current.weight)])]
+                if i + 1 < len(candidate) and candidate[i + 1].foot_position == "none":
+                    following = candidate[i + 1]
+                    for stresses in [("primary", "unstressed"), ("unstressed", "primary")]:
+                        left = ProxySyllable(current.schwa, stresses[0], "left", current.weight)
+                        right = ProxySyllable(following.schwa, stresses[1], "right", following.weight)
+                        if Stress.foot_allowed(left, right):
+                            changes += [("foot", i, [left, right])]
+            if current.foot_position == "left":
+                following = candidate[i + 1]
+                left = ProxySyllable(current.schwa, following.stress, "left", current.weight)
+                right = ProxySyllable(following.schwa, current.stress, "right", following.weight)
+                if Stress.foot_allowed(left, right):
+                    changes += [("stress shift", i, [left, right])]
+            if current.schwa == "mora" and current.stress == "unstressed":
+                changes += [("schwa reduction", i, [ProxySyllable("nonmora", current.stress, current.foot_position, current.weight)])]
+            if consider_shortening and current.weight == "H":
+                changed = ProxySyllable(current.schwa, current.stress, current.foot_position, "L shortened")
+                if current.foot_position != "left" or Stress.foot_allowed(changed, candidate[i + 1]):
+                    changes += [("shortening", i, [changed])]
+        return changes
+    # Returns the violations in rank in effect, and the values of each of them at each syllable (None for the
+    # constraints of word level, evaluated as a whole)
+    def profile(self, candidate, violations):
+        totals = []
+        marks = []
+        for violation in violations:
+            if violation.constraint.level == "word":
+                totals += [Stress.penalty(candidate, violation)]
+                marks += [None]
+            else:
+                values = [violation.constraint.evaluate_at(candidate, position, violation.direction) for position in range(len(candidate))]
+                totals += [sum(values)]
+                marks += [values]
+        return totals, marks
+    # Returns the violations of the changed candidate from the profile of the candidate before the change of the
+    # syllables from start to end, counting again only the syllables whose violations may have changed; with the
+    # values at each syllable as well if keep_marks
+    def update_profile(self, profile, changed, start, end, violations, keep_marks=False):
+        totals, marks = profile
+        new_totals = []
+        new_marks = []
+        for i in range(len(violations)):
+            violation = violations[i]
+            if marks[i] == None:
+                new_totals += [Stress.penalty(changed, violation)]
+                new_marks += [None]
+                continue
+            total = totals[i]
+            values = list(marks[i]) if keep_marks else marks[i]
+            for position in violation.constraint.affected(start, end, len(changed)):
+                value = violation.constraint.evaluate_at(changed, position, violation.direction)
+                total += value - marks[i][position]
+                if keep_marks:
+                    values[position] = value
+            new_totals += [total]
+            new_marks += [values]
+        return new_totals, new_marks
+    # Derives the optimal patterns serially (Harmonic Serialism): from the faithful candidate, each step takes the
+    # changes by a single operation and keeps the best as ranked, until no change does better than the candidate itself
+    # Changes tying for the best are all followed; returns a derivation for each distinct result, as a list of
+    # (operation, candidate) steps starting with ("faithful", faithful candidate)
+    def derive(self, print_process=False, mode="CV"):
+        simplified = self.simplified()
+        if print_process:
+            self.print_simplified(simplified)
+        violations = [self.violations[rank] for rank in range(len(self.violations)) if self.violations[rank].in_effect and not rank in simplified.ranks]
+        for violation in violations:
+            if violation.constraint == None:
+                raise ValueError("Invalid violation type: " + str(violation.name))
+        start_candidate = self.faithful()
+        # Key of the pattern -> (candidate, profile, derivation) of the candidates still changing
+        current = {Stress.key(start_candidate): (start_candidate, self.profile(start_candidate, violations), [("faithful", start_candidate)])}
+        results = {}
+        step = 0
+        while len(current) > 0:
+            step += 1
+            following = {}
+            for key, (candidate, profile, derivation) in current.items():
+                best = tuple(profile[0])
+                winners = []
+                for operation, start, syllables in self.operations(candidate):
+                    changed = candidate[:start] + syllables + candidate[start + len(syllables):]
+                    totals = tuple(self.update_profile(profile, changed, start, start + len(syllables) - 1, violations)[0])
+                    if totals < best:
+                        best = totals
+                        winners = [(operation, start, syllables, changed)]
+                    elif totals == best and len(winners) > 0:
+                        winners += [(operation, start, syllables, changed)]
+                if len(winners) == 0:
+                    results.setdefault(key, derivation)
+                    continue
+                for operation, start, syllables, changed in winners:
+                    changed_key = Stress.key(changed)
+                    if not changed_key in following:
+                        changed_profile = self.update_profile(profile, changed, start, start + len(syllables) - 1, violations, keep_marks=True)
+                        following[changed_key] = (changed, changed_profile, derivation + [(operation + " at " + str(start + 1), changed)])
+                if print_process:
+                    for operation, start, syllables, changed in winners:
+                        print("Step ", step, ": ", operation, " at ", start + 1, ": ", Stress.syllables_string(changed, mode), sep="")
+            current = following
+        return list(results.values())
+    # Returns the key of the pattern of a candidate, equal for candidates of the same pattern
+    def key(candidate):
+        return tuple([(syllable.schwa, syllable.stress, syllable.foot_position, syllable.weight) for syllable in candidate])
+    # Pick out possibilities serially (see derive) instead of comparing all candidates at once; the derivations are kept
+    # in self.derivations, in the order of the candidates returned
+    def op_serial(self, print_process=False, mode="CV", max_print=100):
+        self.derivations = self.derive(print_process=print_process, mode=mode)
+        candidates = []
+        for derivation in self.derivations:
+            candidates += [Stress.classify_stress([syllable.copy() for syllable in derivation[-1][1]])]
+        if print_process:
+            print()
+            Stress.print_candidates(candidates, max_print=max_print, mode=mode)
+        return candidates
+    # Pick out possibilities with the given engine: "op" (all candidates at once) or "serial" (op_serial)
+    def op_engine(self, engine="op", print_process=False, mode="CV", max_print=100):
+        if engine == "serial":
+            return self.op_serial(print_process=print_process, mode=mode, max_print=max_print)
+        return self.op(print_process=print_process, mode=mode, max_print=max_print)
+    # Returns the SimplifiedRanking of the word, whose violations left out are skipped by op and op_serial
+    def simplified(self):
+        return SimplifiedRanking.get(self)
+    # Prints the violations left out by the SimplifiedRanking of the word, if any
+    def print_simplified(self, simplified):
+        if len(simplified.removed) > 0:
+            print("Left out before evaluation:")
+            for line in simplified.report():
+                print(line)
+            print()
+    # Pick out possibilities based on violations in rank, skipping the ones left out by the SimplifiedRanking of the word
     def op(self, print_process=False, mode="CV", max_print=100):
+        simplified = self.simplified()
         candidates = Stress.exclude_none(self.exhaust_candidates())
         if print_process:
+            self.print_simplified(simplified)
             print("Initial candidates:")
             Stress.print_candidates(candidates,max_print=max_print,mode=mode)
-        print()
-        for violation in self.violations:
+            print()
+        for rank in range(len(self.violations)):
+            violation = self.violations[rank]
             if len(candidates) == 1:
                 break
-            if not violation.in_effect:
+            if not violation.in_effect or rank in simplified.ranks:
                 continue
             candidates = Stress.min_vio(candidates, violation)
             if print_process:
@@ -327,169 +783,10 @@ class Stress:
         return candidates
     # Returns the specific violation by syllables in the candidate in value
     def penalty(candidate, violation):
-        match violation.name:
-            case "Trochee":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    violate = False
-                    match candidate[index].foot_position:
-                        case "none":
-                            pass
-                        case "left":
-                            if candidate[index].stress != "unstressed":
-                                if not candidate[index + 1].schwa != "nonmora" and candidate[index].weight != "H":
-                                    violate = True
-                            else:
-                                if candidate[index].schwa != "nonmora":
-                                    violate = True
-                        case "right":
-                            if candidate[index].stress != "unstressed":
-                                if candidate[index - 1].schwa != "nonmora" or candidate[index].weight != "H":
-                                    violate = True
-                        case "whole":
-                            if candidate[index].stress != "unstressed" and candidate[index].weight != "H":
-                                violate = True
-                    if violate:
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "Iamb":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    violate = False
-                    match candidate[index].foot_position:
-                        case "none":
-                            pass
-                        case "left":
-                            if candidate[index].stress != "unstressed":
-                                if candidate[index + 1].schwa != "nonmora" or candidate[index].weight != "H":
-                                    violate = True
-                        case "right":
-                            if candidate[index].stress != "unstressed":
-                                if not candidate[index - 1].schwa != "nonmora" and candidate[index].weight != "H":
-                                    violate = True
-                            else:
-                                if candidate[index].schwa != "nonmora":
-                                    violate = True
-                        case "whole":
-                            if candidate[index].stress != "unstressed" and candidate[index].weight != "H":
-                                violate = True
-                    if violate:
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "Parse":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].foot_position == "none":
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "NonFin":
-                if violation.direction == "R":
-                    fin = candidate[-1].stress
-                else:
-                    fin = candidate[0].stress
-                if fin == "unstressed":
-                    return 0
-                return 1
-            case "HD(w)":
-                for syllable in candidate:
-                    if syllable.foot_position != "none":
-                        return 0
-                return 1
-            case "Bal-Troch":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].foot_position =="right" and candidate[index].stress == "unstressed":
-                        if candidate[index - 1].weight == "H" or candidate[index].weight == "H":
-                            sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "Foot-Right":
-                if violation.direction == "R":
-                    fin = candidate[-1].foot_position
-                else:
-                    fin = candidate[0].foot_position
-                if fin == "none":
-                    return 1
-                return 0
-            case "Max(μ)":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].weight == "L shortened":
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "*Stressed/ə":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].schwa != "not schwa" and candidate[index].stress != "unstressed":
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "*Long-V":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].weight == "H":
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "*μ/ə":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].schwa == "mora":
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "HD(ft)":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].foot_position == "whole" and candidate[index].schwa == "nonmora":
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "*Clash":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].stress != "unstressed":
-                        if (index > 0 and candidate[index - 1].stress != "unstressed") or (index + 1 < len(candidate) and candidate[index + 1].stress != "unstressed"):
-                            sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case _:
-                print("Invalid violation type")
-                return -1
+        if violation.constraint == None:
+            print("Invalid violation type")
+            return -1
+        return violation.constraint.evaluate(candidate, violation.direction)
     # Prints out the first up to max_print candidates
     def print_candidates(candidates, max_print=100, mode="CV"):
         count = 0
@@ -501,15 +798,23 @@ class Stress:
                     break
                 print(count, ". ", sep="", end="")
                 Stress.print_syllables(candidate, mode)
-    # Prints out the word (syllables) in the pattern represented through proxy syllables
-    def print_mod_syllables(self, proxy_syllables):
+    # Returns copies of the word (syllables) in the pattern represented through proxy syllables
+    def mod_syllables(self, proxy_syllables):
         temp = []
         for i in range(len(self.syllables)):
             temp += [self.syllables[i].copy()]
             temp[i].apply(proxy_syllables[i])
-        return Stress.print_syllables(temp)
+        return temp
+    # Prints out the word (syllables) in the pattern represented through proxy syllables
+    def print_mod_syllables(self, proxy_syllables):
+        return Stress.print_syllables(self.mod_syllables(proxy_syllables))
     # Prints out the given syllables
     def print_syllables(syllables, mode="original"):
+        word = Stress.syllables_string(syllables, mode)
+        print(word)
+        return word
+    # Returns the given syllables as a string in the format of print_syllables
+    def syllables_string(syllables, mode="original"):
         word = ""
         for syllable in syllables:
             if mode == "weight":
@@ -535,8 +840,6 @@ class Stress:
             if type(syllable) == ProxySyllable and mode != "weight":
                 string += " "
             word += string
-            print(string,end="")
-        print()
         return word
     # Takes aspects to ignore in the process: weight, shortening
     def take_not_considering(self):
@@ -575,7 +878,7 @@ class Stress:
             except:
                 print("Input not accepted")
             
-def parse(print_process=False,mode="CV",max_print=100):
+def parse(print_process=False,mode="CV",max_print=100,engine="op"):
     print("Enter the word or number of syllables to parse: ")
     has_word = True
     while True:
@@ -603,7 +906,7 @@ def parse(print_process=False,mode="CV",max_print=100):
         stress.take_weights()
         print()
     start_time = time.time()
-    candidates = stress.op(print_process=print_process,mode=mode,max_print=max_print)
+    candidates = stress.op_engine(engine=engine,print_process=print_process,mode=mode,max_print=max_print)
     for i in range(len(candidates)):
         if len(candidates) > 1:
             print(i + 1, ". ", sep="", end="\t")
@@ -623,6 +926,81 @@ def parse(print_process=False,mode="CV",max_print=100):
             return "More than one candidate"
     else:
         return "No word provided"
+# Reads the grammar file, a JSON object with "ranking" as a list of [name, direction] pairs and optionally
+# "not_considering" as a list of aspects to ignore; returns both, raising ValueError if the ranking is invalid
+def read_grammar(path):
+    with open(path, encoding="utf-8") as file:
+        grammar = json.load(file)
+    violations = [tuple(violation) for violation in grammar["ranking"]]
+    not_considering = list(grammar.get("not_considering", []))
+    stress = Stress([])
+    for name, direction in violations:
+        stress.add(name, direction)
+    return violations, not_considering
+# Returns the stress object of the word with weights (string of L/H, or None) under the ranking
+def word_stress(word, weights, violations, not_considering):
+    stress = Stress(Syllable.to_syllable_array(word))
+    for name, direction in violations:
+        stress.add(name, direction)
+    stress.not_considering = list(not_considering)
+    if weights != None and not "weight" in not_considering:
+        if len(weights) != len(stress.syllables):
+            raise ValueError("Weights " + str(weights) + " do not match the syllables of the word")
+        for i in range(len(weights)):
+            stress.syllables[i].mod_weight(weights[i])
+    return stress
+# Returns the optimal patterns of the word with weights (string of L/H, or None) as its own syllables, found by the
+# engine of Stress.op_engine
+def evaluate_word(word, weights, violations, not_considering, engine="op"):
+    stress = word_stress(word, weights, violations, not_considering)
+    return [stress.mod_syllables(candidate) for candidate in stress.op_engine(engine=engine)]
+# Evaluates the words in lines of JSON objects such as {"word": "cacəca", "weights": "LLH"} one at a time, writing for
+# each a line of JSON with the object extended by its stress patterns and parsed words, or by the error if it fails
+# With the serial engine, the derivation of each pattern is added as well, as [operation, pattern] steps
+def batch(violations, not_considering, lines, output, engine="op"):
+    for number, line in enumerate(lines, 1):
+        if line.strip() == "":
+            continue
+        result = {}
+        try:
+            result = json.loads(line)
+            stress = word_stress(result["word"], result.get("weights"), violations, not_considering)
+            candidates = [stress.mod_syllables(candidate) for candidate in stress.op_engine(engine=engine)]
+            result["patterns"] = [Stress.syllables_string(candidate, mode="weight") for candidate in candidates]
+            result["parsed"] = [Stress.syllables_string(candidate) for candidate in candidates]
+            if engine == "serial":
+                result["derivations"] = [[[operation, Stress.syllables_string(candidate, mode="weight")] for operation, candidate in derivation] for derivation in stress.derivations]
+        except Exception as error:
+            if type(result) != dict:
+                result = {}
+            result["line"] = number
+            result["error"] = str(error)
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+# Command-line entry point for batch evaluation; see --help
+def main(arguments=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Evaluates words given as lines of JSON under the ranking of a grammar file, writing a line of JSON for each word as it finishes")
+    parser.add_argument("grammar", help="JSON file with \"ranking\" ([[name, direction], ...]) and optionally \"not_considering\"")
+    parser.add_argument("input", nargs="?", default="-", help="file with one JSON object ({\"word\": ..., \"weights\": ...}) per line; standard input if - or not given")
+    parser.add_argument("--engine", choices=["op", "serial"], default="op", help="engine of Stress.op_engine; serial also writes the derivations")
+    arguments = parser.parse_args(arguments)
+    violations, not_considering = read_grammar(arguments.grammar)
+    sys.stdout.reconfigure(encoding="utf-8")
+    try:
+        if arguments.input == "-":
+            sys.stdin.reconfigure(encoding="utf-8")
+            batch(violations, not_considering, sys.stdin, sys.stdout, engine=arguments.engine)
+        else:
+            with open(arguments.input, encoding="utf-8") as file:
+                batch(violations, not_considering, file, sys.stdout, engine=arguments.engine)
+    except BrokenPipeError:
+        # The reader of the output stopped early (e.g. head); the output is closed quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
 
 
-print(parse(True,"weight"))
\ No newline at end of file
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main()
+    else:
+        print(parse(True,"weight"))
\ No newline at end of file
@@ -0,0 +1,14 @@
+# Directional Harmonic Serialism engines, loaded from their files as DHS.syllable_wise and DHS.pattern_wise since the
+# file names are not valid module names; importing them has no side effects
+import os
+import sys
+import importlib.util
+# Loads the code file of the folder as the submodule of the given name
+def load(name, file_name):
+    spec = importlib.util.spec_from_file_location(__name__ + "." + name, os.path.join(os.path.dirname(__file__), file_name))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[spec.name] = module
+    spec.loader.exec_module(module)
+    return module
+syllable_wise = load("syllable_wise", "DHS_syllable-wise.py")
+pattern_wise = load("pattern_wise", "DHS_pattern-wise.py")
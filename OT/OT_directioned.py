@@ -1,4 +1,15 @@
+import os
+import sys
+import json
+import math
 import time
+import itertools
+import unicodedata
+import threading
+from collections import OrderedDict
+# numpy (for CandidateArray), concurrent.futures (for Lexicon) and argparse (for main) are imported on first use,
+# so that importing the module stays fast
+numpy = None
 # Class for identifying character properties (helper class of Syllable)
 class Character:
     vowels = [['a', 'ɑ', 'æ', 'ɐ', 'ɑ̃',
@@ -32,28 +43,120 @@ class Character:
                 ['d͡ʒ',  
                 't͡ʃ', 't͡s', 
                 'tʃh']]
+    # Sets of the lists above for constant-time lookups, and the length of the longest segment in codepoints
+    vowel_set = set(vowels[0])
+    consonant_set = set(consonants[0])
+    bound_consonant_set = set(consonants[1])
+    inventory = vowel_set | consonant_set | bound_consonant_set
+    max_length = max([len(segment) for segment in inventory])
     # Returns True if a is a vowel, False otherwise
     def is_vowel(a):
-        return a in Character.vowels[0]
+        return a in Character.vowel_set
     # Returns True if b is a consonant, False otherwise
     def is_consonant(b):
-        return b in Character.consonants[0]
+        return b in Character.consonant_set
     # Returns True if bcd is a bound consonant, False otherwise
     def is_bound_consonant(bcd):
-        return bcd in Character.consonants[1]
+        return bcd in Character.bound_consonant_set
+    # Splits the string into segments in one pass, each as (segment, base): the segment is the longest segment of the
+    # inventory starting at the position (so that multi-codepoint vowels and bound consonants are kept whole), or else
+    # a single character, with the combining marks following it; the base is the segment without those marks
+    def segments(string):
+        segments = []
+        i = 0
+        while i < len(string):
+            length = 1
+            for size in range(min(Character.max_length, len(string) - i), 1, -1):
+                if string[i:i + size] in Character.inventory:
+                    length = size
+                    break
+            base = string[i:i + length]
+            # A precomposed character outside the inventory (e.g. ã) counts as the character it is composed on
+            if not base in Character.inventory:
+                base = unicodedata.normalize("NFD", base)[:1]
+            while i + length < len(string) and unicodedata.combining(string[i + length]):
+                length += 1
+            segments += [(string[i:i + length], base)]
+            i += length
+        return segments
+    # Returns the kind of segment of the base: "nucleus" for a vowel or ^, "consonant" or "other"
+    def kind(base):
+        if base in Character.vowel_set or base == "^":
+            return "nucleus"
+        if base in Character.consonant_set or base in Character.bound_consonant_set:
+            return "consonant"
+        return "other"
+    # Returns the (onset, nucleus, coda) of each syllable of the string in one pass over its segments, None for an
+    # onset or coda not present; a nucleus starts at a vowel or ^ at the start of the word or after a consonant and
+    # takes in the vowels following it until the next consonant, the onset is the consonant before it, and the coda
+    # is the consonant after it if that is not the onset of the next syllable
+    def syllabify(string):
+        segments = Character.segments(string)
+        kinds = [Character.kind(base) for segment, base in segments]
+        parts = []
+        i = 0
+        while i < len(segments):
+            if kinds[i] != "nucleus":
+                i += 1
+                continue
+            onset = segments[i - 1][0] if i > 0 and kinds[i - 1] == "consonant" else None
+            nucleus = segments[i][0]
+            i += 1
+            while i < len(segments) and kinds[i] != "consonant":
+                if kinds[i] == "nucleus":
+                    nucleus += segments[i][0]
+                i += 1
+            coda = None
+            if i < len(segments) and (i + 1 >= len(segments) or kinds[i + 1] != "nucleus"):
+                coda = segments[i][0]
+            parts += [(onset, nucleus, coda)]
+        return parts
 # Class of syllable objects and for translating words into syllables
+# The format of a syllable (mora of a schwa, stress, foot position and weight) is the ProxySyllable state it shares with
+# the candidates, read and set through the properties below; only a schwa may lose its mora
 class Syllable:
+    __slots__ = ("onset", "nucleus", "coda", "schwa", "state", "index")
     # Constructor of a single syllable
     def __init__(self, onset, nucleus, coda, index=0, mora=True, stress="unstressed", foot_position="none", weight="L"):
         self.onset = onset
         self.nucleus = nucleus
         self.coda = coda
         self.schwa = "ə" in nucleus
-        self.mora = mora
-        self.stress = stress # unstressed/primary/secondary
-        self.foot_position = foot_position # none/left/right/whole
-        self.weight = weight # L/H
+        self.state = ProxySyllable(Syllable.schwa_kind(self.schwa, mora), stress, foot_position, weight)
         self.index = index
+    # Returns the schwa field of the state of a syllable: not schwa/mora/nonmora
+    def schwa_kind(schwa, mora):
+        if not schwa:
+            return "not schwa"
+        return "mora" if mora else "nonmora"
+    # Whether the syllable has a mora
+    @property
+    def mora(self):
+        return self.state.schwa != "nonmora"
+    @mora.setter
+    def mora(self, mora):
+        self.state = ProxySyllable(Syllable.schwa_kind(self.schwa, mora), self.state.stress, self.state.foot_position, self.state.weight)
+    # Stress: unstressed/primary/secondary
+    @property
+    def stress(self):
+        return self.state.stress
+    @stress.setter
+    def stress(self, stress):
+        self.state = self.state.mod_stress(stress)
+    # Foot position: none/left/right/whole
+    @property
+    def foot_position(self):
+        return self.state.foot_position
+    @foot_position.setter
+    def foot_position(self, foot_position):
+        self.state = self.state.mod_position(foot_position)
+    # Weight: L/H
+    @property
+    def weight(self):
+        return self.state.weight
+    @weight.setter
+    def weight(self, weight):
+        self.state = self.state.mod_weight(weight)
     # String form of the syllable for printing in singular
     def __str__(self):
         syllable = self.nucleus
@@ -70,89 +173,57 @@ class Syllable:
         elif self.stress == "secondary":
             syllable = "ˌ" + syllable
         return syllable
-    # Returns a copy of the syllable
+    # Returns a copy of the syllable, sharing its state
     def copy(self):
-        onset = self.onset
-        nucleus = self.nucleus
-        coda = self.coda
-        mora = self.mora
-        stress = self.stress
-        foot_position = self.foot_position
-        index = self.index
-        return Syllable(onset=onset, nucleus=nucleus, coda=coda, index=index, mora=mora, stress=stress, foot_position=foot_position)
-    # Returns a copy of the syllable without letter content
+        syllable = Syllable(self.onset, self.nucleus, self.coda, index=self.index)
+        syllable.state = self.state
+        return syllable
+    # Returns the syllable without letter content, which is its state
     def proxy(self):
-        if self.schwa:
-            if self.mora:
-                schwa = "mora"
-            else:
-                schwa = "nonmora"
-        else:
-            schwa = "not schwa"
-        stress = self.stress
-        foot_position = self.foot_position
-        weight = self.weight
-        return ProxySyllable(schwa, stress, foot_position, weight)
+        return self.state
     # Applies the format from a proxy syllable to the syllable
     def apply(self, proxy_syllable):
         if proxy_syllable.schwa == "nonmora":
             self.mora = False
-        self.stress = proxy_syllable.stress
-        self.foot_position = proxy_syllable.foot_position
-        self.weight = proxy_syllable.weight
+        self.state = ProxySyllable(self.state.schwa, proxy_syllable.stress, proxy_syllable.foot_position, proxy_syllable.weight)
     # Turns a word string into separate syllables
     def to_syllable_array(string):
-        syllables = []
-        syllable_strings = []
-        syllable_indices = []
-        # Identifies nuclei
-        for i in range(len(string)):
-            if Character.is_vowel(string[i]) or string[i] == '^':
-                if i == 0 or (i >= 1 and Character.is_consonant(string[i-1])) or (i >= 3 and Character.is_bound_consonant(string[i-3:i])):
-                    syllable_strings += [[string[i]]]
-                    syllable_indices += [i]
-                else:
-                    syllable_strings[-1][0] += string[i]
-        # Adds onsets and codas
-        for i in range(len(syllable_indices)):
-            index = syllable_indices[i]
-            if index >= 3 and Character.is_bound_consonant(string[index-3:index]):
-                syllable_strings[i] = [string[index-3:index]] + syllable_strings[i]
-            elif index >= 1 and Character.is_consonant(string[index-1]):
-                syllable_strings[i] = [string[index-1:index]] + syllable_strings[i]
-            if index + 3 < len(string) and Character.is_bound_consonant(string[index+1:index+4]):
-                if not (index + 4 in syllable_indices) or index + 4 >= len(string):
-                    syllable_strings[i] += [string[index+1:index+4]]
-            elif index + 1 < len(string) and Character.is_consonant(string[index+1]):
-                if not (index + 2 in syllable_indices) or index + 2 >= len(string):
-                    syllable_strings[i] += [string[index+1]]
-        # Creates syllable objects from strings
-        for i in range(len(syllable_strings)):
-            body_array_size = len(syllable_strings[i])
-            match body_array_size:
-                case 1:
-                    syllables += [Syllable(None, syllable_strings[i][0], None, i + 1)]
-                case 2:
-                    if Character.is_vowel(syllable_strings[0]):
-                        syllables += [Syllable(None, syllable_strings[i][0], syllable_strings[i][1], i + 1)]
-                    else:
-                        syllables += [Syllable(syllable_strings[i][0], syllable_strings[i][1], None, i + 1)]
-                case 3:
-                    syllables += [Syllable(syllable_strings[i][0], syllable_strings[i][1], syllable_strings[i][2], i + 1)]
-        return syllables
+        return [Syllable(onset, nucleus, coda, i + 1) for i, (onset, nucleus, coda) in enumerate(Character.syllabify(string))]
     # Modifies the weight of the syllable
     def mod_weight(self, new_weight):
         self.weight = new_weight
 # Class of syllable objects with simplified content for efficiency
+# A proxy syllable is an immutable state shared by every candidate having it: constructing one returns the same object
+# for the same fields, and the mod methods return another state instead of modifying it
+# The fields stay strings, as comparing interned strings is already an identity check
 class ProxySyllable:
-    # Constructor of a single syllable without letter content
-    def __init__(self, schwa, stress, foot_position, weight="L"):
-        self.schwa = schwa # not schwa/mora/nonmora
-        self.stress = stress # unstressed/primary/secondary
-        self.foot_position = foot_position # none/left/right/whole
-        self.weight = weight # L/H
-    # String form of the syllable for printing in singular
+    __slots__ = ("schwa", "stress", "foot_position", "weight", "string")
+    states = {} # (schwa, stress, foot_position, weight) -> state
+    # Returns the state of a single syllable without letter content, creating it on first use
+    # Two threads creating the same state at once both store it with setdefault, which keeps the first one stored, so
+    # that every thread gets that same state
+    def __new__(cls, schwa, stress, foot_position, weight="L"):
+        key = (schwa, stress, foot_position, weight)
+        state = ProxySyllable.states.get(key)
+        if state == None:
+            state = object.__new__(cls)
+            object.__setattr__(state, "schwa", schwa) # not schwa/mora/nonmora
+            object.__setattr__(state, "stress", stress) # unstressed/primary/secondary
+            object.__setattr__(state, "foot_position", foot_position) # none/left/right/whole, or half before resolved
+            object.__setattr__(state, "weight", weight) # L/H/L shortened
+            object.__setattr__(state, "string", None)
+            state = ProxySyllable.states.setdefault(key, state)
+        return state
+    # States are not to be modified, being shared
+    def __setattr__(self, name, value):
+        raise AttributeError("ProxySyllable states are immutable; use the mod methods")
+    # Pickles the state as its fields, so that it is interned again when unpickled (e.g. in Lexicon processes)
+    def __reduce__(self):
+        return (ProxySyllable, (self.schwa, self.stress, self.foot_position, self.weight))
+    # String form of the syllable for printing in singular, worked out once for each state
     def __str__(self):
+        if self.string != None:
+            return self.string
         if self.schwa == "nonmora":
             syllable = "^ə"
         elif self.schwa == "mora":
@@ -166,27 +237,665 @@ class ProxySyllable:
             syllable = "ˈ" + syllable
         elif self.stress == "secondary":
             syllable = "ˌ" + syllable
+        object.__setattr__(self, "string", syllable)
         return syllable
-    # Returns a copy of the syllable
+    # Returns the syllable itself, as states are shared
     def copy(self):
-        return ProxySyllable(self.schwa, self.stress, self.foot_position, weight=self.weight)
-    # Modifies the foot position of the syllable
+        return self
+    # Returns the state of the syllable, which is the syllable itself (see Syllable.state)
+    @property
+    def state(self):
+        return self
+    # Returns the state with the foot position changed
     def mod_position(self, new_foot_position):
-        self.foot_position = new_foot_position
-    # Modifies the stress of the syllable
+        return ProxySyllable(self.schwa, self.stress, new_foot_position, self.weight)
+    # Returns the state with the stress changed
     def mod_stress(self, new_stress):
-        self.stress = new_stress
-    # Modifies the weight of the syllable
+        return ProxySyllable(self.schwa, new_stress, self.foot_position, self.weight)
+    # Returns the state with the weight changed
     def mod_weight(self, new_weight):
-        self.weight = new_weight
+        return ProxySyllable(self.schwa, self.stress, self.foot_position, new_weight)
 # Class of violation rule objects
 class Violation:
-    # Constructor for a violation
-    def __init__(self, name, direction, rank):
+    # Constructor for a violation, in a stratum of its own unless given the stratum of the violations tied with it
+    def __init__(self, name, direction, rank, stratum=None):
         self.name = name
         self.direction = direction
         self.rank = rank
+        # Violations with the same stratum are tied: their values are summed and applied in one pass
+        self.stratum = rank if stratum == None else stratum
         self.in_effect = True
+        self.constraint = Constraint.get(name)
+    # Returns a copy of the violation at the given rank and stratum, as violations may be shared by several words (e.g.
+    # those built by a Grammar)
+    def reranked(self, rank, stratum):
+        violation = Violation(self.name, self.direction, rank, stratum)
+        violation.in_effect = self.in_effect
+        return violation
+# Class of constraint objects, each counting one type of violation; Violation looks them up by name
+class Constraint:
+    registry = {}
+    name = None
+    level = "syllable" # syllable: a violation for each syllable weighted by index; word: at most one for the entire word
+    window = 0 # number of neighbouring syllables on each side deciding a violation, None if the entire word is needed
+    wraps = [] # directions in which the evaluation compares the last syllable with the first one
+    # Registers a constraint under its name and the given aliases
+    def register(constraint, aliases=[]):
+        for name in [constraint.name] + aliases:
+            Constraint.registry[name] = constraint
+    # Returns the constraint registered under the name, None if there is none
+    def get(name):
+        return Constraint.registry.get(name)
+    # Returns the violation of the candidate in value, with index-based weight in the given direction
+    def evaluate(self, candidate, direction):
+        sum = 0
+        for i in range(len(candidate)):
+            if direction == "L":
+                index = -1 - i
+            else:
+                index = i
+            if self.violated(candidate, index):
+                sum += 2 ** (len(candidate) - 1 - i)
+        return sum
+    # Returns True if the syllable at index (negative when counting leftward) of the candidate violates the constraint
+    def violated(self, candidate, index):
+        return False
+    # Returns True if the syllable violates the constraint given its neighbours (None beyond the word edges) and the
+    # first syllable of the word, the same as violated does at its index
+    def local(self, direction, previous, current, following, first):
+        return False
+    # Returns the source of an expression that is True if the syllable violates the constraint, given the sources of
+    # its neighbours (None beyond the word edges) and the first syllable, for CompiledGrammar; None if not supported
+    def expression(self, direction, previous, current, following, first):
+        return None
+    # Returns the violations of every candidate in the pool (a CandidateArray) in value
+    def vectorize(self, pool, direction):
+        return pool.weigh(self.marks(pool, direction), direction)
+    # Returns the matrix of syllables in the pool violating the constraint
+    def marks(self, pool, direction):
+        return numpy.zeros(pool.choices.shape, dtype=bool)
+    # Returns the bitsets of the candidates in the pool (a CandidateBits) violating the constraint, one for each syllable
+    # from the most significant in value, so that comparing candidates bitset by bitset compares their violations
+    def bitslices(self, pool, direction):
+        marks = self.bit_marks(pool, direction)
+        if direction == "L":
+            return marks[::-1]
+        return marks
+    # Returns for each syllable the bitset of the candidates in the pool violating the constraint at that syllable
+    def bit_marks(self, pool, direction):
+        return [0] * pool.length
+    # Returns the reason why the constraint gives every candidate of a word the same violations, given the facts of the
+    # word (see SimplifiedRanking.facts), or None if it may tell candidates apart
+    def inert(self, direction, facts):
+        return None
+# A stressed syllable is to be on the left of a foot
+class Trochee(Constraint):
+    name = "Trochee"
+    window = 1
+    def violated(self, candidate, index):
+        match candidate[index].foot_position:
+            case "left":
+                if candidate[index].stress != "unstressed":
+                    return not candidate[index + 1].schwa != "nonmora" and candidate[index].weight != "H"
+                return candidate[index].schwa != "nonmora"
+            case "right":
+                if candidate[index].stress != "unstressed":
+                    return candidate[index - 1].schwa != "nonmora" or candidate[index].weight != "H"
+            case "whole":
+                return candidate[index].stress != "unstressed" and candidate[index].weight != "H"
+        return False
+    def local(self, direction, previous, current, following, first):
+        match current.foot_position:
+            case "left":
+                if current.stress != "unstressed":
+                    return following.schwa == "nonmora" and current.weight != "H"
+                return current.schwa != "nonmora"
+            case "right":
+                if current.stress != "unstressed":
+                    return previous.schwa != "nonmora" or current.weight != "H"
+            case "whole":
+                return current.stress != "unstressed" and current.weight != "H"
+        return False
+    def expression(self, direction, previous, current, following, first):
+        terms = ['{c}.foot_position == "whole" and {c}.stress != "unstressed" and {c}.weight != "H"']
+        if following != None:
+            terms += ['{c}.foot_position == "left" and ({c}.stress != "unstressed" and {f}.schwa == "nonmora" and {c}.weight != "H" or {c}.stress == "unstressed" and {c}.schwa != "nonmora")']
+        if previous != None:
+            terms += ['{c}.foot_position == "right" and {c}.stress != "unstressed" and ({p}.schwa != "nonmora" or {c}.weight != "H")']
+        return " or ".join(terms).format(p=previous, c=current, f=following)
+    def marks(self, pool, direction):
+        return (pool.left & pool.stressed & CandidateArray.following(pool.nonmora, False) & ~pool.heavy) \
+            | (pool.left & ~pool.stressed & ~pool.nonmora) \
+            | (pool.right & pool.stressed & (~CandidateArray.previous(pool.nonmora, False) | ~pool.heavy)) \
+            | (pool.whole & pool.stressed & ~pool.heavy)
+    def bit_marks(self, pool, direction):
+        previous = CandidateBits.previous(pool.nonmora, 0)
+        following = CandidateBits.following(pool.nonmora, 0)
+        return [(pool.left[i] & pool.stressed[i] & following[i] & ~pool.heavy[i]) \
+            | (pool.left[i] & ~pool.stressed[i] & ~pool.nonmora[i]) \
+            | (pool.right[i] & pool.stressed[i] & (~previous[i] | ~pool.heavy[i])) \
+            | (pool.whole[i] & pool.stressed[i] & ~pool.heavy[i]) for i in range(pool.length)]
+# A stressed syllable is to be on the right of a foot
+class Iamb(Constraint):
+    name = "Iamb"
+    window = 1
+    def violated(self, candidate, index):
+        match candidate[index].foot_position:
+            case "left":
+                if candidate[index].stress != "unstressed":
+                    return candidate[index + 1].schwa != "nonmora" or candidate[index].weight != "H"
+            case "right":
+                if candidate[index].stress != "unstressed":
+                    return not candidate[index - 1].schwa != "nonmora" and candidate[index].weight != "H"
+                return candidate[index].schwa != "nonmora"
+            case "whole":
+                return candidate[index].stress != "unstressed" and candidate[index].weight != "H"
+        return False
+    def local(self, direction, previous, current, following, first):
+        match current.foot_position:
+            case "left":
+                if current.stress != "unstressed":
+                    return following.schwa != "nonmora" or current.weight != "H"
+            case "right":
+                if current.stress != "unstressed":
+                    return previous.schwa == "nonmora" and current.weight != "H"
+                return current.schwa != "nonmora"
+            case "whole":
+                return current.stress != "unstressed" and current.weight != "H"
+        return False
+    def expression(self, direction, previous, current, following, first):
+        terms = ['{c}.foot_position == "whole" and {c}.stress != "unstressed" and {c}.weight != "H"']
+        if following != None:
+            terms += ['{c}.foot_position == "left" and {c}.stress != "unstressed" and ({f}.schwa != "nonmora" or {c}.weight != "H")']
+        if previous != None:
+            terms += ['{c}.foot_position == "right" and ({c}.stress != "unstressed" and {p}.schwa == "nonmora" and {c}.weight != "H" or {c}.stress == "unstressed" and {c}.schwa != "nonmora")']
+        return " or ".join(terms).format(p=previous, c=current, f=following)
+    def marks(self, pool, direction):
+        return (pool.left & pool.stressed & (~CandidateArray.following(pool.nonmora, False) | ~pool.heavy)) \
+            | (pool.right & pool.stressed & CandidateArray.previous(pool.nonmora, False) & ~pool.heavy) \
+            | (pool.right & ~pool.stressed & ~pool.nonmora) \
+            | (pool.whole & pool.stressed & ~pool.heavy)
+    def bit_marks(self, pool, direction):
+        previous = CandidateBits.previous(pool.nonmora, 0)
+        following = CandidateBits.following(pool.nonmora, 0)
+        return [(pool.left[i] & pool.stressed[i] & (~following[i] | ~pool.heavy[i])) \
+            | (pool.right[i] & pool.stressed[i] & previous[i] & ~pool.heavy[i]) \
+            | (pool.right[i] & ~pool.stressed[i] & ~pool.nonmora[i]) \
+            | (pool.whole[i] & pool.stressed[i] & ~pool.heavy[i]) for i in range(pool.length)]
+# Every syllable is to be in a foot
+class Parse(Constraint):
+    name = "Parse"
+    def violated(self, candidate, index):
+        return candidate[index].foot_position == "none"
+    def local(self, direction, previous, current, following, first):
+        return current.foot_position == "none"
+    def expression(self, direction, previous, current, following, first):
+        return current + '.foot_position == "none"'
+    def marks(self, pool, direction):
+        return pool.foot_position == 0
+    def bit_marks(self, pool, direction):
+        return pool.none
+# The final (R) or initial (L) syllable is not to be stressed
+class NonFin(Constraint):
+    name = "NonFin"
+    level = "word"
+    def evaluate(self, candidate, direction):
+        if direction == "R":
+            fin = candidate[-1].stress
+        else:
+            fin = candidate[0].stress
+        if fin == "unstressed":
+            return 0
+        return 1
+    def local(self, direction, previous, current, following, first):
+        if direction == "R":
+            return following == None and current.stress != "unstressed"
+        return previous == None and current.stress != "unstressed"
+    def expression(self, direction, previous, current, following, first):
+        if (direction == "R" and following != None) or (direction != "R" and previous != None):
+            return "False"
+        return current + '.stress != "unstressed"'
+    def vectorize(self, pool, direction):
+        if direction == "R":
+            return pool.stressed[:, -1].astype(numpy.int64)
+        return pool.stressed[:, 0].astype(numpy.int64)
+    def bitslices(self, pool, direction):
+        if pool.length == 0:
+            return []
+        if direction == "R":
+            return [pool.stressed[-1]]
+        return [pool.stressed[0]]
+# The word is to have at least one foot
+class HeadWord(Constraint):
+    name = "HD(w)"
+    level = "word"
+    window = None
+    def evaluate(self, candidate, direction):
+        for syllable in candidate:
+            if self.satisfied_by(syllable):
+                return 0
+        return 1
+    # Returns True if the syllable alone spares the word the violation
+    def satisfied_by(self, syllable):
+        return syllable.foot_position != "none"
+    # Returns the source of satisfied_by for CompiledGrammar
+    def satisfied_expression(self, current):
+        return current + '.foot_position != "none"'
+    def vectorize(self, pool, direction):
+        return (~(pool.foot_position != 0).any(axis=1)).astype(numpy.int64)
+    def bitslices(self, pool, direction):
+        unfooted = pool.all
+        for none in pool.none:
+            unfooted &= none
+        return [unfooted]
+# A foot with a heavy syllable is not to be an unstressed-final trochee
+class BalancedTrochee(Constraint):
+    name = "Bal-Troch"
+    window = 1
+    def violated(self, candidate, index):
+        if candidate[index].foot_position == "right" and candidate[index].stress == "unstressed":
+            return candidate[index - 1].weight == "H" or candidate[index].weight == "H"
+        return False
+    def local(self, direction, previous, current, following, first):
+        if current.foot_position == "right" and current.stress == "unstressed":
+            return previous.weight == "H" or current.weight == "H"
+        return False
+    def expression(self, direction, previous, current, following, first):
+        if previous == None:
+            return "False"
+        return '{c}.foot_position == "right" and {c}.stress == "unstressed" and ({p}.weight == "H" or {c}.weight == "H")'.format(p=previous, c=current)
+    def marks(self, pool, direction):
+        return pool.right & ~pool.stressed & (CandidateArray.previous(pool.heavy, False) | pool.heavy)
+    def bit_marks(self, pool, direction):
+        previous = CandidateBits.previous(pool.heavy, 0)
+        return [pool.right[i] & ~pool.stressed[i] & (previous[i] | pool.heavy[i]) for i in range(pool.length)]
+# The final (R) or initial (L) syllable is to be in a foot
+class FootRight(Constraint):
+    name = "Foot-Right"
+    level = "word"
+    def evaluate(self, candidate, direction):
+        if direction == "R":
+            fin = candidate[-1].foot_position
+        else:
+            fin = candidate[0].foot_position
+        if fin == "none":
+            return 1
+        return 0
+    def local(self, direction, previous, current, following, first):
+        if direction == "R":
+            return following == None and current.foot_position == "none"
+        return previous == None and current.foot_position == "none"
+    def expression(self, direction, previous, current, following, first):
+        if (direction == "R" and following != None) or (direction != "R" and previous != None):
+            return "False"
+        return current + '.foot_position == "none"'
+    def vectorize(self, pool, direction):
+        if direction == "R":
+            return (pool.foot_position[:, -1] == 0).astype(numpy.int64)
+        return (pool.foot_position[:, 0] == 0).astype(numpy.int64)
+    def bitslices(self, pool, direction):
+        if pool.length == 0:
+            return []
+        if direction == "R":
+            return [pool.none[-1]]
+        return [pool.none[0]]
+# A long vowel is not to be shortened
+class MaxMora(Constraint):
+    name = "Max(μ)"
+    def violated(self, candidate, index):
+        return candidate[index].weight == "L shortened"
+    def local(self, direction, previous, current, following, first):
+        return current.weight == "L shortened"
+    def expression(self, direction, previous, current, following, first):
+        return current + '.weight == "L shortened"'
+    def marks(self, pool, direction):
+        return pool.weight == 2
+    def bit_marks(self, pool, direction):
+        return pool.shortened
+    def inert(self, direction, facts):
+        if not facts["shortening"]:
+            return "no vowel can be shortened"
+        return None
+# A light schwa is not to be stressed
+class StressedSchwa(Constraint):
+    name = "*Stressed/ə"
+    def violated(self, candidate, index):
+        return candidate[index].schwa != "not schwa" and candidate[index].stress != "unstressed" and candidate[index].weight != "H"
+    def local(self, direction, previous, current, following, first):
+        return current.schwa != "not schwa" and current.stress != "unstressed" and current.weight != "H"
+    def expression(self, direction, previous, current, following, first):
+        return '{c}.schwa != "not schwa" and {c}.stress != "unstressed" and {c}.weight != "H"'.format(c=current)
+    def marks(self, pool, direction):
+        return (pool.schwa != 0) & pool.stressed & ~pool.heavy
+    def bit_marks(self, pool, direction):
+        return [pool.schwa[i] & pool.stressed[i] & ~pool.heavy[i] for i in range(pool.length)]
+    def inert(self, direction, facts):
+        if not facts["schwa"]:
+            return "the word has no schwa"
+        return None
+# A vowel is not to be long
+class LongVowel(Constraint):
+    name = "*Long-V"
+    def violated(self, candidate, index):
+        return candidate[index].weight == "H"
+    def local(self, direction, previous, current, following, first):
+        return current.weight == "H"
+    def expression(self, direction, previous, current, following, first):
+        return current + '.weight == "H"'
+    def marks(self, pool, direction):
+        return pool.heavy
+    def bit_marks(self, pool, direction):
+        return pool.heavy
+    def inert(self, direction, facts):
+        if not facts["shortening"]:
+            return "no vowel can be shortened, so the long vowels are the same in every candidate"
+        return None
+# A schwa is not to be moraic
+class MoraicSchwa(Constraint):
+    name = "*μ/ə"
+    def violated(self, candidate, index):
+        return candidate[index].schwa == "mora"
+    def local(self, direction, previous, current, following, first):
+        return current.schwa == "mora"
+    def expression(self, direction, previous, current, following, first):
+        return current + '.schwa == "mora"'
+    def marks(self, pool, direction):
+        return pool.schwa == 1
+    def bit_marks(self, pool, direction):
+        return pool.mora
+    def inert(self, direction, facts):
+        if not facts["schwa"]:
+            return "the word has no schwa"
+        return None
+# A foot of a single syllable is not to be headed by a nonmoraic schwa
+class HeadFoot(Constraint):
+    name = "HD(ft)"
+    def violated(self, candidate, index):
+        return candidate[index].foot_position == "whole" and candidate[index].schwa == "nonmora"
+    def local(self, direction, previous, current, following, first):
+        return current.foot_position == "whole" and current.schwa == "nonmora"
+    def expression(self, direction, previous, current, following, first):
+        return '{c}.foot_position == "whole" and {c}.schwa == "nonmora"'.format(c=current)
+    def marks(self, pool, direction):
+        return pool.whole & pool.nonmora
+    def bit_marks(self, pool, direction):
+        return [pool.whole[i] & pool.nonmora[i] for i in range(pool.length)]
+    def inert(self, direction, facts):
+        if not facts["schwa"]:
+            return "the word has no schwa"
+        return None
+# Stressed syllables are not to be adjacent
+class Clash(Constraint):
+    name = "*Clash"
+    window = 1
+    # Leftward evaluation counts with negative indices, so only the following syllable is checked
+    # and the last syllable is compared with the first one
+    wraps = ["L"]
+    def violated(self, candidate, index):
+        if candidate[index].stress != "unstressed":
+            return (index > 0 and candidate[index - 1].stress != "unstressed") or (index + 1 < len(candidate) and candidate[index + 1].stress != "unstressed")
+        return False
+    def local(self, direction, previous, current, following, first):
+        if current.stress == "unstressed":
+            return False
+        if direction == "L":
+            if following == None:
+                return first.stress != "unstressed"
+            return following.stress != "unstressed"
+        return (previous != None and previous.stress != "unstressed") or (following != None and following.stress != "unstressed")
+    def expression(self, direction, previous, current, following, first):
+        if direction == "L":
+            if following == None:
+                neighbours = [first]
+            else:
+                neighbours = [following]
+        else:
+            neighbours = [neighbour for neighbour in [previous, following] if neighbour != None]
+        if len(neighbours) == 0:
+            return "False"
+        return current + '.stress != "unstressed" and (' + " or ".join([neighbour + '.stress != "unstressed"' for neighbour in neighbours]) + ")"
+    def marks(self, pool, direction):
+        if direction == "L":
+            return pool.stressed & CandidateArray.following(pool.stressed, pool.stressed[:, :1])
+        return pool.stressed & (CandidateArray.previous(pool.stressed, False) | CandidateArray.following(pool.stressed, False))
+    def bit_marks(self, pool, direction):
+        if pool.length == 0:
+            return []
+        if direction == "L":
+            following = CandidateBits.following(pool.stressed, pool.stressed[0])
+            return [pool.stressed[i] & following[i] for i in range(pool.length)]
+        previous = CandidateBits.previous(pool.stressed, 0)
+        following = CandidateBits.following(pool.stressed, 0)
+        return [pool.stressed[i] & (previous[i] | following[i]) for i in range(pool.length)]
+Constraint.register(Trochee())
+Constraint.register(Iamb())
+Constraint.register(Parse())
+Constraint.register(NonFin())
+Constraint.register(HeadWord())
+Constraint.register(BalancedTrochee())
+Constraint.register(FootRight())
+Constraint.register(MaxMora(), ["Max(μ) (auto)"])
+Constraint.register(StressedSchwa())
+Constraint.register(LongVowel())
+Constraint.register(MoraicSchwa())
+Constraint.register(HeadFoot())
+Constraint.register(Clash())
+# Class of rankings compiled into specialised penalty functions, one for each violation and word length, with the
+# direction, indices and weights written into the code instead of looked up for every syllable of every candidate
+# A stratum of tied violations is compiled into a single function adding up the terms of all of them
+class CompiledGrammar:
+    cache = OrderedDict() # Ranking -> compiled grammar, the least recently used first
+    max_size = 256 # Number of rankings kept in cache
+    lock = threading.Lock() # Lock of cache, as grammars are looked up from several threads (see Grammar.solve)
+    # Constructor
+    def __init__(self, violations):
+        self.violations = violations
+        self.functions = {}
+        self.sums = {}
+    # Returns the compiled grammar of the violations, reusing the one compiled before for the same ranking if it is
+    # among the max_size rankings used last
+    def get(violations):
+        signature = tuple([(violation.name, violation.direction) for violation in violations])
+        with CompiledGrammar.lock:
+            if signature in CompiledGrammar.cache:
+                CompiledGrammar.cache.move_to_end(signature)
+                return CompiledGrammar.cache[signature]
+            compiled = CompiledGrammar([Violation(name, direction, rank) for rank, (name, direction) in enumerate(signature)])
+            CompiledGrammar.cache[signature] = compiled
+            if len(CompiledGrammar.cache) > CompiledGrammar.max_size:
+                CompiledGrammar.cache.popitem(last=False)
+            return compiled
+    # Returns the penalty functions of the violations in rank for candidates of the given length
+    def penalties(self, length):
+        if not length in self.functions:
+            self.functions[length] = [CompiledGrammar.compile(violation, length) for violation in self.violations]
+        return self.functions[length]
+    # Returns the penalty function of the sum of the violations at the given ranks (a stratum) for candidates of the
+    # given length
+    def stratum_penalty(self, ranks, length):
+        key = (tuple(ranks), length)
+        if not key in self.sums:
+            self.sums[key] = CompiledGrammar.compile_sum([self.violations[rank] for rank in ranks], length)
+        return self.sums[key]
+    # Returns the (weight, expression) terms of the violation for candidates of the given length, the expressions being
+    # True for the syllables c0, c1... adding the weight, or None if the constraint does not provide expressions
+    def terms(violation, length):
+        constraint = violation.constraint
+        syllables = ["c" + str(i) for i in range(length)]
+        if constraint.window == None:
+            terms = [constraint.satisfied_expression(syllable) for syllable in syllables]
+            return [(1, "not (" + " or ".join(["(" + term + ")" for term in terms] + ["False"]) + ")")]
+        terms = []
+        for i in range(length):
+            previous = syllables[i - 1] if i > 0 else None
+            following = syllables[i + 1] if i + 1 < length else None
+            term = constraint.expression(violation.direction, previous, syllables[i], following, syllables[0])
+            if term == None:
+                return None
+            if term == "False":
+                continue
+            if constraint.level == "word":
+                weight = 1
+            elif violation.direction == "L":
+                weight = 2 ** i
+            else:
+                weight = 2 ** (length - 1 - i)
+            terms += [(weight, term)]
+        return terms
+    # Returns the source of the penalty function of the violation for candidates of the given length,
+    # None if the constraint does not provide expressions
+    def source(violation, length):
+        return CompiledGrammar.sum_source([violation], length)
+    # Returns the source of the penalty function of the sum of the violations for candidates of the given length,
+    # None if a constraint does not provide expressions
+    # The function takes a bound as well: the terms are added from the heaviest, and as soon as the sum exceeds the
+    # bound it is returned as it is, being then a lower bound of the violations that already exceeds the bound
+    def sum_source(violations, length):
+        terms = []
+        for violation in violations:
+            violation_terms = CompiledGrammar.terms(violation, length)
+            if violation_terms == None:
+                return None
+            terms += violation_terms
+        terms.sort(key=lambda term: -term[0])
+        syllables = ["c" + str(i) for i in range(length)]
+        lines = ["def penalty(candidate, bound=math.inf):"]
+        if length > 0:
+            lines += ["    " + ", ".join(syllables) + ", = candidate"]
+        lines += ["    value = 0"]
+        for i in range(len(terms)):
+            weight, term = terms[i]
+            lines += ["    if " + term + ":", "        value += " + str(weight)]
+            if i + 1 < len(terms):
+                lines += ["        if value > bound:", "            return value"]
+        lines += ["    return value"]
+        return "\n".join(lines)
+    # Returns the penalty function of the violation for candidates of the given length
+    def compile(violation, length):
+        return CompiledGrammar.compile_sum([violation], length)
+    # Returns the penalty function of the sum of the violations for candidates of the given length
+    def compile_sum(violations, length):
+        if any([violation.constraint == None for violation in violations]):
+            print("Invalid violation type")
+            return lambda candidate, bound=math.inf: -1
+        source = CompiledGrammar.sum_source(violations, length)
+        if source == None:
+            return lambda candidate, bound=math.inf: sum([violation.constraint.evaluate(candidate, violation.direction) for violation in violations])
+        namespace = {"math": math}
+        exec(source, namespace)
+        return namespace["penalty"]
+# Class of rankings simplified before any candidate is evaluated: the violations proven to give every candidate left
+# by the violations above them the same value, given the aspects ignored and the shape of the word, are found by looking
+# at the ranking alone and left out by every engine, each with the reason; the result is reused for the same ranking,
+# aspects and facts of the shape
+class SimplifiedRanking:
+    cache = OrderedDict() # (ranking, facts) -> simplified ranking, the least recently used first
+    max_size = 1024 # Number of simplified rankings kept in cache
+    lock = threading.Lock() # Lock of cache, as rankings are simplified from several threads (see Grammar.solve)
+    # Constructor, with the violations in rank and the facts of the shape (see facts)
+    def __init__(self, violations, facts):
+        # (rank, violation, reason) of each violation left out, in rank
+        self.removed = []
+        kept = []
+        for rank in range(len(violations)):
+            violation = violations[rank]
+            if violation.constraint == None or not violation.in_effect:
+                continue
+            reason = SimplifiedRanking.reason(violation, facts, kept)
+            if reason == None:
+                kept += [(rank, violation)]
+            else:
+                self.removed += [(rank, violation, reason)]
+        # Ranks of the violations left out
+        self.ranks = frozenset([rank for rank, violation, reason in self.removed])
+    # Returns the simplified ranking of the violations of the word in stress, reusing the one found before for the
+    # same ranking, aspects and facts if it is among the max_size used last
+    def get(stress):
+        facts = SimplifiedRanking.facts(stress)
+        signature = (tuple([(violation.name, violation.direction, violation.in_effect, violation.stratum) for violation in stress.violations]), tuple(sorted(facts.items())))
+        with SimplifiedRanking.lock:
+            if signature in SimplifiedRanking.cache:
+                SimplifiedRanking.cache.move_to_end(signature)
+                return SimplifiedRanking.cache[signature]
+            simplified = SimplifiedRanking(stress.violations, facts)
+            SimplifiedRanking.cache[signature] = simplified
+            if len(SimplifiedRanking.cache) > SimplifiedRanking.max_size:
+                SimplifiedRanking.cache.popitem(last=False)
+            return simplified
+    # Returns the facts of the word in stress that decide which violations are left out: whether it has syllables,
+    # whether it has a schwa, and whether a vowel can be shortened (a long vowel with weight and shortening considered)
+    def facts(stress):
+        consider_shortening = not "weight" in stress.not_considering and not "shortening" in stress.not_considering
+        return {
+            "syllables": len(stress.syllables) > 0,
+            "schwa": any([syllable.schwa for syllable in stress.syllables]),
+            "shortening": consider_shortening and any([syllable.weight == "H" for syllable in stress.syllables])
+        }
+    # Returns the reason why the violation is left out below the violations kept (as (rank, violation) pairs), None if
+    # it is not
+    # A word without syllables has a single candidate; a constraint may give every candidate the same violations
+    # (Constraint.inert); and the candidates left by a constraint all have the same violations of it, in any direction
+    # if its violations are counted syllable by syllable without comparing the last syllable with the first one, unless
+    # it is summed with other violations kept in its stratum
+    def reason(violation, facts, kept):
+        if not facts["syllables"]:
+            return "the word has no syllables, so there is a single candidate"
+        reason = violation.constraint.inert(violation.direction, facts)
+        if reason != None:
+            return reason
+        constraint = violation.constraint
+        by_syllable = constraint.level == "syllable" and type(constraint).evaluate == Constraint.evaluate and constraint.wraps == []
+        for rank, above in kept:
+            if above.stratum == violation.stratum or len([other for other_rank, other in kept if other.stratum == above.stratum]) > 1:
+                continue
+            if above.constraint == constraint and (above.direction == violation.direction or by_syllable):
+                return "the candidates left by " + above.name + ", " + above.direction + " (rank " + str(rank + 1) + ") all have the same violations of it"
+        return None
+    # Returns the lines reporting the violations left out, as op prints them
+    def report(self):
+        return [violation.name + ", " + violation.direction + " (rank " + str(rank + 1) + "): " + reason for rank, violation, reason in self.removed]
+# Class of sinks keeping the events traced by the engines of Stress in memory, as dictionaries in the order emitted
+# A sink is any object with emit(event); the engines only build the events when given one
+class MemorySink:
+    # Constructor
+    def __init__(self):
+        self.events = []
+    # Keeps the event
+    def emit(self, event):
+        self.events += [event]
+    # Returns the total seconds and the number of passes of each violation over the kept events
+    def summary(self):
+        totals = {}
+        for event in self.events:
+            if event["event"] == "constraint" and event["seconds"] != None:
+                seconds, passes = totals.get(event["violation"], (0, 0))
+                totals[event["violation"]] = (seconds + event["seconds"], passes + 1)
+        return totals
+    # Forgets the kept events
+    def clear(self):
+        self.events = []
+# Class of sinks writing the events traced by the engines of Stress to a file in JSON Lines, one event per line
+class JSONLinesSink:
+    # Constructor, with either a path (opened for appending) or an open text file
+    def __init__(self, file):
+        if type(file) == str:
+            self.file = open(file, "a", encoding="utf-8")
+            self.owned = True
+        else:
+            self.file = file
+            self.owned = False
+        self.lock = threading.Lock()
+    # Writes the event, one line at a time when traced from several threads
+    def emit(self, event):
+        line = json.dumps(event, ensure_ascii=False) + "\n"
+        with self.lock:
+            self.file.write(line)
+    # Closes the file if opened by the sink
+    def close(self):
+        if self.owned:
+            self.file.close()
+        else:
+            self.file.flush()
 # Class of stress objects for the optimal stress pattern of the given word
 class Stress:
     # Constructor
@@ -195,18 +904,105 @@ class Stress:
         self.violations = []
         self.candidates = []
         self.not_considering = []
-    # Adds a violation type with direction
-    def add(self, violation_name, direction):
-        violation = Violation(violation_name, direction, len(self.violations))
+        # (rank, survivors) for each stratum that removed candidates in the last op, rank being the number of ranked
+        # violations applied, with the shape and ranking they were computed for; the candidates of a word are never kept
+        # whole, as the ones generated are only kept once a stratum has removed some of them
+        self.checkpoints = []
+        self.checkpoint_signature = None
+    # Adds a violation type with direction, raising ValueError if either is unknown
+    # If tied, the violation joins the stratum of the violation added last instead of being ranked below it
+    def add(self, violation_name, direction, tied=False):
+        if len(self.violations) == 0:
+            stratum = 0
+        elif tied:
+            stratum = self.violations[-1].stratum
+        else:
+            stratum = self.violations[-1].stratum + 1
+        violation = Violation(violation_name, direction, len(self.violations), stratum)
+        if violation.constraint == None:
+            raise ValueError("Invalid violation type: " + str(violation_name))
+        if not direction in ["L", "R"]:
+            raise ValueError("Invalid direction: " + str(direction))
         self.violations += [violation]
-    # Sets stresses before the last stress to secondary
+    # Replaces the ranking with violations in rank, each a (name, direction) pair or a stratum of tied violations as a
+    # list of such pairs (as Learner.learn returns), raising ValueError as add does
+    def set_violations(self, violations):
+        self.violations = []
+        for item in violations:
+            if len(item) > 0 and type(item[0]) == str:
+                name, direction = item
+                self.add(name, direction)
+            else:
+                for i in range(len(item)):
+                    name, direction = item[i]
+                    self.add(name, direction, tied=i > 0)
+    # Returns the violations in rank grouped into strata, each the list of the violations tied in it
+    def strata(self):
+        strata = []
+        for violation in self.violations:
+            if len(strata) > 0 and strata[-1][-1].stratum == violation.stratum:
+                strata[-1] += [violation]
+            else:
+                strata += [[violation]]
+        return strata
+    # Moves the violation of the given name to rank (starting at 0), in a stratum of its own
+    # The violations whose rank or stratum changes are replaced by copies, leaving the ones shared with other words as
+    # they are
+    def move(self, violation_name, rank):
+        for violation in self.violations:
+            if violation.name == violation_name:
+                self.violations.remove(violation)
+                self.violations.insert(rank, violation)
+                break
+        else:
+            raise ValueError("Violation not ranked: " + str(violation_name))
+        strata = [other.stratum for other in self.violations]
+        moved = self.violations.index(violation)
+        stratum = 0
+        for i in range(len(self.violations)):
+            if i > 0 and (strata[i] != strata[i - 1] or i == moved or i - 1 == moved):
+                stratum += 1
+            if self.violations[i].rank != i or self.violations[i].stratum != stratum:
+                self.violations[i] = self.violations[i].reranked(i, stratum)
+    # Returns the shape of the word and the ranking that the checkpoints of op depend on
+    def checkpoint_key(self):
+        signature = SolverCache.signature(self)
+        return (signature[:2], signature[2])
+    # Returns the number of ranked violations from the start after which the last op kept the survivors that still
+    # hold (the last checkpoint before the first stratum changed), 0 if none does
+    def resume_point(self):
+        if self.checkpoint_signature == None:
+            return 0
+        shape, ranking = self.checkpoint_signature
+        current_shape, current_ranking = self.checkpoint_key()
+        if shape != current_shape:
+            return 0
+        count = 0
+        while count < min(len(ranking), len(current_ranking)) and ranking[count] == current_ranking[count]:
+            count += 1
+        # A stratum is applied as a whole, so the survivors only hold up to the start of the first stratum changed
+        def tied(ranking, rank):
+            return rank < len(ranking) and ranking[rank - 1][3] == ranking[rank][3]
+        while count > 0 and (tied(ranking, count) or tied(current_ranking, count)):
+            count -= 1
+        return max([rank for rank, survivors in self.checkpoints if rank <= count], default=0)
+    # Adds Max(μ), R for the case considering shortening if Max(μ) is not ranked; returns True if added
+    def add_auto_max(self):
+        if "shortening" in self.not_considering:
+            return False
+        for violation in self.violations:
+            if violation.name in ["Max(μ)", "Max(μ) (auto)"]:
+                return False
+        self.add("Max(μ) (auto)", "R")
+        return True
+    # Sets stresses before the last stress to secondary, in the list given
     def classify_stress(syllables):
         has_primary = False
         for i in range(len(syllables)):
             index = len(syllables) - 1 - i
             if syllables[index].stress == "primary":
                 if has_primary:
-                    syllables[index].mod_stress("secondary")
+                    syllables[index] = syllables[index].mod_stress("secondary")
                 else:
                     has_primary = True
         return syllables
@@ -222,281 +1018,457 @@ class Stress:
         if print_excluded_amount:
             print(len(candidates) - count, "option(s) remaining;", count, "option(s) removed")
         return valid_candidates
-    # Lists out all possible patterns of the word (syllables)
-    def exhaust_candidates(self):
+    # Lists out all possible formats of a single syllable, with "half" for a syllable in a two-syllable foot
+    def all_possibility(self, whether_schwa, weight):
         consider_weight = not "weight" in self.not_considering
         consider_shortening = not "shortening" in self.not_considering
-        def all_possibility(whether_schwa, weight):
-            possibilities = []
-            if whether_schwa:
-                proxy_schwa = "mora"
-            else:
-                proxy_schwa = "not schwa"
-            if consider_weight:
-                if consider_shortening and weight == "H":
-                    proxy_weights = ["L shortened", "H"]
-                else:
-                    proxy_weights = [weight]
+        possibilities = []
+        if whether_schwa:
+            proxy_schwa = "mora"
+        else:
+            proxy_schwa = "not schwa"
+        if consider_weight:
+            if consider_shortening and weight == "H":
+                proxy_weights = ["L shortened", "H"]
             else:
-                proxy_weights = ["L"]
-            for proxy_weight in proxy_weights:
-                possibilities += [ProxySyllable(proxy_schwa, "unstressed", "none", proxy_weight)]
-                for stress in ["unstressed","primary"]:
-                    possibilities += [ProxySyllable(proxy_schwa, stress, "half", proxy_weight)]
-                possibilities += [ProxySyllable(proxy_schwa, "primary", "whole", proxy_weight)]
-                if whether_schwa:
-                    for foot_position in ["none","half","whole"]:
-                        possibilities += [ProxySyllable("nonmora", "unstressed", foot_position, proxy_weight)]
-            return possibilities    
-        def append(preceding_syllables, current_whether_schwa, current_weight):
-            to_append = all_possibility(current_whether_schwa, current_weight)
-            return [preceding_syllables + [syllable] for syllable in to_append]
-        def refresh(possibility):
-            for i in range(len(possibility)):
-                possibility[i] = possibility[i].copy()
-            return possibility
-        def mod_half(possibility):
-            foot_closed = True
-            for i in range(len(possibility)):
-                if possibility[i].foot_position == "half":
-                    if foot_closed:
-                        if i + 1 >= len(possibility) or possibility[i + 1].foot_position != "half":
-                            return None
-                        if (possibility[i].stress != "unstressed") == (possibility[i + 1].stress != "unstressed"):
-                            return None
-                        if possibility[i].weight == "H" and possibility[i + 1].weight == "H":
-                            return None
-                        possibility[i].mod_position("left")
-                    else:
-                        possibility[i].mod_position("right")
-                    foot_closed = not foot_closed
-            return possibility
-        def check_mora(possibility):
-            for i in range(len(possibility)):
-                if i > 0 and possibility[i].schwa == "nonmora" and possibility[i - 1].schwa != "not schwa":
-                    return None
-            return possibility
-        possibilities = [[]]
+                proxy_weights = [weight]
+        else:
+            proxy_weights = ["L"]
+        for proxy_weight in proxy_weights:
+            possibilities += [ProxySyllable(proxy_schwa, "unstressed", "none", proxy_weight)]
+            for stress in ["unstressed","primary"]:
+                possibilities += [ProxySyllable(proxy_schwa, stress, "half", proxy_weight)]
+            possibilities += [ProxySyllable(proxy_schwa, "primary", "whole", proxy_weight)]
+            if whether_schwa:
+                for foot_position in ["none","half","whole"]:
+                    possibilities += [ProxySyllable("nonmora", "unstressed", foot_position, proxy_weight)]
+        return possibilities
+    # Lists out the formats of each syllable with "half" resolved into "left" and "right", in the order of all_possibility
+    def resolved_possibilities(self):
+        options = []
         for syllable in self.syllables:
             temp = []
-            for preceding_syllables in possibilities:
-                temp += append(preceding_syllables, syllable.schwa, syllable.weight)
-            possibilities = temp
-        for i in range(len(possibilities)):
-            possibilities[i] = refresh(possibilities[i])
-        for i in range(len(possibilities)):
-            possibilities[i] = mod_half(possibilities[i])
-            if possibilities[i] != None:
-                possibilities[i] = check_mora(possibilities[i])
-        return possibilities
-    # Returns the candidates with the minimum violations of the specific kind
-    def min_vio(candidates, violation):
-        i = 0
-        while candidates[i] == None:
-            i += 1
-        min_penalty = 2 ** len(candidates[i])
-        min_index = -1
-        while i < len(candidates):
-            if candidates[i] != None:
-                penalty = Stress.penalty(candidates[i], violation)
-                if penalty < min_penalty:
-                    min_penalty = penalty
-                    min_index = i
-                elif penalty > min_penalty:
-                    candidates[i] = None
-            i += 1
-        for i in range(min_index):
-            candidates[i] = None
-        return candidates
-    # Pick out possibilities based on violations in rank
-    def op(self, print_process=False, mode="CV", max_print=100):
-        candidates = Stress.exclude_none(self.exhaust_candidates())
+            for possibility in self.all_possibility(syllable.schwa, syllable.weight):
+                if possibility.foot_position == "half":
+                    for foot_position in ["left", "right"]:
+                        temp += [ProxySyllable(possibility.schwa, possibility.stress, foot_position, possibility.weight)]
+                else:
+                    temp += [possibility]
+            options += [temp]
+        return options
+    # Returns True if current may follow previous (None at the start of the word): a foot half is to be completed by the
+    # other half, not both stressed nor both heavy, and a nonmoraic schwa is to follow a syllable with a full vowel
+    def compatible(previous, current):
+        if previous == None:
+            return current.foot_position != "right"
+        if previous.foot_position == "left":
+            if current.foot_position != "right":
+                return False
+            if (previous.stress != "unstressed") == (current.stress != "unstressed"):
+                return False
+            if previous.weight == "H" and current.weight == "H":
+                return False
+        elif current.foot_position == "right":
+            return False
+        return not (current.schwa == "nonmora" and previous.schwa != "not schwa")
+    # Yields the well-formed patterns of the word (syllables) one at a time in the order of exhaust_candidates,
+    # cutting a prefix as soon as it breaks the foot and schwa conditions instead of checking complete patterns
+    def generate_candidates(self):
+        options = self.resolved_possibilities()
+        preceding_syllables = []
+        def extend(index, previous):
+            if index == len(options):
+                if previous == None or previous.foot_position != "left":
+                    yield list(preceding_syllables)
+                return
+            for possibility in options[index]:
+                if Stress.compatible(previous, possibility):
+                    preceding_syllables.append(possibility)
+                    yield from extend(index + 1, possibility)
+                    preceding_syllables.pop()
+        return extend(0, None)
+    # Lists out all well-formed patterns of the word (syllables), read from a CandidateTrie, so that the patterns
+    # share their prefixes until listed and a prefix breaking the foot and schwa conditions is never extended
+    def exhaust_candidates(self):
+        return CandidateTrie(self).to_candidates()
+    # Returns the candidates with the minimum violations of the specific kind, in order and with all None removed
+    # The violation may also be a stratum (a list of violations), the candidates being compared by the sum of them
+    # The candidates may be a generator, so that only the ones tying for the minimum so far are kept in memory
+    # penalty, if given, is a function computing the violations of a candidate in place of Stress.penalty, and is
+    # passed the minimum so far as a bound (see CompiledGrammar.source) to give up on a candidate once it exceeds it;
+    # it may ignore the bound and return the violations in full
+    def min_vio(candidates, violation, penalty=None):
+        survivors = []
+        min_penalty = None
+        for candidate in candidates:
+            if candidate == None:
+                continue
+            if penalty == None and type(violation) == list:
+                value = sum([Stress.penalty(candidate, member) for member in violation])
+            elif penalty == None:
+                value = Stress.penalty(candidate, violation)
+            elif min_penalty == None:
+                value = penalty(candidate)
+            else:
+                value = penalty(candidate, min_penalty)
+            if min_penalty == None or value < min_penalty:
+                min_penalty = value
+                survivors = [candidate]
+            elif value == min_penalty:
+                survivors += [candidate]
+        return survivors
+    # Returns the SimplifiedRanking of the word, whose violations left out are skipped by every engine
+    def simplified(self):
+        return SimplifiedRanking.get(self)
+    # Prints the violations left out by the SimplifiedRanking of the word, if any
+    def print_simplified(self, simplified):
+        if len(simplified.removed) > 0:
+            print("Left out before evaluation:")
+            for line in simplified.report():
+                print(line)
+            print()
+    # Pick out possibilities based on violations in rank, with the ranking compiled by CompiledGrammar
+    # The violations tied in a stratum are applied in one pass, by a single function summing their violations
+    # The violations left out by the SimplifiedRanking of the word are skipped, as they cannot remove any candidate
+    # The candidates are streamed from generate_candidates through the strata skipped, until the first stratum applied
+    # keeps only its survivors; the survivors after each stratum removing candidates are kept in self.checkpoints, so
+    # that after a re-ranking (e.g. with move) the next op only applies the violations from the first changed stratum
+    # onward
+    # sink, if given, is sent an event (see trace_event) for generating the candidates and for each stratum applied,
+    # with the candidates in and out, the minimum violations and the seconds taken; without one nothing is measured
+    def op(self, print_process=False, mode="CV", max_print=100, sink=None):
+        compiled = CompiledGrammar.get(self.violations)
+        penalties = compiled.penalties(len(self.syllables))
+        simplified = self.simplified()
+        start = self.resume_point()
+        self.checkpoints = [checkpoint for checkpoint in self.checkpoints if checkpoint[0] <= start]
+        # Number of candidates generated and seconds spent generating them, counted as the first stratum applied reads them
+        streamed = {"count": 0, "seconds": 0}
+        if start == 0:
+            candidates = Stress.stream(self.generate_candidates(), streamed, sink != None or print_process)
+        else:
+            candidates = self.checkpoints[-1][1]
+            if sink != None:
+                sink.emit(self.trace_event("resume", start, None, len(candidates), len(candidates), None, 0))
         if print_process:
-            print("Initial candidates:")
-            Stress.print_candidates(candidates,max_print=max_print,mode=mode)
-        print()
-        for violation in self.violations:
-            if len(candidates) == 1:
-                break
-            if not violation.in_effect:
+            self.print_simplified(simplified)
+            if start == 0:
+                print("Initial candidates:")
+            else:
+                print("Candidates kept after ", self.violations[start - 1].name, ":", sep="")
+            # The candidates printed are read ahead and put back in front of the rest
+            shown = list(itertools.islice(candidates, max_print + 1))
+            Stress.print_candidates(shown, max_print=max_print, mode=mode)
+            candidates = itertools.chain(shown, candidates)
+            print()
+        rank = 0
+        for stratum in self.strata():
+            i = rank
+            rank += len(stratum)
+            if i < start:
+                continue
+            applied = [j for j in range(i, rank) if self.violations[j].in_effect and not j in simplified.ranks]
+            if (type(candidates) == list and len(candidates) == 1) or len(applied) == 0:
                 continue
-            candidates = Stress.min_vio(candidates, violation)
+            if len(applied) == 1:
+                violation = self.violations[applied[0]]
+                penalty = penalties[applied[0]]
+            else:
+                violation = [self.violations[j] for j in applied]
+                penalty = compiled.stratum_penalty(applied, len(self.syllables))
+            count_in = len(candidates) if type(candidates) == list else None
+            if sink == None:
+                candidates = Stress.min_vio(candidates, violation, penalty)
+            else:
+                begin = time.perf_counter()
+                candidates = Stress.min_vio(candidates, violation, penalty)
+                seconds = time.perf_counter() - begin
+                if count_in == None:
+                    seconds -= streamed["seconds"]
+                    sink.emit(self.trace_event("generate", start, None, streamed["count"], streamed["count"], None, streamed["seconds"]))
+                minimum = penalty(candidates[0]) if len(candidates) > 0 else None
+                sink.emit(self.trace_event("constraint", i, violation, streamed["count"] if count_in == None else count_in, len(candidates), minimum, seconds))
+            count = streamed["count"] if count_in == None else count_in
+            if len(candidates) < count:
+                self.checkpoints += [(rank, candidates)]
             if print_process:
-                print("Considering ", violation.name, sep="", end=": ")
-                candidates = Stress.exclude_none(candidates,True)
+                print("Considering ", Stress.violation_name(violation), sep="", end=": ")
+                print(len(candidates), "option(s) remaining;", count - len(candidates), "option(s) removed")
                 if mode != "none":
                     Stress.print_candidates(candidates, mode=mode)
                 print()
-            else:
-                candidates = Stress.exclude_none(candidates,False)
+        if type(candidates) != list:
+            candidates = list(candidates)
+            if sink != None:
+                sink.emit(self.trace_event("generate", start, None, streamed["count"], streamed["count"], None, streamed["seconds"]))
+        self.checkpoint_signature = self.checkpoint_key()
+        # Copies are classified so that the checkpoints keep the candidates as compared
+        candidates = [list(candidate) for candidate in candidates]
         for i in range(len(candidates)):
             candidates[i] = Stress.classify_stress(candidates[i])
         return candidates
-    # Returns the specific violation by syllables in the candidate in value
-    def penalty(candidate, violation):
-        match violation.name:
-            case "Trochee":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    violate = False
-                    match candidate[index].foot_position:
-                        case "none":
-                            pass
-                        case "left":
-                            if candidate[index].stress != "unstressed":
-                                if not candidate[index + 1].schwa != "nonmora" and candidate[index].weight != "H":
-                                    violate = True
-                            else:
-                                if candidate[index].schwa != "nonmora":
-                                    violate = True
-                        case "right":
-                            if candidate[index].stress != "unstressed":
-                                if candidate[index - 1].schwa != "nonmora" or candidate[index].weight != "H":
-                                    violate = True
-                        case "whole":
-                            if candidate[index].stress != "unstressed" and candidate[index].weight != "H":
-                                violate = True
-                    if violate:
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "Iamb":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    violate = False
-                    match candidate[index].foot_position:
-                        case "none":
-                            pass
-                        case "left":
-                            if candidate[index].stress != "unstressed":
-                                if candidate[index + 1].schwa != "nonmora" or candidate[index].weight != "H":
-                                    violate = True
-                        case "right":
-                            if candidate[index].stress != "unstressed":
-                                if not candidate[index - 1].schwa != "nonmora" and candidate[index].weight != "H":
-                                    violate = True
-                            else:
-                                if candidate[index].schwa != "nonmora":
-                                    violate = True
-                        case "whole":
-                            if candidate[index].stress != "unstressed" and candidate[index].weight != "H":
-                                violate = True
-                    if violate:
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "Parse":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].foot_position == "none":
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "NonFin":
-                if violation.direction == "R":
-                    fin = candidate[-1].stress
+    # Yields the candidates, adding up their number in streamed, and the seconds spent producing them if timed
+    def stream(candidates, streamed, timed=False):
+        if not timed:
+            for candidate in candidates:
+                streamed["count"] += 1
+                yield candidate
+            return
+        iterator = iter(candidates)
+        while True:
+            begin = time.perf_counter()
+            candidate = next(iterator, None)
+            streamed["seconds"] += time.perf_counter() - begin
+            if candidate == None:
+                return
+            streamed["count"] += 1
+            yield candidate
+    # Returns the event traced by an engine: the kind ("generate", "resume", "constraint" or "solve"), the word in CV,
+    # the rank, the violation with its direction (None unless a constraint; the names and directions joined by " + "
+    # for a stratum), the candidates in and out, the minimum violations and the seconds taken (None for what the
+    # engine does not know)
+    def trace_event(self, kind, rank, violation, count_in, count_out, minimum, seconds):
+        if type(violation) == list:
+            direction = " + ".join([member.direction for member in violation])
+        else:
+            direction = None if violation == None else violation.direction
+        return {
+            "event": kind,
+            "word": Stress.syllables_string(self.syllables, "CV"),
+            "rank": rank,
+            "violation": None if violation == None else Stress.violation_name(violation),
+            "direction": direction,
+            "in": count_in,
+            "out": count_out,
+            "minimum": minimum,
+            "seconds": seconds
+        }
+    # Pick out possibilities with the given engine: "op", "dp" (op_dp), "array" (op_array), "bits" (op_bits)
+    # or "trie" (op_trie), each tracing sink as it can (see op, op_dp and op_pool)
+    def op_engine(self, engine="op", print_process=False, mode="CV", max_print=100, sink=None):
+        match engine:
+            case "dp":
+                return self.op_dp(print_process=print_process, mode=mode, max_print=max_print, sink=sink)
+            case "array":
+                return self.op_array(print_process=print_process, mode=mode, max_print=max_print, sink=sink)
+            case "bits":
+                return self.op_bits(print_process=print_process, mode=mode, max_print=max_print, sink=sink)
+            case "trie":
+                return self.op_trie(print_process=print_process, mode=mode, max_print=max_print, sink=sink)
+            case _:
+                return self.op(print_process=print_process, mode=mode, max_print=max_print, sink=sink)
+    # Pick out the same optimal patterns as op by dynamic programming over syllables, in time linear to the word length
+    # The strata in rank (but the violations left out by the SimplifiedRanking) are packed into one integer, each in a
+    # field of len(syllables) + 1 bits and one more for each violation tied in it, so that comparing the integers
+    # compares the strata lexicographically; a syllable adds the weighted violations of each violation to the field of
+    # its stratum, which sums the violations tied in a stratum
+    # sink, if given, is sent a "solve" event with the optimal candidates and the seconds taken, then an event for each
+    # stratum with its field of the minimum, as no candidates are listed before the optimal ones
+    def op_dp(self, print_process=False, mode="CV", max_print=100, sink=None):
+        begin = time.perf_counter() if sink != None else None
+        length = len(self.syllables)
+        # Violations known to the registry, with the weight at each syllable shifted into the field of its rank;
+        # the ones needing the entire word are kept apart, each with a flag in the states for whether it is avoided
+        local_violations = []
+        word_violations = []
+        simplified = self.simplified()
+        if print_process:
+            self.print_simplified(simplified)
+        violations = [self.violations[rank] for rank in range(len(self.violations)) if self.violations[rank].in_effect and self.violations[rank].constraint != None and not rank in simplified.ranks]
+        strata = []
+        for violation in violations:
+            if len(strata) > 0 and strata[-1][-1].stratum == violation.stratum:
+                strata[-1] += [violation]
+            else:
+                strata += [[violation]]
+        shift = 0
+        # Shift of the field of each stratum
+        shifts = [0] * len(strata)
+        for s in reversed(range(len(strata))):
+            stratum = strata[s]
+            shifts[s] = shift
+            for violation in stratum:
+                if violation.constraint.level == "word":
+                    weights = [1 << shift for i in range(length)]
+                elif violation.direction == "L":
+                    weights = [(2 ** i) << shift for i in range(length)]
                 else:
-                    fin = candidate[0].stress
-                if fin == "unstressed":
-                    return 0
-                return 1
-            case "HD(w)":
-                for syllable in candidate:
-                    if syllable.foot_position != "none":
-                        return 0
-                return 1
-            case "Bal-Troch":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].foot_position =="right" and candidate[index].stress == "unstressed":
-                        if candidate[index - 1].weight == "H" or candidate[index].weight == "H":
-                            sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "Foot-Right":
-                if violation.direction == "R":
-                    fin = candidate[-1].foot_position
+                    weights = [(2 ** (length - 1 - i)) << shift for i in range(length)]
+                if violation.constraint.window == None:
+                    word_violations += [(violation, weights[0])]
                 else:
-                    fin = candidate[0].foot_position
-                if fin == "none":
-                    return 1
+                    local_violations += [(violation, weights)]
+            shift += length + len(stratum)
+        wraps = False
+        for violation in violations:
+            if violation.direction in violation.constraint.wraps:
+                wraps = True
+        options = self.resolved_possibilities()
+        compatible = Stress.compatible
+        # Returns the index of the first format of the first syllable that stands for the given one in the states,
+        # which only differ by stress when a violation compares the last syllable with the first one
+        def representative(first):
+            if not wraps:
                 return 0
-            case "Max(μ)" | "Max(μ) (auto)":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].weight == "L shortened":
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "*Stressed/ə":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].schwa != "not schwa" and candidate[index].stress != "unstressed" and candidate[index].weight != "H":
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "*Long-V":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].weight == "H":
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "*μ/ə":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].schwa == "mora":
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "HD(ft)":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].foot_position == "whole" and candidate[index].schwa == "nonmora":
-                        sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case "*Clash":
-                sum = 0
-                for i in range(len(candidate)):
-                    if violation.direction == "L":
-                        index = -1 - i
-                    else:
-                        index = i
-                    if candidate[index].stress != "unstressed":
-                        if (index > 0 and candidate[index - 1].stress != "unstressed") or (index + 1 < len(candidate) and candidate[index + 1].stress != "unstressed"):
-                            sum += 2 ** (len(candidate) - 1 - i)
-                return sum
-            case _:
-                print("Invalid violation type")
-                return -1
+            for i in range(len(options[0])):
+                if options[0][i].stress == options[0][first].stress:
+                    return i
+        # Returns the flags of the word violations after the syllable is added
+        def satisfy(satisfied, syllable):
+            return tuple(satisfied[i] or word_violations[i][0].constraint.satisfied_by(syllable) for i in range(len(word_violations)))
+        # Returns the weighted violations of the syllable at index given its neighbours
+        def cost(index, previous, current, following, first):
+            sum = 0
+            for violation, weights in local_violations:
+                if violation.constraint.local(violation.direction, previous, current, following, first):
+                    sum += weights[index]
+            return sum
+        # Returns the minimum violations from index onward, or None if the pattern cannot be completed
+        best = {}
+        def rest(index, previous, current, satisfied, first):
+            key = (index, previous, current, satisfied, first)
+            if key in best:
+                return best[key]
+            syllable_previous = None if previous == None else options[index - 1][previous]
+            syllable_current = options[index][current]
+            syllable_first = options[0][first]
+            if index == length - 1:
+                if syllable_current.foot_position == "left":
+                    result = None
+                else:
+                    result = cost(index, syllable_previous, syllable_current, None, syllable_first)
+                    for i in range(len(word_violations)):
+                        if not satisfied[i]:
+                            result += word_violations[i][1]
+            else:
+                result = None
+                for following in range(len(options[index + 1])):
+                    syllable_following = options[index + 1][following]
+                    if not compatible(syllable_current, syllable_following):
+                        continue
+                    remaining = rest(index + 1, current, following, satisfy(satisfied, syllable_following), first)
+                    if remaining == None:
+                        continue
+                    value = cost(index, syllable_previous, syllable_current, syllable_following, syllable_first) + remaining
+                    if result == None or value < result:
+                        result = value
+            best[key] = result
+            return result
+        # Collects every pattern reaching the minimum in the order of exhaust_candidates
+        candidates = []
+        def collect(index, previous, current, satisfied, first, preceding_syllables, target):
+            syllable_current = options[index][current]
+            preceding_syllables = preceding_syllables + [syllable_current]
+            if index == length - 1:
+                candidates.append(list(preceding_syllables))
+                return
+            syllable_previous = None if previous == None else options[index - 1][previous]
+            for following in range(len(options[index + 1])):
+                syllable_following = options[index + 1][following]
+                if not compatible(syllable_current, syllable_following):
+                    continue
+                next_satisfied = satisfy(satisfied, syllable_following)
+                remaining = rest(index + 1, current, following, next_satisfied, first)
+                if remaining == None:
+                    continue
+                if cost(index, syllable_previous, syllable_current, syllable_following, options[0][first]) + remaining == target:
+                    collect(index + 1, current, following, next_satisfied, first, preceding_syllables, remaining)
+        if length == 0:
+            if sink != None:
+                sink.emit(self.trace_event("solve", 0, None, None, 1, None, time.perf_counter() - begin))
+            return [[]]
+        minimum = None
+        starts = []
+        for current in range(len(options[0])):
+            if not compatible(None, options[0][current]):
+                continue
+            total = rest(0, None, current, satisfy((False,) * len(word_violations), options[0][current]), representative(current))
+            if total == None:
+                continue
+            starts += [(current, total)]
+            if minimum == None or total < minimum:
+                minimum = total
+        for current, total in starts:
+            if total == minimum:
+                collect(0, None, current, satisfy((False,) * len(word_violations), options[0][current]), representative(current), [], total)
+        if sink != None:
+            sink.emit(self.trace_event("solve", 0, None, None, len(candidates), None, time.perf_counter() - begin))
+            # Rank of the first violation of each stratum, as in the events of op
+            stratum_ranks = {}
+            for rank in range(len(self.violations)):
+                stratum_ranks.setdefault(self.violations[rank].stratum, rank)
+            for s in range(len(strata)):
+                field = (minimum >> shifts[s]) & ((1 << (length + len(strata[s]))) - 1)
+                violation = strata[s][0] if len(strata[s]) == 1 else strata[s]
+                sink.emit(self.trace_event("constraint", stratum_ranks[strata[s][0].stratum], violation, None, None, field, None))
+        if print_process:
+            print("Optimal candidates:")
+            Stress.print_candidates(candidates, max_print=max_print, mode=mode)
+            print()
+        for i in range(len(candidates)):
+            candidates[i] = Stress.classify_stress(candidates[i])
+        return candidates
+    # Pick out the same optimal patterns as op with the candidates held in a CandidateArray (requires numpy)
+    def op_array(self, print_process=False, mode="CV", max_print=100, sink=None):
+        return self.op_pool(CandidateArray, print_process=print_process, mode=mode, max_print=max_print, sink=sink)
+    # Pick out the same optimal patterns as op with the candidates held in a CandidateBits, without numpy
+    def op_bits(self, print_process=False, mode="CV", max_print=100, sink=None):
+        return self.op_pool(CandidateBits, print_process=print_process, mode=mode, max_print=max_print, sink=sink)
+    # Pick out the same optimal patterns as op with the candidates held in a CandidateTrie
+    def op_trie(self, print_process=False, mode="CV", max_print=100, sink=None):
+        return self.op_pool(CandidateTrie, print_process=print_process, mode=mode, max_print=max_print, sink=sink)
+    # Pick out possibilities from a pool of the word (CandidateArray, CandidateBits or CandidateTrie, the class given)
+    # based on violations in rank, the violations tied in a stratum being applied together
+    # The candidates remaining are counted with remaining, as a trie of a long word holds more than len can give back
+    # sink, if given, is traced as in op, building the pool being the "generate" event; the pools only keep the
+    # candidates reaching the minimum, so the minimum is None
+    def op_pool(self, kind, print_process=False, mode="CV", max_print=100, sink=None):
+        if sink == None:
+            pool = kind(self)
+        else:
+            begin = time.perf_counter()
+            pool = kind(self)
+            sink.emit(self.trace_event("generate", 0, None, pool.remaining(), pool.remaining(), None, time.perf_counter() - begin))
+        simplified = self.simplified()
+        if print_process:
+            self.print_simplified(simplified)
+            print("Initial candidates:", pool.remaining(), "option(s)")
+        rank = 0
+        for stratum in self.strata():
+            applied = [stratum[i] for i in range(len(stratum)) if stratum[i].in_effect and not rank + i in simplified.ranks]
+            rank += len(stratum)
+            if pool.remaining() == 1:
+                break
+            if len(applied) == 0:
+                continue
+            violation = applied[0] if len(applied) == 1 else applied
+            count = pool.remaining()
+            if sink == None:
+                pool.min_vio(violation)
+            else:
+                begin = time.perf_counter()
+                pool.min_vio(violation)
+                sink.emit(self.trace_event("constraint", rank - len(stratum), violation, count, pool.remaining(), None, time.perf_counter() - begin))
+            if print_process:
+                print("Considering ", Stress.violation_name(violation), ": ", pool.remaining(), " option(s) remaining; ", count - pool.remaining(), " option(s) removed", sep="")
+        candidates = pool.to_candidates()
+        if print_process:
+            print()
+            Stress.print_candidates(candidates, max_print=max_print, mode=mode)
+        for i in range(len(candidates)):
+            candidates[i] = Stress.classify_stress(candidates[i])
+        return candidates
+    # Returns the specific violation by syllables in the candidate in value
+    def penalty(candidate, violation):
+        if violation.constraint == None:
+            print("Invalid violation type")
+            return -1
+        return violation.constraint.evaluate(candidate, violation.direction)
+    # Returns the name of the violation, or the names of a stratum (a list of violations) joined by " + "
+    def violation_name(violation):
+        if type(violation) == list:
+            return " + ".join([member.name for member in violation])
+        return violation.name
     # Prints out the first up to max_print candidates
     def print_candidates(candidates, max_print=100, mode="CV"):
         count = 0
@@ -508,29 +1480,39 @@ class Stress:
                     break
                 print(count, ". ", sep="", end="")
                 Stress.print_syllables(candidate, mode)
-    # Prints out the word (syllables) in the pattern represented through proxy syllables
-    def print_mod_syllables(self, proxy_syllables):
+    # Returns copies of the word (syllables) in the pattern represented through proxy syllables
+    def mod_syllables(self, proxy_syllables):
         temp = []
         for i in range(len(self.syllables)):
             temp += [self.syllables[i].copy()]
             temp[i].apply(proxy_syllables[i])
-        return Stress.print_syllables(temp)
+        return temp
+    # Prints out the word (syllables) in the pattern represented through proxy syllables
+    def print_mod_syllables(self, proxy_syllables):
+        return Stress.print_syllables(self.mod_syllables(proxy_syllables))
     # Prints out the given syllables
     def print_syllables(syllables, mode="original"):
+        word = Stress.syllables_string(syllables, mode)
+        print(word)
+        return word
+    # Returns the given syllables as a string in the format of print_syllables
+    def syllables_string(syllables, mode="original"):
         word = ""
         for syllable in syllables:
+            # Syllables and proxy syllables share their format as a ProxySyllable state
+            state = syllable.state
             if mode == "weight":
-                if syllable.weight == "H":
+                if state.weight == "H":
                     string = "H"
                 else:
                     string = "L"
-                if syllable.stress == "primary":
+                if state.stress == "primary":
                     string = "ˈ" + string
-                elif syllable.stress == "secondary":
+                elif state.stress == "secondary":
                     string = "ˌ" + string
             else:
                 string = str(syllable)
-            match syllable.foot_position:
+            match state.foot_position:
                 case "none":
                     pass
                 case "left":
@@ -542,8 +1524,6 @@ class Stress:
             if type(syllable) == ProxySyllable and mode != "weight":            
                 string += " "
             word += string
-            print(string,end="")
-        print()
         return word
     # Takes aspects to ignore in the process: weight, shortening
     def take_not_considering(self):
@@ -559,14 +1539,15 @@ class Stress:
             print("Current list of aspects to ignore:", self.not_considering)
     # Takes violation rule inputs
     def take_violations(self):
-        print("Enter violation rules in the format of \"name, direction(L/R)\"; end the input with \"end\"")
+        print("Enter violation rules in the format of \"name, direction(L/R)\", adding \", tied\" to tie a rule with the one before; end the input with \"end\"")
         while True:
             string = input()
             if string == "end":
                 break
             try:
                 sep = string.split(", ")
-                self.add(sep[0], sep[1])
+                assert len(sep) < 3 or sep[2] == "tied"
+                self.add(sep[0], sep[1], tied=len(sep) > 2)
             except:
                 print("Input not accepted")
     # Takes weight inputs to specify for each syllable before computing
@@ -581,8 +1562,952 @@ class Stress:
                 break
             except:
                 print("Input not accepted")
+# Class of least-recently-used caches of optimal patterns by the shape of the word, as the result of op depends only
+# on the number of syllables, which of them have schwa, their weights, the aspects ignored and the ranking
+class SolverCache:
+    # Constructor, keeping at most max_size shapes
+    def __init__(self, max_size=1024):
+        self.max_size = max_size
+        self.patterns = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    # Returns the number of shapes kept
+    def __len__(self):
+        return len(self.patterns)
+    # Returns the shape signature of the word in stress
+    def signature(stress):
+        consider_weight = not "weight" in stress.not_considering
+        shape = tuple([(syllable.schwa, syllable.weight if consider_weight else "L") for syllable in stress.syllables])
+        ranking = tuple([(violation.name, violation.direction, violation.in_effect, violation.stratum) for violation in stress.violations])
+        return (shape, tuple(sorted(stress.not_considering)), ranking)
+    # Returns the optimal patterns of the word in stress as op does, solving with the engine only for a new shape
+    # Apply a pattern to the word itself with Stress.mod_syllables or Stress.print_mod_syllables
+    # sink is traced as in Stress.op, only for the shapes solved
+    def op(self, stress, engine="op", sink=None):
+        candidates = self.lookup(stress)
+        if candidates == None:
+            candidates = stress.op_engine(engine=engine, sink=sink)
+            self.store(stress, candidates)
+            candidates = [list(candidate) for candidate in candidates]
+        return candidates
+    # Returns the optimal patterns kept for the shape of the word in stress as op does, or None if the shape is not kept
+    def lookup(self, stress):
+        key = SolverCache.signature(stress)
+        if not key in self.patterns:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.patterns.move_to_end(key)
+        return [list(candidate) for candidate in self.patterns[key]]
+    # Returns the optimal patterns kept for the shape of the word in stress as lookup does, or None, without counting
+    # a hit or miss nor marking the shape as used
+    def peek(self, stress):
+        candidates = self.patterns.get(SolverCache.signature(stress))
+        if candidates == None:
+            return None
+        return [list(candidate) for candidate in candidates]
+    # Keeps the optimal patterns of the shape of the word in stress, forgetting the least recently used shape if full
+    def store(self, stress, candidates):
+        key = SolverCache.signature(stress)
+        self.patterns[key] = candidates
+        self.patterns.move_to_end(key)
+        if len(self.patterns) > self.max_size:
+            self.patterns.popitem(last=False)
+    # Returns the proportion of lookups answered from the cache
+    def hit_rate(self):
+        if self.hits + self.misses == 0:
+            return 0
+        return self.hits / (self.hits + self.misses)
+    # Empties the cache and resets the counters
+    def clear(self):
+        self.patterns.clear()
+        self.hits = 0
+        self.misses = 0
+# Class of least-recently-used caches of syllabified words, so that a word repeated in running text is syllabified once:
+# the (onset, nucleus, coda) parts of its syllables are kept as one shared tuple, which cannot be modified, and each
+# call builds new Syllable objects from it
+class SyllableCache:
+    # Constructor, keeping at most max_size words
+    def __init__(self, max_size=65536):
+        self.max_size = max_size
+        self.words = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+    # Returns the number of words kept
+    def __len__(self):
+        return len(self.words)
+    # Returns the shared tuple of the (onset, nucleus, coda) parts of each syllable of the word
+    def parts(self, word):
+        if word in self.words:
+            self.hits += 1
+            self.words.move_to_end(word)
+            return self.words[word]
+        self.misses += 1
+        parts = tuple(Character.syllabify(word))
+        self.words[word] = parts
+        if len(self.words) > self.max_size:
+            self.words.popitem(last=False)
+        return parts
+    # Returns the syllables of the word as Syllable.to_syllable_array does
+    def to_syllable_array(self, word):
+        return [Syllable(onset, nucleus, coda, i + 1) for i, (onset, nucleus, coda) in enumerate(self.parts(word))]
+    # Returns the proportion of lookups answered from the cache
+    def hit_rate(self):
+        if self.hits + self.misses == 0:
+            return 0
+        return self.hits / (self.hits + self.misses)
+    # Empties the cache and resets the counters
+    def clear(self):
+        self.words.clear()
+        self.hits = 0
+        self.misses = 0
+# Class of grammars: a ranking and the aspects to ignore, set up once (constraints looked up, penalty functions compiled)
+# and then used to evaluate any number of words, from any number of threads
+# Unlike Stress, which also holds the word, nothing in a grammar changes once constructed except its cache
+class Grammar:
+    # Constructor, with violations in rank as (name, direction) pairs or strata of them (see Stress.set_violations),
+    # raising ValueError as Stress.add does;
+    # Max(μ), R is added as in parse if auto_max, and cache_size shapes and syllable_cache_size syllabified words are
+    # kept (0 for no cache); sink, if given, is traced as in Stress.op
+    def __init__(self, violations, not_considering=[], engine="op", cache_size=1024, auto_max=True, syllable_cache_size=65536, sink=None):
+        stress = Stress([])
+        stress.not_considering = list(not_considering)
+        stress.set_violations(violations)
+        if auto_max:
+            stress.add_auto_max()
+        self.violations = tuple(stress.violations)
+        self.ranking = tuple([(violation.name, violation.direction) for violation in self.violations])
+        self.not_considering = tuple(not_considering)
+        self.engine = engine
+        self.compiled = CompiledGrammar.get(self.violations)
+        self.cache = SolverCache(max_size=cache_size) if cache_size > 0 else None
+        self.syllable_cache = SyllableCache(max_size=syllable_cache_size) if syllable_cache_size > 0 else None
+        self.lock = threading.Lock()
+        self.sink = sink
+    # Leaves the lock, the compiled ranking, the caches and the sink out of the copies sent to other processes (e.g.
+    # within a Lexicon)
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["lock"]
+        del state["compiled"]
+        state["cache"] = SolverCache(max_size=self.cache.max_size) if self.cache != None else None
+        state["syllable_cache"] = SyllableCache(max_size=self.syllable_cache.max_size) if self.syllable_cache != None else None
+        state["sink"] = None
+        return state
+    # Restores a copy, with a lock of its own and the ranking compiled in the process
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.lock = threading.Lock()
+        self.compiled = CompiledGrammar.get(self.violations)
+    # Returns the stress object of the word (string or list of syllables) under the grammar, with the weights
+    # (string of L/H) if given; Lexicon, Typology and Learner build their words through it as well
+    def stress(self, word, weights=None):
+        if type(word) == str:
+            if self.syllable_cache == None:
+                syllables = Syllable.to_syllable_array(word)
+            else:
+                with self.lock:
+                    syllables = self.syllable_cache.to_syllable_array(word)
+        else:
+            syllables = [syllable.copy() for syllable in word]
+        stress = Stress(syllables)
+        stress.violations = list(self.violations)
+        stress.not_considering = list(self.not_considering)
+        if weights != None and not "weight" in self.not_considering:
+            if len(weights) != len(syllables):
+                raise ValueError("Weights " + str(weights) + " do not match the syllables of the word")
+            for i in range(len(weights)):
+                syllables[i].mod_weight(weights[i])
+        return stress
+    # Returns the optimal patterns of the word in stress as in Stress.op, through the cache if there is one
+    # Only the cache is locked, so that words of new shapes are solved by several threads at once (a shape missed by
+    # two threads at once is solved by both)
+    def solve(self, stress):
+        if self.cache == None:
+            return stress.op_engine(engine=self.engine, sink=self.sink)
+        with self.lock:
+            candidates = self.cache.lookup(stress)
+        if candidates != None:
+            return candidates
+        candidates = stress.op_engine(engine=self.engine, sink=self.sink)
+        with self.lock:
+            self.cache.store(stress, candidates)
+        return [list(candidate) for candidate in candidates]
+    # Returns the optimal patterns of the word as proxy syllables
+    def patterns(self, word, weights=None):
+        return self.solve(self.stress(word, weights))
+    # Returns the optimal patterns of the word as lists of its syllables with each pattern applied
+    def evaluate(self, word, weights=None):
+        stress = self.stress(word, weights)
+        return [stress.mod_syllables(candidate) for candidate in self.solve(stress)]
+# Class of lexicons of words evaluated under one ranking, in chunks spread over a pool of processes
+class Lexicon:
+    caches = {} # Cache size -> SolverCache of the current process, created on first use
+    syllable_caches = {} # Cache size -> SyllableCache of the current process, created on first use
+    # Constructor, with violations in rank as (name, direction) pairs or strata of them (see Stress.set_violations),
+    # raising ValueError as Stress.add does; Max(μ), R is added as in parse
+    # sink, if given, is traced as in Stress.op for the words evaluated in the current process only
+    def __init__(self, violations, not_considering=[], engine="op", cache_size=1024, syllable_cache_size=65536, sink=None):
+        self.violations = list(violations)
+        self.not_considering = list(not_considering)
+        # Grammar building the words under the ranking, without caches of its own
+        self.grammar = Grammar(self.violations, self.not_considering, engine=engine, cache_size=0, syllable_cache_size=0)
+        self.engine = engine
+        self.cache_size = cache_size
+        self.syllable_cache_size = syllable_cache_size
+        self.sink = sink
+        # Shape -> Stress object keeping the survivors of op for that shape, used by rerank, for at most cache_size
+        # shapes, the least recently used first; only kept with the "op" engine, the others keeping no survivors
+        self.states = OrderedDict()
+    # Leaves the kept survivors and the sink out of the copies sent to the processes
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["states"] = OrderedDict()
+        state["sink"] = None
+        return state
+    # Returns the stress object of the syllables under the ranking, with the weights (string of L/H) if given
+    def stress(self, syllables, weights):
+        return self.grammar.stress(syllables, weights)
+    # Returns the syllables of the word through the SyllableCache of the current process for the size of the lexicon
+    def syllables(self, word):
+        if not self.syllable_cache_size in Lexicon.syllable_caches:
+            Lexicon.syllable_caches[self.syllable_cache_size] = SyllableCache(max_size=self.syllable_cache_size)
+        return Lexicon.syllable_caches[self.syllable_cache_size].to_syllable_array(word)
+    # Returns the optimal patterns of a word as lists of its syllables with each pattern applied, through the
+    # SolverCache of the current process for the size of the lexicon (shared by the lexicons of that size, as a shape
+    # is kept along with its ranking)
+    def evaluate_word(self, word, weights=None):
+        stress = self.stress(self.syllables(word), weights)
+        if not self.cache_size in Lexicon.caches:
+            Lexicon.caches[self.cache_size] = SolverCache(max_size=self.cache_size)
+        return [stress.mod_syllables(candidate) for candidate in Lexicon.caches[self.cache_size].op(stress, engine=self.engine, sink=self.sink)]
+    # Evaluates a chunk of (word, weights) pairs in the current process
+    def evaluate_chunk(self, chunk):
+        return [self.evaluate_word(word, weights) for word, weights in chunk]
+    # Yields the (word, weights) pairs of the words and the weights (None for no weights at all) as they are read,
+    # raising ValueError as soon as one of them runs out before the other
+    def pairs(words, weights):
+        if weights == None:
+            for word in words:
+                yield word, None
+            return
+        missing = object()
+        for word, word_weights in itertools.zip_longest(words, weights, fillvalue=missing):
+            if word is missing or word_weights is missing:
+                raise ValueError("Weights do not match the words: there are not as many weights as words")
+            yield word, word_weights
+    # Returns the optimal patterns of each word (see evaluate_word) in the order of the words
+    # weights is an iterable of L/H strings (or None) aligned with the words (ValueError if there are not as many),
+    # or None for no weights at all
+    # workers is the number of processes (None for the number of processors, 1 for the current process only),
+    # and each process is given chunk_size words at a time; at most two chunks for each process are read ahead of the
+    # results, so that words from a generator are read as they are evaluated
+    def evaluate(self, words, weights=None, workers=None, chunk_size=64):
+        pairs = Lexicon.pairs(words, weights)
+        chunks = iter(lambda: list(itertools.islice(pairs, chunk_size)), [])
+        results = []
+        if workers == 1:
+            for chunk in chunks:
+                results += self.evaluate_chunk(chunk)
+            return results
+        from concurrent.futures import ProcessPoolExecutor
+        window = 2 * (workers if workers != None else os.cpu_count() or 1)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = [executor.submit(self.evaluate_chunk, chunk) for chunk in itertools.islice(chunks, window)]
+            while len(pending) > 0:
+                results += pending.pop(0).result()
+                for chunk in itertools.islice(chunks, 1):
+                    pending += [executor.submit(self.evaluate_chunk, chunk)]
+        return results
+    # Returns the optimal patterns of the shape of the word in stress under the current ranking with the engine of the
+    # lexicon, through the Stress object kept for the shape (stress itself if none is); with "op", it only applies the
+    # violations from the first rank changed since its last op
+    def solve(self, stress):
+        key = stress.checkpoint_key()[0]
+        if key in self.states:
+            self.states.move_to_end(key)
+        elif self.cache_size > 0 and self.engine == "op":
+            self.states[key] = stress
+            if len(self.states) > self.cache_size:
+                self.states.popitem(last=False)
+        state = self.states.get(key, stress)
+        state.violations = list(self.grammar.violations)
+        return state.op_engine(engine=self.engine, sink=self.sink)
+    # Changes the ranking to violations (as in the constructor) and returns the optimal patterns of each word as
+    # evaluate does, along with the list of words whose optimal patterns are not the same as under the former ranking
+    # Evaluation runs in the current process; the survivors of each shape are kept for the following calls
+    # The former patterns of a shape without kept survivors are taken from the SolverCache of the current process if
+    # evaluate left them there (workers=1), and only solved under the former ranking otherwise (e.g. after evaluate
+    # over a pool of processes), as evaluate keeps no survivors
+    def rerank(self, violations, words, weights=None):
+        grammar = Grammar(violations, self.not_considering, engine=self.engine, cache_size=0, syllable_cache_size=0)
+        pairs = list(Lexicon.pairs(words, weights))
+        stresses = [self.stress(self.syllables(word), word_weights) for word, word_weights in pairs]
+        keys = [stress.checkpoint_key()[0] for stress in stresses]
+        cache = Lexicon.caches.get(self.cache_size)
+        before = {}
+        for i in range(len(stresses)):
+            if not keys[i] in before:
+                candidates = None
+                if not keys[i] in self.states and cache != None:
+                    candidates = cache.peek(stresses[i])
+                before[keys[i]] = candidates if candidates != None else self.solve(stresses[i])
+        self.violations = list(violations)
+        self.grammar = grammar
+        after = {}
+        for i in range(len(stresses)):
+            if not keys[i] in after:
+                after[keys[i]] = self.solve(stresses[i])
+        results = []
+        changed = []
+        for i in range(len(stresses)):
+            results += [[stresses[i].mod_syllables(candidate) for candidate in after[keys[i]]]]
+            old = [Stress.syllables_string(candidate) for candidate in before[keys[i]]]
+            new = [Stress.syllables_string(candidate) for candidate in after[keys[i]]]
+            if old != new:
+                changed += [pairs[i][0]]
+        return results, changed
+# Class of factorial typologies: the languages (optimal patterns of every input shape) produced by every ranking of a
+# set of violations, found by walking a trie of rankings in which rankings sharing a prefix share its survivors
+class Typology:
+    # Constructor, with violations as (name, direction) pairs and shapes as (word, weights) pairs, e.g. ("cacəca", "LLH")
+    # If auto_max, Max(μ), R is added below every ranking as in parse, without being ranked itself
+    def __init__(self, violations, shapes, not_considering=[], auto_max=True):
+        self.violations = list(violations)
+        self.shapes = list(shapes)
+        self.not_considering = list(not_considering)
+        self.auto_max = auto_max
+        # Grammar building the shapes under the violations in the order given, without caches
+        self.grammar = Grammar(self.violations, self.not_considering, auto_max=auto_max, cache_size=0, syllable_cache_size=0)
+        # Language (tuple of the optimal patterns of each shape) -> list of (prefix, rest) pairs, each standing for the
+        # rankings starting with the prefix followed by the violations in rest in any order
+        self.languages = {}
+    # Computes the languages and returns them as in self.languages
+    def run(self):
+        stresses = [self.grammar.stress(word, weights) for word, weights in self.shapes]
+        candidates = [list(stress.generate_candidates()) for stress in stresses]
+        # Violations of each candidate of each shape, by the compiled grammar of the violations in the given order
+        values = []
+        for i in range(len(stresses)):
+            penalties = CompiledGrammar.get(stresses[i].violations).penalties(len(stresses[i].syllables))
+            values += [[[penalty(candidate) for candidate in candidates[i]] for penalty in penalties]]
+        # Returns the optimal patterns of a shape as a tuple of strings, given the indices of the survivors under the
+        # violations ranked, after the violations added below them (Max(μ) (auto)) have been applied as well
+        patterns = {}
+        def pattern(shape, survivors):
+            if not (shape, survivors) in patterns:
+                kept = survivors
+                for rank in range(len(self.violations), len(values[shape])):
+                    table = values[shape][rank]
+                    kept = Stress.min_vio(kept, None, lambda index, bound=math.inf: table[index])
+                strings = []
+                for index in kept:
+                    candidate = Stress.classify_stress(list(candidates[shape][index]))
+                    strings += [Stress.syllables_string(stresses[shape].mod_syllables(candidate))]
+                patterns[(shape, survivors)] = tuple(strings)
+            return patterns[(shape, survivors)]
+        # Returns the (language, suffix, rest) leaves below the node of the remaining violations (indices) and the
+        # survivors (indices of candidates) of each shape; nodes with the same ones are visited once
+        visited = {}
+        def explore(remaining, survivors):
+            key = (remaining, survivors)
+            if key in visited:
+                return visited[key]
+            if len(remaining) == 0 or all([len(shape_survivors) <= 1 for shape_survivors in survivors]):
+                language = tuple([pattern(shape, survivors[shape]) for shape in range(len(survivors))])
+                result = [(language, (), remaining)]
+            else:
+                result = []
+                for rank in sorted(remaining):
+                    next_survivors = []
+                    for shape in range(len(survivors)):
+                        if len(survivors[shape]) <= 1:
+                            next_survivors += [survivors[shape]]
+                        else:
+                            table = values[shape][rank]
+                            next_survivors += [tuple(Stress.min_vio(survivors[shape], None, lambda index, bound=math.inf: table[index]))]
+                    for language, suffix, rest in explore(remaining - frozenset([rank]), tuple(next_survivors)):
+                        result += [(language, (rank,) + suffix, rest)]
+            visited[key] = result
+            return result
+        root = tuple([tuple(range(len(shape_candidates))) for shape_candidates in candidates])
+        self.languages = {}
+        for language, prefix, rest in explore(frozenset(range(len(self.violations))), root):
+            if not language in self.languages:
+                self.languages[language] = []
+            self.languages[language] += [(tuple([self.violations[i] for i in prefix]), tuple([self.violations[i] for i in sorted(rest)]))]
+        return self.languages
+    # Yields every full ranking producing the language
+    def rankings(self, language):
+        for prefix, rest in self.languages[language]:
+            for order in itertools.permutations(rest):
+                yield prefix + order
+    # Returns the number of full rankings producing the language
+    def count(self, language):
+        total = 0
+        for prefix, rest in self.languages[language]:
+            orders = 1
+            for i in range(2, len(rest) + 1):
+                orders *= i
+            total += orders
+        return total
+# Class of learners of stratified rankings from attested patterns by Recursive Constraint Demotion; each datum is
+# compared with every other candidate of its word into an ERC (elementary ranking condition), which only depends on
+# the shape of the word and the winner, so that data of the same shape and pattern are compared once
+class Learner:
+    # Constructor, with violations to rank as (name, direction) pairs
+    def __init__(self, violations, not_considering=[]):
+        self.violations = list(violations)
+        self.not_considering = list(not_considering)
+        # Grammar building the data under the violations in the order given, without Max(μ) (auto) nor caches
+        self.grammar = Grammar(self.violations, self.not_considering, auto_max=False, cache_size=0, syllable_cache_size=0)
+        # Shape -> (violations of each candidate as a tuple in the order of self.violations, index of each candidate
+        # by its format, formats found at each syllable), a format being the (schwa, stress, foot_position, weight)
+        # of a classified syllable
+        self.shapes = {}
+        # Set of ERCs, each a tuple of "W" (preferring the winner), "L" (preferring the loser) or "e" for each violation
+        self.ercs = set()
+        # Set of (shape, index of the winner) already compared
+        self.winners = set()
+        # ERCs left unexplained by the last learn, empty if the data are consistent
+        self.conflicts = []
+    # Returns the format of the syllable as kept in self.shapes
+    def format(syllable):
+        return (syllable.schwa, syllable.stress, syllable.foot_position, syllable.weight)
+    # Adds the datum of the word with weights (string of L/H, or None) and the attested pattern, written as parse
+    # prints the parsed word, e.g. "ca(c^əˈca:)ca"; raises ValueError if the pattern is not a candidate of the word
+    def add(self, word, weights, attested):
+        stress = self.grammar.stress(word, weights)
+        key = stress.checkpoint_key()[0]
+        if not key in self.shapes:
+            penalties = CompiledGrammar.get(stress.violations).penalties(len(stress.syllables))
+            profiles = []
+            index = {}
+            formats = [[] for syllable in stress.syllables]
+            for candidate in stress.generate_candidates():
+                profiles += [tuple([penalty(candidate) for penalty in penalties])]
+                candidate = Stress.classify_stress(candidate)
+                index[tuple([Learner.format(syllable) for syllable in candidate])] = len(profiles) - 1
+                for i in range(len(candidate)):
+                    if not Learner.format(candidate[i]) in formats[i]:
+                        formats[i] += [Learner.format(candidate[i])]
+            self.shapes[key] = (profiles, index, formats)
+        profiles, index, formats = self.shapes[key]
+        # Matches the attested pattern one syllable at a time against the formats found at each syllable
+        def match(i, position, chosen):
+            if i == len(formats):
+                if position == len(attested) and tuple(chosen) in index:
+                    return index[tuple(chosen)]
+                return None
+            for format in formats[i]:
+                syllable = stress.syllables[i].copy()
+                syllable.apply(ProxySyllable(*format))
+                string = Stress.syllables_string([syllable])
+                if attested.startswith(string, position):
+                    result = match(i + 1, position + len(string), chosen + [format])
+                    if result != None:
+                        return result
+            return None
+        winner = match(0, 0, [])
+        if winner == None:
+            raise ValueError("Attested pattern " + str(attested) + " is not a candidate of " + str(word))
+        if (key, winner) in self.winners:
+            return
+        self.winners.add((key, winner))
+        # Losers with the same violations give the same ERC
+        for loser in set(profiles):
+            erc = []
+            for i in range(len(self.violations)):
+                if profiles[winner][i] < loser[i]:
+                    erc += ["W"]
+                elif profiles[winner][i] > loser[i]:
+                    erc += ["L"]
+                else:
+                    erc += ["e"]
+            # A loser with the same violations as the winner ties with it under every ranking
+            if erc.count("e") < len(erc):
+                self.ercs.add(tuple(erc))
+    # Returns the stratified ranking (list of strata, each a list of (name, direction) pairs, highest first) consistent
+    # with the data added, or None if there is none, with the ERCs left unexplained kept in self.conflicts
+    def learn(self):
+        remaining = list(range(len(self.violations)))
+        ercs = list(self.ercs)
+        strata = []
+        while len(remaining) > 0:
+            stratum = [i for i in remaining if not any([erc[i] == "L" for erc in ercs])]
+            if len(stratum) == 0:
+                self.conflicts = ercs
+                return None
+            strata += [[self.violations[i] for i in stratum]]
+            remaining = [i for i in remaining if not i in stratum]
+            ercs = [erc for erc in ercs if not any([erc[i] == "W" for i in stratum])]
+        self.conflicts = []
+        return strata
+# Class of candidate pools stored as byte matrices (one row per candidate, one column per syllable) for evaluating
+# violations on all candidates at once; requires numpy
+# Each byte holds the codes of the format of the syllable (see code), so that a feature of every syllable of every
+# candidate is read with a few bitwise operations; only the candidates remaining are kept, so that each violation is
+# evaluated on the survivors of the ones above it
+class CandidateArray:
+    # Small-integer codes of the fields of a format, each below 4 once "half" is resolved
+    schwa_codes = {"not schwa": 0, "mora": 1, "nonmora": 2}
+    stress_codes = {"unstressed": 0, "primary": 1, "secondary": 2}
+    foot_position_codes = {"none": 0, "left": 1, "right": 2, "whole": 3}
+    weight_codes = {"L": 0, "H": 1, "L shortened": 2}
+    # Feature matrices (in the codes above) and masks used by the vectorized constraints: name -> function of the byte
+    # matrix, computed for the remaining candidates when first used
+    features = {
+        "foot_position": lambda choices: choices & 3,
+        "stress": lambda choices: (choices >> 2) & 3,
+        "schwa": lambda choices: (choices >> 4) & 3,
+        "weight": lambda choices: choices >> 6,
+        "stressed": lambda choices: (choices & 12) != 0,
+        "left": lambda choices: (choices & 3) == 1,
+        "right": lambda choices: (choices & 3) == 2,
+        "whole": lambda choices: (choices & 3) == 3,
+        "heavy": lambda choices: (choices >> 6) == 1,
+        "nonmora": lambda choices: (choices & 48) == 32
+    }
+    # Constructor, building the pool of well-formed patterns of the word in stress in the order of exhaust_candidates
+    def __init__(self, stress):
+        global numpy
+        if numpy == None:
+            try:
+                import numpy
+            except ImportError:
+                raise ImportError("CandidateArray requires numpy")
+        self.options = stress.resolved_possibilities()
+        self.length = len(self.options)
+        # The prefixes are extended one syllable at a time in the order of exhaust_candidates, keeping the index of the
+        # format of each; a prefix ending in format p is followed by the formats compatible with p (Stress.compatible),
+        # listed one after another in a flat table so that the formats of every extension are read in one lookup
+        formats = []
+        ends = []
+        for i in range(self.length):
+            if i == 0:
+                formats += [numpy.array([k for k in range(len(self.options[0])) if Stress.compatible(None, self.options[0][k])], dtype=numpy.int16)]
+                ends += [None]
+                continue
+            allowed = [[k for k in range(len(self.options[i])) if Stress.compatible(previous, self.options[i][k])] for previous in self.options[i - 1]]
+            flat = numpy.array([k for following in allowed for k in following], dtype=numpy.int16)
+            counts = numpy.array([len(following) for following in allowed], dtype=numpy.intp)
+            offsets = numpy.cumsum(counts) - counts
+            repeat = counts[formats[-1]]
+            # The extensions of each prefix follow one another, ending at ends[i] for the prefixes in order
+            ends += [numpy.cumsum(repeat)]
+            formats += [flat[numpy.arange(ends[-1][-1] if len(repeat) > 0 else 0) - numpy.repeat(ends[-1] - repeat - offsets[formats[-1]], repeat)]]
+        # The complete patterns, leaving out the ones ending in an open foot, are filled in as bytes from the last
+        # syllable: as the extensions of a prefix follow one another, the format of a prefix is repeated once for each
+        # complete pattern it leads to
+        self.formats = {}
+        for options in self.options:
+            for option in options:
+                self.formats[CandidateArray.code(option)] = option
+        if self.length > 0:
+            not_left = numpy.array([option.foot_position != "left" for option in self.options[-1]])
+            patterns = not_left[formats[-1]].astype(numpy.intp)
+            self.choices = numpy.empty((int(patterns.sum()), self.length), dtype=numpy.uint8, order="F")
+            for i in range(self.length - 1, -1, -1):
+                codes = numpy.array([CandidateArray.code(option) for option in self.options[i]], dtype=numpy.uint8)
+                self.choices[:, i] = numpy.repeat(codes[formats[i]], patterns)
+                if i > 0:
+                    total = numpy.concatenate([[0], numpy.cumsum(patterns)])
+                    patterns = total[ends[i]] - total[numpy.concatenate([[0], ends[i][:-1]])]
+        else:
+            self.choices = numpy.zeros((1, 0), dtype=numpy.uint8)
+    # Returns the byte standing for the format in the pool: the codes of its foot position, stress, schwa and weight
+    # in two bits each from the lowest
+    def code(option):
+        foot_position = CandidateArray.foot_position_codes[option.foot_position]
+        stress = CandidateArray.stress_codes[option.stress]
+        schwa = CandidateArray.schwa_codes[option.schwa]
+        weight = CandidateArray.weight_codes[option.weight]
+        return foot_position | stress << 2 | schwa << 4 | weight << 6
+    # Returns the feature matrix or mask of the given name (see features) for the remaining candidates, kept until the
+    # pool changes
+    def __getattr__(self, name):
+        if not name in CandidateArray.features:
+            raise AttributeError(name)
+        matrix = CandidateArray.features[name](self.choices)
+        self.__dict__[name] = matrix
+        return matrix
+    # Returns the number of candidates remaining
+    def remaining(self):
+        return len(self.choices)
+    # Returns the number of candidates remaining, as remaining does
+    def __len__(self):
+        return self.remaining()
+    # Keeps only the candidates at the given rows
+    def keep(self, rows):
+        self.choices = self.choices[rows]
+        for name in CandidateArray.features:
+            self.__dict__.pop(name, None)
+    # Returns the matrix shifted right by one syllable, filling the first column with fill
+    def previous(matrix, fill):
+        shifted = numpy.empty_like(matrix)
+        shifted[:, 1:] = matrix[:, :-1]
+        shifted[:, :1] = fill
+        return shifted
+    # Returns the matrix shifted left by one syllable, filling the last column with fill
+    def following(matrix, fill):
+        shifted = numpy.empty_like(matrix)
+        shifted[:, :-1] = matrix[:, 1:]
+        shifted[:, -1:] = fill
+        return shifted
+    # Returns the sum of weights of the marked syllables of each candidate, in the same scale as Stress.penalty
+    # The marks of a candidate are the binary digits of its violations (the first syllable being the most significant
+    # for R), so they are packed into 8 bytes read as one big-endian integer and shifted into place
+    def weigh(self, marks, direction):
+        if direction == "L":
+            marks = marks[:, ::-1]
+        # Weights above 2 ** 62 do not fit into int64
+        if self.length > 62:
+            powers = [2 ** (self.length - 1 - i) for i in range(self.length)]
+            return marks.astype(object) @ numpy.array(powers, dtype=object)
+        packed = numpy.zeros((len(marks), 8), dtype=numpy.uint8)
+        packed[:, :(self.length + 7) // 8] = numpy.packbits(marks, axis=1)
+        return (packed.view(">u8")[:, 0] >> numpy.uint64(64 - self.length)).astype(numpy.int64)
+    # Returns the specific violation of every remaining candidate in value, or the sum of the violations of a stratum
+    # (a list of violations)
+    def penalty(self, violation):
+        if type(violation) == list:
+            penalties = [self.penalty(member) for member in violation]
+            # Sums above 2 ** 63 do not fit into int64
+            if self.length + len(violation) > 62:
+                penalties = [penalty.astype(object) for penalty in penalties]
+            return sum(penalties[1:], penalties[0])
+        if violation.constraint == None:
+            print("Invalid violation type")
+            return numpy.full(len(self.choices), -1, dtype=numpy.int64)
+        if self.length == 0:
+            return numpy.zeros(len(self.choices), dtype=numpy.int64)
+        return violation.constraint.vectorize(self, violation.direction)
+    # Removes the candidates without the minimum violations of the specific kind
+    def min_vio(self, violation):
+        if len(self.choices) == 0:
+            return
+        penalty = self.penalty(violation)
+        self.keep(numpy.flatnonzero(penalty == penalty.min()))
+    # Returns the remaining candidates as lists of proxy syllables
+    def to_candidates(self):
+        candidates = []
+        for row in self.choices.tolist():
+            candidates += [[self.formats[code] for code in row]]
+        return candidates
+# Class of pools of candidates held bit-sliced in Python integers, one bit for each candidate, as an alternative to
+# CandidateArray on hosts without numpy: for each syllable and feature value, the candidates having it form a bitset,
+# so that a constraint marks the candidates violating it at a syllable with a few bitwise operations
+class CandidateBits:
+    # Tests of the feature values used by the constraints: name -> test of a format, the bitsets of the candidates
+    # passing it at each syllable being built when first used
+    features = {
+        "stressed": lambda option: option.stress != "unstressed",
+        "none": lambda option: option.foot_position == "none",
+        "left": lambda option: option.foot_position == "left",
+        "right": lambda option: option.foot_position == "right",
+        "whole": lambda option: option.foot_position == "whole",
+        "heavy": lambda option: option.weight == "H",
+        "shortened": lambda option: option.weight == "L shortened",
+        "schwa": lambda option: option.schwa != "not schwa",
+        "mora": lambda option: option.schwa == "mora",
+        "nonmora": lambda option: option.schwa == "nonmora"
+    }
+    # Constructor, building the pool of well-formed patterns of the word in stress in the order of exhaust_candidates
+    def __init__(self, stress):
+        self.options = stress.resolved_possibilities()
+        self.length = len(self.options)
+        # Indices of the formats of each syllable that may follow each format of the syllable before
+        # (Stress.compatible), the first syllable following None
+        self.allowed = []
+        for i in range(self.length):
+            previous_options = [None] if i == 0 else self.options[i - 1]
+            self.allowed += [[[k for k in range(len(self.options[i])) if Stress.compatible(previous, self.options[i][k])] for previous in previous_options]]
+        # Number of complete patterns going on from each format of each syllable, counted from the last syllable,
+        # leaving out the ones ending in an open foot
+        self.counts = [None] * self.length
+        for i in range(self.length - 1, -1, -1):
+            if i == self.length - 1:
+                self.counts[i] = [0 if option.foot_position == "left" else 1 for option in self.options[i]]
+            else:
+                self.counts[i] = [sum([self.counts[i + 1][k] for k in following]) for following in self.allowed[i + 1]]
+        size = sum([self.counts[0][k] for k in self.allowed[0][0]]) if self.length > 0 else 1
+        self.all = (1 << size) - 1
+        self.alive = self.all
+        # Bitset of the candidates choosing each format of each syllable, built from the last syllable without listing
+        # the candidates: as the candidates going on from a format follow one another, the bitsets of the candidates
+        # after a format of the syllable before are those of the formats following it, each shifted past the ones before
+        below = [[] for option in (self.options[-1] if self.length > 0 else [])]
+        for i in range(self.length - 1, -1, -1):
+            above = []
+            for following in self.allowed[i]:
+                block = [[0] * len(self.options[j]) for j in range(i, self.length)]
+                offset = 0
+                for k in following:
+                    if self.counts[i][k] == 0:
+                        continue
+                    block[0][k] |= ((1 << self.counts[i][k]) - 1) << offset
+                    for j in range(len(below[k])):
+                        for l in range(len(below[k][j])):
+                            if below[k][j][l] != 0:
+                                block[j + 1][l] |= below[k][j][l] << offset
+                    offset += self.counts[i][k]
+                above += [block]
+            below = above
+        self.formats = below[0] if self.length > 0 else []
+    # Returns for each syllable the bitset of the candidates whose format of the syllable passes the test
+    def feature(self, test):
+        masks = []
+        for i in range(self.length):
+            mask = 0
+            for k in range(len(self.options[i])):
+                if test(self.options[i][k]):
+                    mask |= self.formats[i][k]
+            masks += [mask]
+        return masks
+    # Returns the bitsets of the feature of the given name (see features) for each syllable, kept once built
+    def __getattr__(self, name):
+        if not name in CandidateBits.features:
+            raise AttributeError(name)
+        masks = self.feature(CandidateBits.features[name])
+        self.__dict__[name] = masks
+        return masks
+    # Returns the number of candidates remaining
+    def remaining(self):
+        return bin(self.alive).count("1")
+    # Returns the number of candidates remaining, as remaining does
+    def __len__(self):
+        return self.remaining()
+    # Returns the bitsets shifted right by one syllable, with fill for the first syllable
+    def previous(masks, fill):
+        return [fill] + masks[:-1]
+    # Returns the bitsets shifted left by one syllable, with fill for the last syllable
+    def following(masks, fill):
+        return masks[1:] + [fill]
+    # Removes the candidates without the minimum violations of the specific kind: from the most significant syllable,
+    # the candidates violating the constraint there are removed unless no candidate would remain
+    # For a stratum (a list of violations), the same is done with the binary digits of the sum of the violations
+    def min_vio(self, violation):
+        if type(violation) == list:
+            if any([member.constraint == None for member in violation]):
+                print("Invalid violation type")
+                return
+            slices = self.sum_slices(violation)
+        elif violation.constraint == None:
+            print("Invalid violation type")
+            return
+        else:
+            slices = violation.constraint.bitslices(self, violation.direction)
+        for marks in slices:
+            remaining = self.alive & ~marks
+            if remaining != 0:
+                self.alive = remaining
+    # Returns the bitsets of the candidates having each binary digit of the sum of the violations set, from the most
+    # significant, added up bit-sliced: the last bitset of Constraint.bitslices weighs 1 and each one before it twice
+    # the next, and the bitsets of the same weight are reduced by full adders, carrying into the next weight
+    def sum_slices(self, violations):
+        # Bitsets to be added at each weight, by its power of 2
+        columns = []
+        for violation in violations:
+            slices = violation.constraint.bitslices(self, violation.direction)
+            for i in range(len(slices)):
+                power = len(slices) - 1 - i
+                while len(columns) <= power:
+                    columns += [[]]
+                columns[power] += [slices[i]]
+        digits = []
+        power = 0
+        while power < len(columns):
+            column = columns[power]
+            while len(column) > 1:
+                a = column.pop()
+                b = column.pop()
+                c = column.pop() if len(column) > 0 else 0
+                column += [a ^ b ^ c]
+                carry = (a & b) | (c & (a ^ b))
+                if carry != 0:
+                    if power + 1 == len(columns):
+                        columns += [[]]
+                    columns[power + 1] += [carry]
+            digits += [column[0] if len(column) > 0 else 0]
+            power += 1
+        return digits[::-1]
+    # Returns the remaining candidates as lists of proxy syllables, each found from its index by skipping the formats
+    # of a syllable whose candidates come before it (counts)
+    def to_candidates(self):
+        candidates = []
+        bits = bin(self.alive)[2:][::-1]
+        for j in range(len(bits)):
+            if bits[j] == "1":
+                candidate = []
+                index = j
+                previous = 0
+                for i in range(self.length):
+                    for k in self.allowed[i][previous]:
+                        if index < self.counts[i][k]:
+                            break
+                        index -= self.counts[i][k]
+                    candidate += [self.options[i][k]]
+                    previous = k
+                candidates += [candidate]
+        return candidates
+# Class of pools of candidates held in a prefix tree, each node being a syllable format with the tuple of the nodes that
+# may follow it (an empty tuple at the end of the word), so that candidates sharing a prefix share its nodes
+# A violation is applied by walking the tree with the violations of the prefix added up syllable by syllable
+# (Constraint.local), leaving out at once every candidate under a prefix already worse than the best candidate
+class CandidateTrie:
+    # Constructor, building the tree of well-formed patterns of the word in stress in the order of exhaust_candidates
+    def __init__(self, stress):
+        options = stress.resolved_possibilities()
+        self.length = len(options)
+        # The formats that may follow a format at an index are the same wherever it occurs, so they are built once
+        built = {}
+        def build(index, previous):
+            if index == self.length:
+                if previous == None or previous.foot_position != "left":
+                    return ()
+                return None
+            if (index, previous) in built:
+                return built[(index, previous)]
+            children = []
+            for option in options[index]:
+                if Stress.compatible(previous, option):
+                    grandchildren = build(index + 1, option)
+                    if grandchildren != None:
+                        children += [(option, grandchildren)]
+            built[(index, previous)] = tuple(children) if len(children) > 0 else None
+            return built[(index, previous)]
+        self.root = build(0, None)
+        self.size = CandidateTrie.count(self.root)
+    # Returns the number of candidates under the children (None for none), counting each shared node once: the counts
+    # are kept by the identity of the node for the call, in which every node stays reachable from children
+    def count(children, counts=None):
+        if children == None:
+            return 0
+        if children == ():
+            return 1
+        if counts == None:
+            counts = {}
+        if not id(children) in counts:
+            counts[id(children)] = sum([CandidateTrie.count(grandchildren, counts) for syllable, grandchildren in children])
+        return counts[id(children)]
+    # Returns the number of candidates remaining, which may be too large for len on a long word
+    def remaining(self):
+        return self.size
+    # Returns the number of candidates remaining, as remaining does
+    def __len__(self):
+        return self.remaining()
+    # Returns the function giving the violations of the syllable at index in the prefix (a list of formats) given the
+    # following format (None at the end of the word), None if there are no such violations, and the list of the
+    # violations needing the entire word, each counting 1 unless a syllable satisfies it (as in op_dp), in the same
+    # scale as Stress.penalty
+    # For a stratum (a list of violations), the function gives the sum of the violations
+    def evaluators(self, violation):
+        violations = violation if type(violation) == list else [violation]
+        locals = []
+        wholes = []
+        for violation in violations:
+            if violation.constraint.window == None:
+                wholes += [violation]
+                continue
+            if violation.constraint.level == "word":
+                weights = [1] * self.length
+            elif violation.direction == "L":
+                weights = [2 ** i for i in range(self.length)]
+            else:
+                weights = [2 ** (self.length - 1 - i) for i in range(self.length)]
+            locals += [(violation.constraint, violation.direction, weights)]
+        def local(prefix, index, following):
+            previous = prefix[index - 1] if index > 0 else None
+            sum = 0
+            for constraint, direction, weights in locals:
+                if constraint.local(direction, previous, prefix[index], following, prefix[0]):
+                    sum += weights[index]
+            return sum
+        return local if len(locals) > 0 else None, wholes
+    # Removes the candidates without the minimum violations of the specific kind, or of the sum of the violations of a
+    # stratum (a list of violations)
+    # The violations of the candidates under a node only depend on the node, the two formats before it, the first
+    # format and which violations needing the entire word are satisfied so far, so the minimum under each node is
+    # found once for each of these states, and a node whose candidates all reach the minimum is kept as it is
+    def min_vio(self, violation):
+        if any([member.constraint == None for member in (violation if type(violation) == list else [violation])]):
+            print("Invalid violation type")
+            return
+        if self.root == None:
+            return
+        local, wholes = self.evaluators(violation)
+        prefix = []
+        # Returns the state of the children under the prefix, with the flags of the violations needing the entire word
+        def state(children, satisfied):
+            return (id(children), len(prefix), prefix[-2] if len(prefix) > 1 else None, prefix[-1] if len(prefix) > 0 else None, prefix[0] if len(prefix) > 0 else None, satisfied)
+        # Returns the violations added by the syllable appended last, given the flags before it, and the flags after it
+        def step(satisfied):
+            syllable = prefix[-1]
+            value = 0
+            if local != None and len(prefix) > 1:
+                value += local(prefix, len(prefix) - 2, syllable)
+            satisfied = tuple([satisfied[i] or wholes[i].constraint.satisfied_by(syllable) for i in range(len(wholes))])
+            return value, satisfied
+        # Returns the minimum violations of the candidates under the children, from the syllable before them onward
+        best = {}
+        def rest(children, satisfied):
+            key = state(children, satisfied)
+            if key in best:
+                return best[key]
+            if children == ():
+                value = satisfied.count(False)
+                if local != None and len(prefix) > 0:
+                    value += local(prefix, len(prefix) - 1, None)
+            else:
+                value = None
+                for syllable, grandchildren in children:
+                    prefix.append(syllable)
+                    cost, next_satisfied = step(satisfied)
+                    total = cost + rest(grandchildren, next_satisfied)
+                    prefix.pop()
+                    if value == None or total < value:
+                        value = total
+            best[key] = value
+            return value
+        # Returns the children with only the candidates reaching the minimum under them, the same tuple if all do
+        kept = {}
+        def keep(children, satisfied):
+            key = state(children, satisfied)
+            if key in kept:
+                return kept[key]
+            result = children
+            if children != ():
+                target = rest(children, satisfied)
+                remaining = []
+                for syllable, grandchildren in children:
+                    prefix.append(syllable)
+                    cost, next_satisfied = step(satisfied)
+                    if cost + rest(grandchildren, next_satisfied) == target:
+                        remaining += [(syllable, keep(grandchildren, next_satisfied))]
+                    prefix.pop()
+                if len(remaining) < len(children) or any([remaining[i][1] is not children[i][1] for i in range(len(remaining))]):
+                    result = tuple(remaining)
+            kept[key] = result
+            return result
+        self.root = keep(self.root, (False,) * len(wholes))
+        self.size = CandidateTrie.count(self.root)
+    # Returns the remaining candidates as lists of proxy syllables
+    def to_candidates(self):
+        candidates = []
+        prefix = []
+        def walk(children):
+            if children == ():
+                candidates.append(list(prefix))
+                return
+            for syllable, grandchildren in children:
+                prefix.append(syllable)
+                walk(grandchildren)
+                prefix.pop()
+        if self.root != None:
+            walk(self.root)
+        return candidates
             
-def parse(print_process=False,mode="weight",max_print=100):
+def parse(print_process=False,mode="weight",max_print=100,engine="op",cache=None):
     print("Enter the word or number of syllables to parse: ")
     has_word = True
     while True:
@@ -622,21 +2547,17 @@ def parse(print_process=False,mode="weight",max_print=100):
     stress.take_violations()
     print()
     stress.take_not_considering()
-    if not "shortening" in stress.not_considering:
-        has_max_μ = False
-        for violation in stress.violations:
-            if violation.name == "Max(μ)":
-                has_max_μ = True
-                break
-        if not has_max_μ:
-            print("Max(μ), R automatically added for the case considering shortening")
-            stress.add("Max(μ) (auto)", "R")
+    if stress.add_auto_max():
+        print("Max(μ), R automatically added for the case considering shortening")
     print()
     if not "weight" in stress.not_considering:
         stress.take_weights()
         print()
     start_time = time.time()
-    candidates = stress.op(print_process=print_process,mode=mode,max_print=max_print)
+    if cache != None and not print_process:
+        candidates = cache.op(stress, engine=engine)
+    else:
+        candidates = stress.op_engine(engine=engine,print_process=print_process,mode=mode,max_print=max_print)
     for i in range(len(candidates)):
         if len(candidates) > 1:
             print(i + 1, ". ", sep="", end="\t")
@@ -656,6 +2577,63 @@ def parse(print_process=False,mode="weight",max_print=100):
             return "More than one candidate"
     else:
         return "No word provided"
+# Reads the grammar file, a JSON object with "ranking" as a list of [name, direction] pairs (or strata of tied ones as
+# lists of such pairs) and optionally "not_considering" as a list of aspects to ignore, and returns the Lexicon
+# evaluating words under it
+def read_grammar(path, engine="op", cache_size=1024, syllable_cache_size=65536, sink=None):
+    with open(path, encoding="utf-8") as file:
+        grammar = json.load(file)
+    return Lexicon(grammar["ranking"], grammar.get("not_considering", []), engine=engine, cache_size=cache_size, syllable_cache_size=syllable_cache_size, sink=sink)
+# Evaluates the words in lines of JSON objects such as {"word": "cacəca", "weights": "LLH"} one at a time, writing for
+# each a line of JSON with the object extended by its stress patterns and parsed words, or by the error if it fails
+def batch(lexicon, lines, output):
+    for number, line in enumerate(lines, 1):
+        if line.strip() == "":
+            continue
+        result = {}
+        try:
+            result = json.loads(line)
+            candidates = lexicon.evaluate_word(result["word"], result.get("weights"))
+            result["patterns"] = [Stress.syllables_string(candidate, mode="weight") for candidate in candidates]
+            result["parsed"] = [Stress.syllables_string(candidate) for candidate in candidates]
+        except Exception as error:
+            if type(result) != dict:
+                result = {}
+            result["line"] = number
+            result["error"] = str(error)
+        output.write(json.dumps(result, ensure_ascii=False) + "\n")
+        output.flush()
+# Command-line entry point for batch evaluation; see --help
+def main(arguments=None):
+    import argparse
+    parser = argparse.ArgumentParser(description="Evaluates words given as lines of JSON under the ranking of a grammar file, writing a line of JSON for each word as it finishes")
+    parser.add_argument("grammar", help="JSON file with \"ranking\" ([[name, direction], ...], with a list of such pairs for a stratum of tied violations) and optionally \"not_considering\"")
+    parser.add_argument("input", nargs="?", default="-", help="file with one JSON object ({\"word\": ..., \"weights\": ...}) per line; standard input if - or not given")
+    parser.add_argument("--engine", choices=["op", "dp", "array", "bits", "trie"], default="op", help="engine of Stress.op_engine")
+    parser.add_argument("--cache-size", type=int, default=1024, help="number of word shapes kept by the solver cache")
+    parser.add_argument("--syllable-cache-size", type=int, default=65536, help="number of words kept syllabified")
+    parser.add_argument("--trace", help="JSON Lines file to append the events of op to (the time, candidates and minimum violations of each constraint)")
+    arguments = parser.parse_args(arguments)
+    sink = JSONLinesSink(arguments.trace) if arguments.trace != None else None
+    lexicon = read_grammar(arguments.grammar, engine=arguments.engine, cache_size=arguments.cache_size, syllable_cache_size=arguments.syllable_cache_size, sink=sink)
+    sys.stdout.reconfigure(encoding="utf-8")
+    try:
+        if arguments.input == "-":
+            sys.stdin.reconfigure(encoding="utf-8")
+            batch(lexicon, sys.stdin, sys.stdout)
+        else:
+            with open(arguments.input, encoding="utf-8") as file:
+                batch(lexicon, file, sys.stdout)
+    except BrokenPipeError:
+        # The reader of the output stopped early (e.g. head); the output is closed quietly
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    finally:
+        if sink != None:
+            sink.close()
 
 
-parse(print_process=True,mode="weight")
\ No newline at end of file
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main()
+    else:
+        parse(print_process=True,mode="weight")
\ No newline at end of file
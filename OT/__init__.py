@@ -0,0 +1,4 @@
+# Optimality Theory engine of OT_directioned.py; importing it has no side effects, as the prompts only run when the
+# file is started as a script
+from .OT_directioned import Character, Syllable, ProxySyllable, Violation, Constraint, CompiledGrammar, SimplifiedRanking, MemorySink, JSONLinesSink, Stress, \
+    SolverCache, SyllableCache, Grammar, Lexicon, Typology, Learner, CandidateArray, CandidateBits, CandidateTrie, parse, read_grammar, batch, main
@@ -0,0 +1,252 @@
+import os
+import sys
+import json
+import time
+import platform
+import argparse
+import tracemalloc
+import statistics
+import subprocess
+import OT
+import DHS
+# Benchmark suite of the OT and DHS engines: times syllabification, candidate generation, min_vio and op separately
+# over a sweep of word lengths, schwa proportions and weight profiles under the rankings of
+# OT/Input Verifications (adapted).docx, and writes the results to a JSON file to compare with a baseline run
+
+# Distinct rankings of the verification document, by the numbers of the examples using them
+rankings = [
+    {"name": "(15)(16)", "ranking": [["NonFin", "R"], ["Parse", "R"], ["Parse", "L"], ["Iamb", "R"], ["Trochee", "R"]], "not_considering": ["weight"]},
+    {"name": "(18)", "ranking": [["HD(w)", "R"], ["Iamb", "R"], ["Trochee", "R"], ["Parse", "R"], ["Trochee", "L"]], "not_considering": ["weight"]},
+    {"name": "(19)", "ranking": [["HD(w)", "R"], ["Trochee", "R"], ["Iamb", "R"], ["Parse", "R"], ["Iamb", "L"]], "not_considering": ["weight"]},
+    {"name": "(25)(27)", "ranking": [["Trochee", "R"], ["Foot-Right", "R"], ["Bal-Troch", "R"], ["Parse", "L"]], "not_considering": ["shortening"]},
+    {"name": "(26)(28)", "ranking": [["Trochee", "R"], ["Foot-Right", "R"], ["Bal-Troch", "R"], ["Parse", "L"], ["Max(μ)", "R"]], "not_considering": []},
+    {"name": "(29)-(31)", "ranking": [["Trochee", "R"], ["Bal-Troch", "R"], ["Parse", "L"], ["Max(μ)", "R"]], "not_considering": []},
+    {"name": "(34)(41)", "ranking": [["HD(w)", "R"], ["Trochee", "R"], ["Iamb", "R"], ["Parse", "L"]], "not_considering": []},
+    {"name": "(39)-(43)", "ranking": [["HD(w)", "R"], ["*Stressed/ə", "R"], ["Trochee", "R"], ["HD(ft)", "R"], ["Iamb", "R"], ["Parse", "L"], ["*μ/ə", "R"], ["*Long-V", "R"]], "not_considering": []},
+    {"name": "(44)-(49)", "ranking": [["Parse", "L"], ["*Stressed/ə", "R"], ["Trochee", "R"], ["HD(ft)", "R"], ["*Long-V", "R"], ["*μ/ə", "R"], ["Iamb", "R"]], "not_considering": []},
+    {"name": "(51)", "ranking": [["Trochee", "R"], ["Parse", "R"], ["Iamb", "R"], ["Parse", "L"]], "not_considering": ["shortening"]},
+    {"name": "(52)-(55)", "ranking": [["Trochee", "R"], ["Parse", "R"], ["Iamb", "R"], ["Parse", "L"]], "not_considering": []},
+    {"name": "(56)", "ranking": [["Trochee", "R"], ["*Clash", "R"], ["Parse", "R"], ["Iamb", "R"], ["Parse", "L"]], "not_considering": ["shortening"]},
+    {"name": "(57)-(60)", "ranking": [["Trochee", "R"], ["Parse", "R"], ["*Clash", "R"], ["Iamb", "R"], ["Parse", "L"]], "not_considering": []},
+]
+# Weight profiles, each returning the L/H string of the given number of syllables
+weight_profiles = {
+    "light": lambda n: "L" * n,
+    "final-heavy": lambda n: "L" * (n - 1) + "H" if n > 0 else "",
+    "alternating": lambda n: "".join(["LH"[i % 2] for i in range(n)]),
+}
+# Returns the word of n syllables with the given proportion of schwas, spread evenly
+def make_word(n, schwa):
+    word = ""
+    for i in range(n):
+        if int((i + 1) * schwa) > int(i * schwa):
+            word += "cə"
+        else:
+            word += "ca"
+    return word
+# Returns the minimum and mean wall time of repeat calls of function (with a new argument from setup for each call)
+# and the result of the last call
+def measure(function, setup, repeat):
+    times = []
+    result = None
+    for i in range(repeat):
+        argument = setup()
+        start = time.perf_counter()
+        result = function(argument)
+        times += [time.perf_counter() - start]
+    return min(times), statistics.mean(times), result
+# Returns the peak memory in bytes traced while calling function with a new argument from setup
+def peak_memory(function, setup):
+    argument = setup()
+    tracemalloc.start()
+    try:
+        function(argument)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+# Returns the number of well-formed candidates of the OT stress object without listing them, counting the patterns
+# ending in each format of each syllable as Stress.generate_candidates would extend them
+def count_candidates(stress):
+    options = stress.resolved_possibilities()
+    if len(options) == 0:
+        return 1
+    counts = [1 if OT.Stress.compatible(None, option) else 0 for option in options[0]]
+    for i in range(1, len(options)):
+        counts = [sum([counts[j] for j in range(len(options[i - 1])) if OT.Stress.compatible(options[i - 1][j], option)]) for option in options[i]]
+    return sum([counts[j] for j in range(len(options[-1])) if options[-1][j].foot_position != "left"])
+# Returns the number of patterns the DHS exhaust_candidates lists (before removing the ill-formed ones) for the stress object
+def count_exhaustive(stress):
+    count = 1
+    for syllable in stress.syllables:
+        count *= len(OT.Stress.all_possibility(stress, syllable.schwa, syllable.weight))
+    return count
+# Returns the OT stress object of the word under the ranking, as parse sets it up
+def ot_stress(word, weights, ranking):
+    stress = OT.Stress(OT.Syllable.to_syllable_array(word))
+    stress.set_violations(ranking["ranking"])
+    stress.not_considering = list(ranking["not_considering"])
+    stress.add_auto_max()
+    if not "weight" in stress.not_considering:
+        for i in range(len(weights)):
+            stress.syllables[i].mod_weight(weights[i])
+    return stress
+# Returns the DHS syllable-wise stress object of the word under the ranking
+def syllable_wise_stress(word, weights, ranking):
+    module = DHS.syllable_wise
+    stress = module.Stress(module.Syllable.to_syllable_array(word))
+    for name, direction in ranking["ranking"]:
+        stress.add(name, direction)
+    stress.not_considering = list(ranking["not_considering"])
+    if not "weight" in stress.not_considering:
+        for i in range(len(weights)):
+            stress.syllables[i].mod_weight(weights[i])
+    return stress
+# Returns the DHS pattern-wise stress object of n syllables under the ranking, None if it has violations not handled
+def pattern_wise_stress(n, ranking):
+    module = DHS.pattern_wise
+    stress = module.Stress(n)
+    for name, direction in ranking["ranking"]:
+        if not name in module.Stress.violation_types:
+            return None
+        stress.add([name, direction == "L"])
+    return stress
+# Runs the benchmarks of one word, yielding a record for each measure
+def run_word(n, schwa, profile, ranking, arguments):
+    word = make_word(n, schwa)
+    weights = weight_profiles[profile](n)
+    base = {"ranking": ranking["name"], "syllables": n, "schwa": schwa, "weights": profile}
+    def record(engine, measure_name, timing, **fields):
+        result = dict(base, engine=engine, measure=measure_name, seconds=timing[0], mean=timing[1], repeat=arguments.repeat)
+        result.update(fields)
+        return result
+    repeat = arguments.repeat
+    # OT
+    if "ot" in arguments.engines:
+        yield record("ot", "to_syllable_array", measure(OT.Syllable.to_syllable_array, lambda: word, repeat))
+        stress = ot_stress(word, weights, ranking)
+        candidates = count_candidates(stress)
+        if candidates <= arguments.max_candidates:
+            yield record("ot", "exhaust_candidates", measure(lambda stress: stress.exhaust_candidates(), lambda: ot_stress(word, weights, ranking), repeat), candidates=candidates)
+            pool = list(stress.generate_candidates())
+            penalty = OT.CompiledGrammar.get(stress.violations).penalties(n)[0]
+            timing = measure(lambda pool: OT.Stress.min_vio(pool, stress.violations[0], penalty), lambda: pool, repeat)
+            yield record("ot", "min_vio", timing, candidates=candidates, survivors=len(timing[2]), violation=stress.violations[0].name)
+            # The first two violations tied in a stratum, applied in one pass
+            if len(stress.violations) > 1:
+                stratum = stress.violations[:2]
+                penalty = OT.CompiledGrammar.get(stress.violations).stratum_penalty([0, 1], n)
+                timing = measure(lambda pool: OT.Stress.min_vio(pool, stratum, penalty), lambda: pool, repeat)
+                yield record("ot", "min_vio_stratum", timing, candidates=candidates, survivors=len(timing[2]), violation=OT.Stress.violation_name(stratum))
+        # op_dp does not list out the candidates, so it runs for every word
+        for engine in ["op", "dp", "array", "bits", "trie"]:
+            if (engine != "dp" and candidates > arguments.max_candidates) or (engine == "array" and not arguments.array):
+                continue
+            run = lambda stress: stress.op_engine(engine=engine)
+            setup = lambda: ot_stress(word, weights, ranking)
+            timing = measure(run, setup, repeat)
+            fields = {"candidates": candidates, "survivors": len(timing[2])}
+            if arguments.memory:
+                fields["peak_bytes"] = peak_memory(run, setup)
+            yield record("ot" if engine == "op" else "ot-" + engine, "op", timing, **fields)
+    # DHS syllable-wise
+    if "dhs-syllable" in arguments.engines:
+        module = DHS.syllable_wise
+        yield record("dhs-syllable", "to_syllable_array", measure(module.Syllable.to_syllable_array, lambda: word, repeat))
+        stress = syllable_wise_stress(word, weights, ranking)
+        exhaustive = count_exhaustive(stress)
+        if exhaustive <= arguments.max_candidates:
+            setup = lambda: syllable_wise_stress(word, weights, ranking)
+            yield record("dhs-syllable", "exhaust_candidates", measure(lambda stress: stress.exhaust_candidates(), setup, repeat), candidates=exhaustive)
+            pool = module.Stress.exclude_none(stress.exhaust_candidates())
+            timing = measure(lambda pool: module.Stress.min_vio(pool, stress.violations[0]), lambda: list(pool), repeat)
+            yield record("dhs-syllable", "min_vio", timing, candidates=len(pool), survivors=len(module.Stress.exclude_none(timing[2])), violation=stress.violations[0].name)
+            run = lambda stress: stress.op()
+            timing = measure(run, setup, repeat)
+            fields = {"candidates": len(pool), "survivors": len(timing[2])}
+            if arguments.memory:
+                fields["peak_bytes"] = peak_memory(run, setup)
+            yield record("dhs-syllable", "op", timing, **fields)
+        # The serial engine does not list out the candidates, so it runs for every word
+        setup = lambda: syllable_wise_stress(word, weights, ranking)
+        run = lambda stress: stress.op_serial()
+        timing = measure(run, setup, repeat)
+        fields = {"survivors": len(timing[2])}
+        if arguments.memory:
+            fields["peak_bytes"] = peak_memory(run, setup)
+        yield record("dhs-syllable-serial", "op", timing, **fields)
+    # DHS pattern-wise
+    if "dhs-pattern" in arguments.engines and pattern_wise_stress(n, ranking) != None:
+        module = DHS.pattern_wise
+        yield record("dhs-pattern", "to_syllables", measure(module.Syllable_Processor.to_syllables, lambda: word, repeat))
+        run = lambda stress: stress.op()
+        setup = lambda: pattern_wise_stress(n, ranking)
+        fields = {}
+        if arguments.memory:
+            fields["peak_bytes"] = peak_memory(run, setup)
+        yield record("dhs-pattern", "op", measure(run, setup, repeat), **fields)
+        violations = [[name, direction == "L"] for name, direction in ranking["ranking"]]
+        build = lambda violations: module.PatternTable(violations, max_length=n)
+        yield record("dhs-pattern", "table_build", measure(build, lambda: violations, repeat))
+        table = build(violations)
+        yield record("dhs-pattern", "table_lookup", measure(table.pattern, lambda: n, repeat))
+# Returns the key matching a record with the same one of another run
+def key(record):
+    return (record["engine"], record["measure"], record["ranking"], record["syllables"], record["schwa"], record["weights"])
+# Prints the ratio of the times of the records to the ones of the baseline, by engine and measure
+def compare(records, baseline):
+    previous = {key(record): record for record in baseline["records"]}
+    ratios = {}
+    for record in records:
+        if key(record) in previous and previous[key(record)]["seconds"] > 0 and record["seconds"] > 0:
+            ratios.setdefault((record["engine"], record["measure"]), []).append(record["seconds"] / previous[key(record)]["seconds"])
+    print("Time relative to the baseline (geometric mean; below 1 is faster):")
+    for (engine, measure_name), values in sorted(ratios.items()):
+        print("  ", engine, " ", measure_name, ": ", round(statistics.geometric_mean(values), 3), " over ", len(values), " word(s)", sep="")
+# Returns the commit of the working tree, None if it is not known
+def commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+# Command-line entry point; see --help
+def main(arguments=None):
+    parser = argparse.ArgumentParser(description="Benchmarks the OT and DHS engines over a sweep of words under the rankings of the verification document")
+    parser.add_argument("--output", default="benchmark_results.json", help="JSON file to write the results to")
+    parser.add_argument("--baseline", help="JSON file of an earlier run to compare with")
+    parser.add_argument("--engines", nargs="+", default=["ot", "dhs-syllable", "dhs-pattern"], choices=["ot", "dhs-syllable", "dhs-pattern"])
+    parser.add_argument("--lengths", type=int, nargs="+", default=list(range(1, 13)), help="numbers of syllables")
+    parser.add_argument("--schwa", type=float, nargs="+", default=[0, 0.25, 0.5], help="proportions of syllables with schwa")
+    parser.add_argument("--weights", nargs="+", default=list(weight_profiles), choices=list(weight_profiles), help="weight profiles")
+    parser.add_argument("--rankings", nargs="+", help="names of the rankings to use (e.g. \"(56)\"); all if not given")
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed calls of each measure; the minimum is reported")
+    parser.add_argument("--max-candidates", type=int, default=20000, help="words with more candidates are not listed out or evaluated by the engines listing them")
+    parser.add_argument("--no-memory", dest="memory", action="store_false", help="skip the tracemalloc runs for peak memory")
+    parser.add_argument("--array", action="store_true", help="also time the numpy engine (Stress.op_array)")
+    arguments = parser.parse_args(arguments)
+    selected = [ranking for ranking in rankings if arguments.rankings == None or ranking["name"] in arguments.rankings]
+    records = []
+    start = time.perf_counter()
+    for ranking in selected:
+        for n in arguments.lengths:
+            for schwa in arguments.schwa:
+                for profile in arguments.weights:
+                    records += list(run_word(n, schwa, profile, ranking, arguments))
+        print("Ranking", ranking["name"], "done;", len(records), "record(s) in", round(time.perf_counter() - start, 1), "seconds", file=sys.stderr)
+    results = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "commit": commit(),
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "arguments": vars(arguments),
+        "records": records,
+    }
+    with open(arguments.output, "w", encoding="utf-8") as file:
+        json.dump(results, file, ensure_ascii=False, indent=1)
+    print(len(records), "record(s) written to", arguments.output)
+    if arguments.baseline != None:
+        with open(arguments.baseline, encoding="utf-8") as file:
+            compare(records, json.load(file))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+# Fixed words, rankings and aspects ignored on which the engines are compared with op
+import OT
+# (word, weights) pairs, from a word without syllables to words with schwas and long vowels
+WORDS = [("", ""), ("ca", "L"), ("pa:", "H"), ("cacə", "LL"), ("cəca", "LH"), ("cacəca", "LLH"), ("pa:cəca", "HLL"), ("tacəcəta", "LHLL"), ("cacacəcacəca", "LLHLLL")]
+# Rankings with no ties, using every constraint
+RANKINGS = [
+    [("Trochee", "R"), ("Parse", "R"), ("NonFin", "R")],
+    [("Iamb", "L"), ("Parse", "L"), ("*Clash", "R"), ("HD(w)", "R")],
+    [("Parse", "R"), ("Bal-Troch", "L"), ("Foot-Right", "R"), ("*Stressed/ə", "R")],
+    [("*μ/ə", "R"), ("Max(μ)", "L"), ("*Long-V", "R"), ("Trochee", "L"), ("HD(ft)", "R")],
+    [("NonFin", "L"), ("*Clash", "L"), ("Iamb", "R"), ("Parse", "L"), ("Parse", "R")]
+]
+# Rankings with strata of tied violations (see Stress.set_violations)
+STRATIFIED = [
+    [[("Trochee", "R"), ("Parse", "L")], ("NonFin", "R")],
+    [("Iamb", "R"), [("Parse", "R"), ("*Clash", "L"), ("HD(w)", "R")]],
+    [[("Max(μ)", "R"), ("*Long-V", "L")], [("Trochee", "L"), ("Foot-Right", "R")], ("Parse", "R")],
+    [[("*μ/ə", "L"), ("*Stressed/ə", "R"), ("HD(ft)", "L")], ("Bal-Troch", "R"), [("NonFin", "L"), ("Parse", "L")]]
+]
+NOT_CONSIDERING = [[], ["shortening"], ["weight"]]
+# Returns the optimal patterns of the word with weights under the ranking found by the engine, as strings
+def patterns(engine, word, weights, ranking, not_considering):
+    grammar = OT.Grammar(ranking, not_considering, engine=engine, cache_size=0)
+    return [OT.Stress.syllables_string(candidate) for candidate in grammar.patterns(word, weights)]
@@ -0,0 +1,66 @@
+import os
+import sys
+import json
+import subprocess
+import pytest
+import OT
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Code files started as scripts, with the keys of the words they take
+SCRIPTS = [os.path.join("OT", "OT_directioned.py"), os.path.join("DHS", "DHS_syllable-wise.py"), os.path.join("DHS", "DHS_pattern-wise.py")]
+LINES = [
+    json.dumps({"id": 1, "word": "cacəca"}, ensure_ascii=False),
+    "",
+    "not json",
+    json.dumps({"id": 3}),
+    json.dumps({"id": 4, "word": "pavalu"})
+]
+
+# Runs the script on the grammar and input files in tmp_path with the arguments, returning the lines of JSON written
+def run(script, tmp_path, ranking, lines, arguments=[]):
+    grammar = tmp_path / "grammar.json"
+    grammar.write_text(json.dumps({"ranking": ranking}), encoding="utf-8")
+    words = tmp_path / "words.jsonl"
+    words.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    process = subprocess.run([sys.executable, os.path.join(ROOT, script), str(grammar), str(words)] + arguments, capture_output=True, check=True)
+    return [json.loads(line) for line in process.stdout.decode("utf-8").splitlines()]
+
+@pytest.mark.parametrize("script", SCRIPTS)
+def test_each_line_is_answered_on_its_own(script, tmp_path):
+    results = run(script, tmp_path, [["Trochee", "R"], ["Parse", "R"]], LINES)
+    # The blank line is skipped; the others are answered in order, keeping their other keys
+    assert len(results) == 4
+    assert results[0]["id"] == 1 and len(results[0]["patterns"]) > 0 and len(results[0]["parsed"]) > 0
+    assert results[1]["line"] == 3 and "error" in results[1]
+    assert results[2]["id"] == 3 and results[2]["line"] == 4 and "error" in results[2]
+    assert results[3]["id"] == 4 and "patterns" in results[3]
+
+def test_results_match_the_library(tmp_path):
+    results = run(SCRIPTS[0], tmp_path, [["Trochee", "R"], ["Parse", "R"]], [json.dumps({"word": "cacəca", "weights": "LLH"}, ensure_ascii=False)])
+    grammar = OT.Grammar([("Trochee", "R"), ("Parse", "R")], cache_size=0)
+    assert results[0]["parsed"] == [OT.Stress.syllables_string(candidate) for candidate in grammar.evaluate("cacəca", "LLH")]
+
+def test_weights_not_matching_are_an_error(tmp_path):
+    results = run(SCRIPTS[0], tmp_path, [["Trochee", "R"]], [json.dumps({"word": "cacəca", "weights": "LH"}, ensure_ascii=False)])
+    assert results[0]["line"] == 1 and "do not match" in results[0]["error"]
+
+def test_invalid_grammar_is_rejected(tmp_path):
+    with pytest.raises(subprocess.CalledProcessError):
+        run(SCRIPTS[0], tmp_path, [["Trochee", "X"]], LINES)
+
+def test_trace(tmp_path):
+    trace = tmp_path / "trace.jsonl"
+    run(SCRIPTS[0], tmp_path, [["Trochee", "R"], ["Parse", "R"]], LINES, ["--trace", str(trace), "--cache-size", "0"])
+    events = [json.loads(line) for line in trace.read_text(encoding="utf-8").splitlines()]
+    # Each word evaluated is generated and then goes through each constraint applied
+    assert [event["event"] for event in events if event["word"] == "cacəca"] == ["generate", "constraint", "constraint"]
+    assert set([event["word"] for event in events]) == set(["cacəca", "pavalu"])
+    assert all([event["seconds"] >= 0 for event in events])
+
+@pytest.mark.parametrize("engine", ["dp", "trie"])
+def test_other_engines_are_traced(engine, tmp_path):
+    trace = tmp_path / "trace.jsonl"
+    run(SCRIPTS[0], tmp_path, [["Trochee", "R"], ["Parse", "R"]], LINES, ["--engine", engine, "--trace", str(trace), "--cache-size", "0"])
+    events = [json.loads(line) for line in trace.read_text(encoding="utf-8").splitlines()]
+    assert set([event["word"] for event in events]) == set(["cacəca", "pavalu"])
+    assert "constraint" in [event["event"] for event in events]
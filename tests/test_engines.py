@@ -0,0 +1,131 @@
+import importlib.util
+import pytest
+import OT
+from cases import WORDS, RANKINGS, STRATIFIED, NOT_CONSIDERING, patterns
+
+# Engines compared with op; CandidateArray needs numpy, an optional dependency of the array engine only
+NUMPY = pytest.mark.skipif(importlib.util.find_spec("numpy") == None, reason="the array engine (CandidateArray) requires numpy, an optional dependency: pip install numpy")
+ENGINES = ["dp", pytest.param("array", marks=NUMPY), "bits", "trie"]
+# Engines holding the candidates in a pool, with the class of the pool
+POOLS = [pytest.param(OT.CandidateArray, marks=NUMPY, id="array"), pytest.param(OT.CandidateBits, id="bits"), pytest.param(OT.CandidateTrie, id="trie")]
+SINGLE_SYLLABLES = [("ca", "L"), ("cə", "L"), ("pa:", "H"), ("pa:", "L")]
+
+# Returns the stress object of the word with weights under the ranking, ignoring the aspects in not_considering
+def stress(word, weights, ranking, not_considering=[]):
+    return OT.Grammar(ranking, not_considering, cache_size=0).stress(word, weights)
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("not_considering", NOT_CONSIDERING)
+@pytest.mark.parametrize("ranking", RANKINGS)
+@pytest.mark.parametrize("word, weights", WORDS)
+def test_engine_matches_op(engine, word, weights, ranking, not_considering):
+    assert patterns(engine, word, weights, ranking, not_considering) == patterns("op", word, weights, ranking, not_considering)
+
+@pytest.mark.parametrize("engine", ENGINES + ["op"])
+@pytest.mark.parametrize("ranking", RANKINGS + STRATIFIED)
+def test_empty_word_has_one_empty_pattern(engine, ranking):
+    assert patterns(engine, "", "", ranking, []) == [""]
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("ranking", RANKINGS + STRATIFIED)
+@pytest.mark.parametrize("word, weights", SINGLE_SYLLABLES)
+def test_single_syllable(engine, word, weights, ranking):
+    assert patterns(engine, word, weights, ranking, []) == patterns("op", word, weights, ranking, [])
+    assert len(patterns(engine, word, weights, ranking, [])) >= 1
+
+# Violations tied one at a time with Stress.add(..., tied=True), as at the prompt
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("word, weights", WORDS)
+def test_tied_with_add(engine, word, weights):
+    tied = OT.Stress(OT.Syllable.to_syllable_array(word))
+    for name, direction, with_previous in [("Trochee", "L", False), ("Iamb", "R", True), ("Parse", "R", False), ("*Clash", "L", True), ("HD(w)", "R", True)]:
+        tied.add(name, direction, tied=with_previous)
+    tied.not_considering = ["shortening"]
+    for i in range(len(weights)):
+        tied.syllables[i].mod_weight(weights[i])
+    expected = [OT.Stress.syllables_string(candidate) for candidate in tied.op()]
+    assert [OT.Stress.syllables_string(candidate) for candidate in tied.op_engine(engine=engine)] == expected
+    assert expected == patterns(engine, word, weights, [[("Trochee", "L"), ("Iamb", "R")], [("Parse", "R"), ("*Clash", "L"), ("HD(w)", "R")]], ["shortening"])
+
+# The compiled penalty gives up on a candidate once it exceeds the bound: it then returns a value above the bound and
+# no greater than the full violations, so that min_vio keeps the same candidates as with the violations in full
+@pytest.mark.parametrize("ranking", RANKINGS + STRATIFIED)
+@pytest.mark.parametrize("word, weights", WORDS[3:])
+def test_min_vio_cut_off(word, weights, ranking):
+    word_stress = stress(word, weights, ranking)
+    candidates = list(word_stress.generate_candidates())
+    compiled = OT.CompiledGrammar.get(word_stress.violations)
+    for stratum in word_stress.strata():
+        ranks = [violation.rank for violation in stratum]
+        penalty = compiled.stratum_penalty(ranks, len(word_stress.syllables))
+        violation = stratum[0] if len(stratum) == 1 else stratum
+        full = [penalty(candidate) for candidate in candidates]
+        for bound in set(full):
+            for i in range(len(candidates)):
+                cut = penalty(candidates[i], bound)
+                if full[i] > bound:
+                    assert bound < cut <= full[i]
+                else:
+                    assert cut == full[i]
+        assert OT.Stress.min_vio(candidates, violation, penalty) == OT.Stress.min_vio(candidates, violation)
+
+@pytest.mark.parametrize("pool", POOLS)
+@pytest.mark.parametrize("word, weights", WORDS)
+def test_pool_lists_every_candidate(pool, word, weights):
+    word_stress = stress(word, weights, [])
+    candidates = list(word_stress.generate_candidates())
+    built = pool(word_stress)
+    assert len(built) == len(candidates)
+    assert [OT.Stress.syllables_string(candidate) for candidate in built.to_candidates()] == [OT.Stress.syllables_string(candidate) for candidate in candidates]
+
+@pytest.mark.parametrize("word, weights", WORDS)
+def test_candidate_bits_formats_split_the_candidates(word, weights):
+    pool = OT.CandidateBits(stress(word, weights, []))
+    for i in range(pool.length):
+        union = 0
+        for k in range(len(pool.formats[i])):
+            assert union & pool.formats[i][k] == 0
+            union |= pool.formats[i][k]
+        assert union == pool.all
+
+# Words far too long to list the candidates of (more than len can give back), which dp and trie solve in time linear in
+# the length of the word
+@pytest.mark.parametrize("ranking", RANKINGS[:2])
+def test_long_word(ranking):
+    word_stress = stress("cacə" * 20, None, ranking, ["shortening"])
+    assert OT.CandidateTrie(word_stress).remaining() > 2 ** 63
+    dp = [OT.Stress.syllables_string(candidate) for candidate in word_stress.op_dp()]
+    assert len(dp) > 0 and all([len(candidate) == 40 for candidate in word_stress.op_dp()])
+    assert [OT.Stress.syllables_string(candidate) for candidate in word_stress.op_trie()] == dp
+
+# Returns the events traced by the engine for the word under the ranking, and its optimal patterns
+def trace(engine, word, weights, ranking):
+    sink = OT.MemorySink()
+    word_stress = stress(word, weights, ranking, ["shortening"])
+    candidates = word_stress.op_engine(engine=engine, sink=sink)
+    return sink.events, [OT.Stress.syllables_string(candidate) for candidate in candidates]
+
+# Pool engines count the same candidates in and out of each stratum as op
+@pytest.mark.parametrize("engine", ENGINES[1:])
+@pytest.mark.parametrize("ranking", RANKINGS + STRATIFIED)
+@pytest.mark.parametrize("word, weights", WORDS)
+def test_pool_engines_trace_as_op(engine, word, weights, ranking):
+    op, expected = trace("op", word, weights, ranking)
+    events, patterns = trace(engine, word, weights, ranking)
+    assert patterns == expected
+    assert [event["event"] for event in events] == ["generate"] + ["constraint"] * (len(events) - 1)
+    assert events[0]["out"] == [event for event in op if event["event"] == "generate"][0]["out"]
+    keys = ["rank", "violation", "direction", "in", "out"]
+    assert [[event[key] for key in keys] for event in events[1:]] == [[event[key] for key in keys] for event in op if event["event"] == "constraint"]
+
+# dp lists no candidates before the optimal ones, but gives the minimum of every stratum, those of op among them
+@pytest.mark.parametrize("ranking", RANKINGS + STRATIFIED)
+@pytest.mark.parametrize("word, weights", WORDS)
+def test_dp_traces_the_minimum_of_each_stratum(word, weights, ranking):
+    op, expected = trace("op", word, weights, ranking)
+    events, patterns = trace("dp", word, weights, ranking)
+    assert events[0]["event"] == "solve" and events[0]["out"] == len(expected)
+    minima = dict([(event["rank"], event["minimum"]) for event in events[1:]])
+    for event in op:
+        if event["event"] == "constraint":
+            assert minima[event["rank"]] == event["minimum"]
@@ -0,0 +1,35 @@
+import pytest
+import OT
+
+VIOLATIONS = [("Trochee", "R"), ("Iamb", "L"), ("Parse", "R"), ("NonFin", "R"), ("*Clash", "R")]
+WORDS = [("cacəca", "LLH"), ("cacacəca", "LLLL"), ("pa:ca", "HL"), ("cacacaca", None)]
+
+# Returns the optimal patterns of the word under the ranking as parse prints them
+def optimal(ranking, word, weights):
+    grammar = OT.Grammar(ranking, ["shortening"], cache_size=0)
+    return [OT.Stress.syllables_string(candidate) for candidate in grammar.evaluate(word, weights)]
+
+@pytest.mark.parametrize("target", [VIOLATIONS, VIOLATIONS[::-1], [VIOLATIONS[1], VIOLATIONS[3], VIOLATIONS[0], VIOLATIONS[4], VIOLATIONS[2]]])
+def test_learned_ranking_reproduces_the_data(target):
+    learner = OT.Learner(VIOLATIONS, ["shortening"])
+    data = [(word, weights, optimal(target, word, weights)[0]) for word, weights in WORDS]
+    for word, weights, attested in data:
+        learner.add(word, weights, attested)
+    ranking = learner.learn()
+    assert ranking != None
+    assert learner.conflicts == []
+    assert sorted([violation for stratum in ranking for violation in stratum]) == sorted(VIOLATIONS)
+    for word, weights, attested in data:
+        assert attested in optimal(ranking, word, weights)
+
+def test_inconsistent_data_are_reported():
+    learner = OT.Learner(VIOLATIONS, ["shortening"])
+    learner.add("cacəca", "LLH", optimal(VIOLATIONS, "cacəca", "LLH")[0])
+    learner.add("cacəca", "LLH", optimal(VIOLATIONS[::-1], "cacəca", "LLH")[0])
+    assert learner.learn() == None
+    assert len(learner.conflicts) > 0
+
+def test_pattern_not_a_candidate_is_rejected():
+    learner = OT.Learner(VIOLATIONS, ["shortening"])
+    with pytest.raises(ValueError):
+        learner.add("cacəca", "LLH", "(ˈca)(ˈcə)(ˈca:)x")
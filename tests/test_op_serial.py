@@ -0,0 +1,54 @@
+import pytest
+from DHS import syllable_wise
+from cases import WORDS, RANKINGS, NOT_CONSIDERING
+
+# Returns the results of Harmonic Serialism found the plain way, as strings: every change of a candidate by a single
+# operation is evaluated in full with Stress.penalty under every violation in effect, and the changes doing best are
+# followed until none does better than the candidate itself
+def reference(stress):
+    # A word without syllables has a single candidate, on which NonFin cannot be evaluated
+    violations = [violation for violation in stress.violations if violation.in_effect and len(stress.syllables) > 0]
+    def score(candidate):
+        return tuple([syllable_wise.Stress.penalty(candidate, violation) for violation in violations])
+    faithful = stress.faithful()
+    current = {syllable_wise.Stress.key(faithful): faithful}
+    results = {}
+    while len(current) > 0:
+        following = {}
+        for key, candidate in current.items():
+            best = score(candidate)
+            winners = []
+            for operation, start, syllables in stress.operations(candidate):
+                changed = candidate[:start] + syllables + candidate[start + len(syllables):]
+                value = score(changed)
+                if value < best:
+                    best = value
+                    winners = [changed]
+                elif value == best and len(winners) > 0:
+                    winners += [changed]
+            if len(winners) == 0:
+                results.setdefault(key, candidate)
+            for changed in winners:
+                following.setdefault(syllable_wise.Stress.key(changed), changed)
+        current = following
+    return [syllable_wise.Stress.syllables_string(syllable_wise.Stress.classify_stress(list(candidate))) for candidate in results.values()]
+
+@pytest.mark.parametrize("not_considering", NOT_CONSIDERING)
+@pytest.mark.parametrize("ranking", RANKINGS)
+@pytest.mark.parametrize("word, weights", WORDS)
+def test_op_serial_matches_reference(word, weights, ranking, not_considering):
+    stress = syllable_wise.word_stress(word, weights, ranking, not_considering)
+    candidates = [syllable_wise.Stress.syllables_string(candidate) for candidate in stress.op_serial()]
+    assert candidates == reference(syllable_wise.word_stress(word, weights, ranking, not_considering))
+
+@pytest.mark.parametrize("word, weights", WORDS)
+def test_op_serial_derivation_steps(word, weights):
+    stress = syllable_wise.word_stress(word, weights, RANKINGS[0], [])
+    stress.op_serial()
+    for derivation in stress.derivations:
+        assert derivation[0][0] == "faithful"
+        assert syllable_wise.Stress.key(derivation[0][1]) == syllable_wise.Stress.key(stress.faithful())
+        # Each step is one of the changes of the candidate before it by a single operation
+        for (operation, before), (step, after) in zip(derivation, derivation[1:]):
+            changes = [syllable_wise.Stress.key(before[:start] + syllables + before[start + len(syllables):]) for name, start, syllables in stress.operations(before)]
+            assert syllable_wise.Stress.key(after) in changes
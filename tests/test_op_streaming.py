@@ -0,0 +1,39 @@
+import OT
+from cases import patterns
+
+# Returns the stress object of the word under the ranking, ignoring shortening
+def stress(word, ranking):
+    stress = OT.Stress(OT.Syllable.to_syllable_array(word))
+    stress.set_violations(ranking)
+    stress.not_considering = ["shortening"]
+    return stress
+
+def test_skipped_strata_keep_no_checkpoint():
+    # *Long-V is left out (no vowel can be shortened), so the candidates are streamed into Trochee
+    word = stress("cacəcacəca", [("*Long-V", "R"), ("Trochee", "R"), ("Parse", "R"), ("NonFin", "R")])
+    word.op()
+    assert [rank for rank, survivors in word.checkpoints] == [2, 3]
+    assert all([len(survivors) < len(list(word.generate_candidates())) for rank, survivors in word.checkpoints])
+
+def test_every_stratum_skipped():
+    word = stress("cacə", [("*Long-V", "R")])
+    assert len(word.op()) == len(list(word.generate_candidates()))
+    assert word.checkpoints == []
+
+def test_resume_after_move():
+    ranking = [("*Long-V", "R"), ("Trochee", "R"), ("Parse", "R"), ("NonFin", "R")]
+    word = stress("cacəcacəca", ranking)
+    word.op()
+    word.move("NonFin", 2)
+    assert word.resume_point() == 2
+    resumed = [OT.Stress.syllables_string(candidate) for candidate in word.op()]
+    assert resumed == patterns("op", "cacəcacəca", None, [("*Long-V", "R"), ("Trochee", "R"), ("NonFin", "R"), ("Parse", "R")], ["shortening"])
+
+def test_trace_counts_streamed_candidates():
+    word = stress("cacəcacəca", [("*Long-V", "R"), ("Trochee", "R"), ("Parse", "R")])
+    sink = OT.MemorySink()
+    word.op(sink=sink)
+    generate = sink.events[0]
+    assert generate["event"] == "generate"
+    assert generate["in"] == len(list(word.generate_candidates()))
+    assert sink.events[1]["in"] == generate["out"]
@@ -0,0 +1,46 @@
+import json
+import pytest
+from DHS import pattern_wise
+from test_pattern_table import RANKINGS
+
+LENGTHS = [0, 1, 2, 3, 4, 5, 7, 8, 11, 3, 1]
+
+# Returns the Stress of n syllables (or of a batch of a list of them) under the ranking after Stress.op
+def solved(ranking, n):
+    stress = pattern_wise.Stress(n)
+    for violation in ranking:
+        stress.add(list(violation))
+    stress.op()
+    return stress
+
+@pytest.mark.parametrize("ranking", RANKINGS[::5] + [[]])
+def test_batch_matches_each_word_alone(ranking):
+    batch = solved(ranking, LENGTHS)
+    assert batch.finalized()
+    for row in range(len(LENGTHS)):
+        try:
+            alone = solved(ranking, LENGTHS[row])
+        except IndexError:
+            assert type(batch.errors[row]) == IndexError
+            continue
+        assert not row in batch.errors
+        # Compared as written in the JSON output, where a boolean and an integer differ
+        assert json.dumps(batch.row_pattern(row)) == json.dumps(alone.pattern)
+        assert batch.row_finalize_mark(row) == alone.finalize_mark
+
+def test_pattern_and_finalize_mark_are_written_back():
+    stress = pattern_wise.Stress(3)
+    stress.pattern = [[0, 1], [1, 0], [-1, None]]
+    stress.finalize_mark = [[True, True], [True, False], [False, False]]
+    assert stress.pattern == [[0, 1], [1, 0], [-1, None]]
+    assert stress.finalize_mark == [[True, True], [True, False], [False, False]]
+    assert not stress.finalized()
+    stress.finalize_mark = [[True, True]] * 3
+    assert stress.finalized()
+
+def test_pattern_of_the_wrong_length_is_rejected():
+    stress = pattern_wise.Stress(2)
+    with pytest.raises(ValueError):
+        stress.pattern = [[0, 1]]
+    with pytest.raises(ValueError):
+        stress.finalize_mark = [[True, True]] * 3
@@ -0,0 +1,28 @@
+import json
+import itertools
+import pytest
+from DHS import pattern_wise
+
+TYPES = ["Trochee", "Iamb", "Parse", "NonFin", "HD(w)"]
+# Every order of the violation types, all leftward, all rightward or alternating
+RANKINGS = [[[name, direction] for name, direction in zip(order, directions)] for order in itertools.permutations(TYPES) for directions in [[True] * 5, [False] * 5, [True, False] * 3]]
+
+# Returns the pattern as written in the JSON output, where a boolean and an integer differ
+def written(pattern):
+    return json.dumps(pattern)
+
+@pytest.mark.parametrize("ranking", RANKINGS[::7] + [RANKINGS[0][:2], [["NonFin", True]], []])
+def test_table_matches_solve(ranking):
+    table = pattern_wise.PatternTable(ranking, max_length=12)
+    for n in range(1, 15):
+        try:
+            expected = written(table.solve(n))
+        except IndexError:
+            with pytest.raises(IndexError):
+                table.pattern(n)
+            continue
+        assert written(table.pattern(n)) == expected
+
+def test_word_pattern_uses_the_number_of_syllables():
+    table = pattern_wise.PatternTable([["Trochee", False], ["Parse", False], ["NonFin", False]], max_length=8)
+    assert table.word_pattern("cacəca") == table.solve(3)
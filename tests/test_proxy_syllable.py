@@ -0,0 +1,31 @@
+import threading
+import OT
+
+def test_states_are_shared():
+    state = OT.ProxySyllable("mora", "primary", "left", "H")
+    assert OT.ProxySyllable("mora", "primary", "left", "H") is state
+    assert state.mod_stress("unstressed").mod_stress("primary") is state
+
+def test_states_created_by_threads_at_once_are_shared():
+    barrier = threading.Barrier(8)
+    states = []
+    # Each thread creates the same state never created before, all starting at once
+    def create():
+        barrier.wait()
+        states.append(OT.ProxySyllable("nonmora", "secondary", "whole", "L shortened"))
+    threads = [threading.Thread(target=create) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert all([state is states[0] for state in states])
+
+def test_syllables_share_the_states_of_candidates():
+    syllables = OT.Syllable.to_syllable_array("cacə")
+    assert syllables[0].proxy() is OT.ProxySyllable("not schwa", "unstressed", "none", "L")
+    syllables[1].apply(OT.ProxySyllable("nonmora", "primary", "whole", "L"))
+    assert syllables[1].state is OT.ProxySyllable("nonmora", "primary", "whole", "L")
+    assert not syllables[1].mora and syllables[1].copy().state is syllables[1].state
+    syllables[0].mod_weight("H")
+    assert syllables[0].state is OT.ProxySyllable("not schwa", "unstressed", "none", "H")
+    assert OT.Stress.syllables_string(syllables, "weight") == OT.Stress.syllables_string([syllable.proxy() for syllable in syllables], "weight")
@@ -0,0 +1,62 @@
+import pytest
+import OT
+
+WORDS = ["cacəcacəca", "pavalu", "kakə", "cacacəca", "ca"]
+BEFORE = [("*Long-V", "R"), ("Trochee", "R"), ("Parse", "R"), ("NonFin", "R")]
+AFTER = [("*Long-V", "R"), ("Iamb", "L"), ("Parse", "L"), ("NonFin", "R")]
+
+# Returns the patterns of each word of the results of Lexicon.evaluate or rerank, as strings
+def strings(results):
+    return [[OT.Stress.syllables_string(candidate) for candidate in word] for word in results]
+
+# Returns the patterns of each word evaluated afresh under the ranking, as strings
+def expected(ranking):
+    grammar = OT.Grammar(ranking, ["shortening"], cache_size=0)
+    return strings([grammar.evaluate(word) for word in WORDS])
+
+def test_rerank_matches_evaluation_under_the_new_ranking():
+    lexicon = OT.Lexicon(BEFORE, ["shortening"], cache_size=8)
+    before = strings(lexicon.evaluate(WORDS, workers=1))
+    results, changed = lexicon.rerank(AFTER, WORDS)
+    after = strings(results)
+    assert before == expected(BEFORE)
+    assert after == expected(AFTER)
+    assert len(changed) > 0
+    assert changed == [WORDS[i] for i in range(len(WORDS)) if before[i] != after[i]]
+
+def test_rerank_keeps_at_most_cache_size_shapes():
+    lexicon = OT.Lexicon(BEFORE, ["shortening"], cache_size=2)
+    lexicon.rerank(AFTER, WORDS)
+    assert len(lexicon.states) == 2
+    # Only survivors are kept, never the whole set of candidates of a word
+    for state in lexicon.states.values():
+        for rank, survivors in state.checkpoints:
+            assert len(survivors) < len(list(state.generate_candidates()))
+
+def test_rerank_does_not_count_cache_lookups():
+    lexicon = OT.Lexicon(BEFORE, ["shortening"], cache_size=1000)
+    lexicon.evaluate(WORDS, workers=1)
+    cache = OT.Lexicon.caches[1000]
+    hits, misses = cache.hits, cache.misses
+    lexicon.rerank(AFTER, WORDS)
+    assert (cache.hits, cache.misses) == (hits, misses)
+
+def test_other_engines_keep_no_states():
+    lexicon = OT.Lexicon(BEFORE, ["shortening"], engine="dp", cache_size=8)
+    results, changed = lexicon.rerank(AFTER, WORDS)
+    assert len(lexicon.states) == 0
+    assert strings(results) == expected(AFTER)
+
+def test_words_are_built_as_the_grammar_builds_them_over_processes():
+    lexicon = OT.Lexicon(BEFORE, ["shortening"], cache_size=8)
+    assert strings(lexicon.evaluate(WORDS, workers=2, chunk_size=2)) == expected(BEFORE)
+    results, changed = lexicon.rerank(AFTER, WORDS)
+    assert strings(results) == expected(AFTER)
+
+@pytest.mark.parametrize("weights", [["LL", "LLL"], ["LLLLLLLLLL", "LLL", "LL", "LLLLLLLL", "L", "L"]])
+def test_weights_not_as_many_as_words_are_an_error(weights):
+    lexicon = OT.Lexicon(BEFORE, ["shortening"], cache_size=8)
+    with pytest.raises(ValueError, match="as many weights as words"):
+        lexicon.evaluate(WORDS, weights, workers=1)
+    with pytest.raises(ValueError, match="as many weights as words"):
+        lexicon.rerank(AFTER, WORDS, weights)
@@ -0,0 +1,58 @@
+import pytest
+import OT
+from DHS import syllable_wise, pattern_wise
+from cases import WORDS, RANKINGS, NOT_CONSIDERING
+from test_pattern_table import RANKINGS as PATTERN_RANKINGS
+
+# Returns the violations left out by the SimplifiedRanking of the stress object, as (rank, name, direction, reason)
+def removed(module, stress):
+    return [(rank, violation.name, violation.direction, reason) for rank, violation, reason in module.SimplifiedRanking.get(stress).removed]
+
+# The ranking of the pattern-wise module (directions as booleans, True for leftward) as (name, direction) pairs
+def directed(ranking):
+    return [(name, "L" if leftward else "R") for name, leftward in ranking]
+
+# The copies in OT and in the syllable-wise module (which has no strata) leave out the same violations, for the same
+# reasons
+@pytest.mark.parametrize("not_considering", NOT_CONSIDERING)
+@pytest.mark.parametrize("ranking", RANKINGS + [directed(ranking) for ranking in PATTERN_RANKINGS[::11]])
+@pytest.mark.parametrize("word, weights", WORDS)
+def test_syllable_wise_copy_matches_OT(word, weights, ranking, not_considering):
+    expected = removed(OT, OT.Grammar(ranking, not_considering, auto_max=False, cache_size=0).stress(word, weights))
+    assert removed(syllable_wise, syllable_wise.word_stress(word, weights, ranking, not_considering)) == expected
+
+# Returns the pattern of n syllables under the ranking simplified by the pattern-wise module, or, if unique is False,
+# without leaving out the violations found by the uniqueness rule (the other rules being part of the model itself)
+def pattern(ranking, n, unique=True):
+    stress = pattern_wise.Stress(n)
+    stress.violation_rank = [list(violation) for violation in ranking]
+    if not unique:
+        simplified = pattern_wise.SimplifiedRanking(ranking)
+        kept = [rank for rank, violation, reason in simplified.removed if "unique" in reason]
+        left_out = [rank for rank, violation, reason in simplified.removed if not "unique" in reason]
+        violations = [list(ranking[rank]) for rank in range(len(ranking)) if not rank in left_out]
+        word_violation = simplified.word_violation + [ranking[rank][0] for rank in kept if ranking[rank][0] in ["HD(w)"]]
+        def clean():
+            stress.violation_rank = violations
+            stress.word_violation = word_violation
+            stress.simplified = simplified
+            return []
+        stress.clean = clean
+    try:
+        stress.op()
+    except IndexError:
+        return IndexError
+    return stress.pattern
+
+# The uniqueness rule of the pattern-wise copy only leaves out violations that never change the pattern, as the
+# violations left out by the other copies never change the optimal patterns (see test_engines)
+@pytest.mark.parametrize("ranking", PATTERN_RANKINGS)
+def test_pattern_wise_copy_keeps_the_pattern(ranking):
+    for n in range(1, 9):
+        assert pattern(ranking, n) == pattern(ranking, n, unique=False)
+
+# Simplifying the simplified ranking again leaves out nothing more
+@pytest.mark.parametrize("ranking", PATTERN_RANKINGS[::7])
+def test_pattern_wise_copy_is_final(ranking):
+    simplified = pattern_wise.SimplifiedRanking(ranking)
+    assert pattern_wise.SimplifiedRanking(simplified.violations).removed == []
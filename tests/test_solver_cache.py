@@ -0,0 +1,54 @@
+import OT
+
+RANKING = [("Trochee", "R"), ("Parse", "R"), ("NonFin", "R")]
+
+# Returns the stress object of the word under RANKING
+def stress(word, weights=None):
+    stress = OT.Stress(OT.Syllable.to_syllable_array(word))
+    stress.set_violations(RANKING)
+    if weights != None:
+        for i in range(len(weights)):
+            stress.syllables[i].mod_weight(weights[i])
+    return stress
+
+# Returns the patterns as strings
+def strings(candidates):
+    return [OT.Stress.syllables_string(candidate) for candidate in candidates]
+
+def test_words_of_the_same_shape_share_patterns():
+    cache = OT.SolverCache()
+    assert strings(cache.op(stress("cacəca"))) == strings(stress("cacəca").op())
+    assert strings(cache.op(stress("pavəlu"))) == strings(stress("pavəlu").op())
+    assert (cache.hits, cache.misses, len(cache)) == (1, 1, 1)
+    # A different weight or ranking is a different shape
+    cache.op(stress("pavəlu", "LLH"))
+    other = stress("cacəca")
+    other.move("NonFin", 0)
+    cache.op(other)
+    assert (cache.hits, cache.misses, len(cache)) == (1, 3, 3)
+    assert cache.hit_rate() == 0.25
+
+def test_least_recently_used_shape_is_forgotten():
+    cache = OT.SolverCache(max_size=2)
+    cache.op(stress("ca"))
+    cache.op(stress("caca"))
+    cache.op(stress("ca"))
+    cache.op(stress("cacaca"))
+    assert len(cache) == 2
+    assert cache.peek(stress("caca")) == None
+    assert cache.peek(stress("ca")) != None
+    assert cache.peek(stress("cacaca")) != None
+
+def test_patterns_returned_are_copies():
+    cache = OT.SolverCache()
+    first = cache.op(stress("cacəca"))
+    first[0][0] = None
+    assert strings(cache.op(stress("cacəca"))) == strings(stress("cacəca").op())
+
+def test_size_zero_keeps_nothing():
+    cache = OT.SolverCache(max_size=0)
+    assert strings(cache.op(stress("cacəca"))) == strings(stress("cacəca").op())
+    assert strings(cache.op(stress("cacəca"))) == strings(stress("cacəca").op())
+    assert (cache.hits, cache.misses, len(cache)) == (0, 2, 0)
+    cache.clear()
+    assert (cache.hits, cache.misses) == (0, 0)
@@ -0,0 +1,71 @@
+import pytest
+import OT
+from cases import WORDS, STRATIFIED, NOT_CONSIDERING, patterns
+
+ENGINES = ["op", "dp", "bits", "trie", "array"]
+# Pairs of rankings, the second run on the survivors kept by op under the first
+RERANKINGS = [
+    ([[("Trochee", "R"), ("Parse", "L")], ("NonFin", "R")], [[("Trochee", "R"), ("Parse", "L")], [("NonFin", "R"), ("*Clash", "L")]]),
+    ([[("Trochee", "R"), ("Parse", "L")], ("NonFin", "R")], [[("Trochee", "R"), ("Parse", "R")], ("NonFin", "R")]),
+    ([("Iamb", "R"), ("Parse", "R"), ("*Clash", "L")], [("Iamb", "R"), [("Parse", "R"), ("*Clash", "L")]]),
+    ([("Parse", "L"), [("Trochee", "L"), ("HD(w)", "R")]], [("Parse", "L"), ("Trochee", "L"), ("HD(w)", "R")])
+]
+
+# Returns the optimal patterns of the word in stress found by listing out every candidate and keeping, stratum by
+# stratum, the ones with the least sum of the violations of the stratum, as strings
+def reference(stress):
+    candidates = list(stress.generate_candidates())
+    for stratum in stress.strata():
+        violations = [violation for violation in stratum if violation.in_effect]
+        if len(violations) == 0 or len(candidates) <= 1:
+            continue
+        values = [sum([OT.Stress.penalty(candidate, violation) for violation in violations]) for candidate in candidates]
+        candidates = [candidates[i] for i in range(len(candidates)) if values[i] == min(values)]
+    return [OT.Stress.syllables_string(OT.Stress.classify_stress(list(candidate))) for candidate in candidates]
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("not_considering", NOT_CONSIDERING)
+@pytest.mark.parametrize("ranking", STRATIFIED)
+@pytest.mark.parametrize("word, weights", WORDS)
+def test_strata_match_reference(word, weights, ranking, not_considering, engine):
+    if engine == "array":
+        pytest.importorskip("numpy")
+    stress = OT.Grammar(ranking, not_considering, cache_size=0).stress(word, weights)
+    assert patterns(engine, word, weights, ranking, not_considering) == reference(stress)
+
+@pytest.mark.parametrize("before, after", RERANKINGS)
+@pytest.mark.parametrize("word, weights", WORDS)
+def test_strata_resumed_match_reference(word, weights, before, after):
+    stress = OT.Grammar(before, ["shortening"], cache_size=0).stress(word, weights)
+    stress.op()
+    stress.set_violations(after)
+    stress.add_auto_max()
+    candidates = [OT.Stress.syllables_string(candidate) for candidate in stress.op()]
+    assert candidates == reference(OT.Grammar(after, ["shortening"], cache_size=0).stress(word, weights))
+
+def test_strict_ranking_is_strata_of_one():
+    stress = OT.Stress([])
+    stress.set_violations([("Trochee", "R"), ("Parse", "L")])
+    assert [[violation.name for violation in stratum] for stratum in stress.strata()] == [["Trochee"], ["Parse"]]
+    stress.set_violations([[("Trochee", "R"), ("Parse", "L")], ("NonFin", "R")])
+    assert [[violation.name for violation in stratum] for stratum in stress.strata()] == [["Trochee", "Parse"], ["NonFin"]]
+
+# Returns the (name, rank, stratum) of each violation of the ranking
+def ranks(violations):
+    return [(violation.name, violation.rank, violation.stratum) for violation in violations]
+
+def test_move_leaves_the_grammar_as_it_is():
+    grammar = OT.Grammar([("Trochee", "R"), ("Parse", "R"), ("NonFin", "R")], cache_size=0)
+    before = ranks(grammar.violations)
+    patterns = [OT.Stress.syllables_string(candidate) for candidate in grammar.evaluate("cacaca")]
+    stress = grammar.stress("cacaca")
+    stress.move("NonFin", 0)
+    assert ranks(stress.violations)[:3] == [("NonFin", 0, 0), ("Trochee", 1, 1), ("Parse", 2, 2)]
+    assert ranks(grammar.violations) == before
+    assert [OT.Stress.syllables_string(candidate) for candidate in grammar.evaluate("cacaca")] == patterns
+
+def test_move_out_of_a_stratum():
+    stress = OT.Stress([])
+    stress.set_violations([[("Trochee", "R"), ("Parse", "L"), ("NonFin", "R")], ("*Clash", "L")])
+    stress.move("Parse", 3)
+    assert [[violation.name for violation in stratum] for stratum in stress.strata()] == [["Trochee", "NonFin"], ["*Clash"], ["Parse"]]
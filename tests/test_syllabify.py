@@ -0,0 +1,36 @@
+import pytest
+import OT
+from DHS import syllable_wise, pattern_wise
+
+# The Character class of each code file
+CHARACTERS = [OT.Character, syllable_wise.Character, pattern_wise.Character]
+# Words with multi-codepoint segments and their (onset, nucleus, coda) parts
+WORDS = [
+    ("", []),
+    ("cacəca", [("c", "a", None), ("c", "ə", None), ("c", "a", None)]),
+    # Bound consonants written with a tie bar, or as several letters
+    ("d͡ʒat͡sə", [("d͡ʒ", "a", None), ("t͡s", "ə", None)]),
+    ("tʃhaka", [("tʃh", "a", None), ("k", "a", None)]),
+    # A nasal vowel written with a combining tilde, and a precomposed one outside the inventory
+    ("pɑ̃ta", [("p", "ɑ̃", None), ("t", "a", None)]),
+    ("pãta", [("p", "ã", None), ("t", "a", None)]),
+    # A combining mark kept with the consonant it follows, which is then a coda
+    ("ak̚ta", [(None, "a", "k̚"), ("t", "a", None)]),
+    # Vowels in a row form one nucleus
+    ("aia", [(None, "aia", None)]),
+    # A consonant alone has no syllable
+    ("t͡ʃ", [])
+]
+
+@pytest.mark.parametrize("character", CHARACTERS)
+@pytest.mark.parametrize("word, parts", WORDS)
+def test_syllabify(character, word, parts):
+    assert character.syllabify(word) == parts
+
+@pytest.mark.parametrize("character", CHARACTERS)
+def test_segments_keep_multi_codepoint_segments_whole(character):
+    assert character.segments("d͡ʒɪ̈k̚ã") == [("d͡ʒ", "d͡ʒ"), ("ɪ̈", "ɪ̈"), ("k̚", "k"), ("ã", "a")]
+
+def test_syllables_keep_their_segments():
+    assert [str(syllable) for syllable in OT.Syllable.to_syllable_array("d͡ʒat͡sə")] == ["d͡ʒa", "t͡sə"]
+    assert pattern_wise.Syllable_Processor.to_syllables("ak̚tʃha") == ["ak̚", "tʃha"]
@@ -0,0 +1,44 @@
+import OT
+
+# Returns the syllables as strings
+def strings(syllables):
+    return [str(syllable) for syllable in syllables]
+
+def test_repeated_words_are_syllabified_once():
+    cache = OT.SyllableCache()
+    assert strings(cache.to_syllable_array("pavəlu")) == strings(OT.Syllable.to_syllable_array("pavəlu"))
+    assert cache.parts("pavəlu") is cache.parts("pavəlu")
+    assert (cache.hits, cache.misses, len(cache)) == (2, 1, 1)
+    assert cache.hit_rate() == 2 / 3
+
+def test_syllables_are_new_objects_each_time():
+    cache = OT.SyllableCache()
+    first = cache.to_syllable_array("cacə")
+    first[0].mod_weight("H")
+    assert [syllable.weight for syllable in cache.to_syllable_array("cacə")] == ["L", "L"]
+
+def test_least_recently_used_word_is_forgotten():
+    cache = OT.SyllableCache(max_size=2)
+    cache.parts("ca")
+    cache.parts("pa")
+    cache.parts("ca")
+    cache.parts("ta")
+    assert list(cache.words) == ["ca", "ta"]
+    cache.parts("pa")
+    assert (cache.hits, cache.misses) == (1, 4)
+
+def test_size_zero_keeps_nothing():
+    cache = OT.SyllableCache(max_size=0)
+    assert cache.parts("cacəca") == tuple(OT.Character.syllabify("cacəca"))
+    assert cache.parts("cacəca") == tuple(OT.Character.syllabify("cacəca"))
+    assert (cache.hits, cache.misses, len(cache)) == (0, 2, 0)
+    cache.clear()
+    assert (cache.hits, cache.misses) == (0, 0)
+
+def test_grammar_keeps_the_weights_of_syllables_given():
+    syllables = OT.Syllable.to_syllable_array("caca")
+    syllables[0].mod_weight("H")
+    grammar = OT.Grammar([("Trochee", "R"), ("Parse", "R")], cache_size=0)
+    assert [syllable.weight for syllable in grammar.stress(syllables).syllables] == ["H", "L"]
+    assert [syllable.weight for syllable in grammar.stress(syllables, "LH").syllables] == ["L", "H"]
+    assert [syllable.weight for syllable in syllables] == ["H", "L"]
@@ -0,0 +1,34 @@
+import itertools
+import pytest
+import OT
+
+VIOLATIONS = [("Trochee", "R"), ("Iamb", "L"), ("Parse", "R"), ("NonFin", "R")]
+SHAPES = [("cacəca", "LLH"), ("pa:ca", "HL"), ("cacacəca", None)]
+
+# Returns the language of every full ranking, found by evaluating each shape under each ranking on its own
+def brute_force(violations, shapes, not_considering):
+    languages = {}
+    for ranking in itertools.permutations(violations):
+        grammar = OT.Grammar(list(ranking), not_considering, cache_size=0)
+        language = tuple([tuple([OT.Stress.syllables_string(candidate) for candidate in grammar.evaluate(word, weights)]) for word, weights in shapes])
+        languages.setdefault(language, []).append(ranking)
+    return languages
+
+@pytest.mark.parametrize("not_considering", [[], ["shortening"]])
+def test_typology_matches_brute_force(not_considering):
+    typology = OT.Typology(VIOLATIONS, SHAPES, not_considering)
+    languages = typology.run()
+    expected = brute_force(VIOLATIONS, SHAPES, not_considering)
+    assert set(languages) == set(expected)
+    for language in languages:
+        assert typology.count(language) == len(expected[language])
+        assert sorted(typology.rankings(language)) == sorted(expected[language])
+
+def test_typology_counts_every_ranking_once():
+    typology = OT.Typology(VIOLATIONS, SHAPES)
+    typology.run()
+    assert sum([typology.count(language) for language in typology.languages]) == 24
+
+def test_typology_rejects_mismatched_weights():
+    with pytest.raises(ValueError):
+        OT.Typology(VIOLATIONS, [("cacəca", "LH")]).run()